@@ -6,13 +6,91 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+import threading
 import os
 
+from .driver_pool import DriverPool
+from .cart_session import probe_logged_in, restore_session, save_session
+from .cart_engine import CONCURRENCY, CartLoginError, CartProductError, TransientCartError, merge_outcomes, progress_callbacks, run_cart_jobs
+from .cart_selectors import find_add_to_cart_button
+from . import debug_artifacts
+from .cart_waits import (
+    LatencyBudget,
+    get_cart_count,
+    wait_for_cart_change,
+    wait_for_page_quiet,
+    wait_for_ready_state,
+)
 
-def make_driver(headless: bool = True):
-    """Create a Selenium WebDriver instance"""
+# Time budget for one product and the upper limit of each step within it (seconds)
+PRODUCT_BUDGET = float(os.getenv("CART_PRODUCT_BUDGET", "30"))
+PAGE_LOAD_TIMEOUT = 15
+BUTTON_TIMEOUT = 10
+CART_UPDATE_TIMEOUT = 8
+PAGE_QUIET_TIMEOUT = 2
+
+# Lean browsing: don't wait for or download what the cart flow never looks at
+LEAN_BROWSING = os.getenv("CART_LEAN_BROWSING", "1") == "1"
+BLOCKED_URL_PATTERNS = [
+    # Images, media and fonts
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.woff", "*.woff2", "*.ttf",
+    # Analytics, ads and third-party trackers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*",
+    "*criteo.com*", "*criteo.net*", "*bing.com*", "*tiktok.com*", "*pinterest.com*",
+    "*taboola.com*", "*outbrain.com*", "*clarity.ms*", "*onetrust.com*",
+] + [pattern for pattern in os.getenv("CART_BLOCKED_URLS", "").split(",") if pattern]
+
+# ChromeDriverManager().install() checks/downloads the driver, so resolve it once per process
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+# One pool of warm drivers per Digitec account
+_driver_pools = {}
+_driver_pools_lock = threading.Lock()
+
+
+def get_chromedriver_path() -> str:
+    """Get the local chromedriver path, installing it on first use"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+
+def block_urls(driver, patterns: list = None) -> bool:
+    """
+    Block requests matching patterns via the Chrome DevTools Protocol
+    
+    Returns:
+        bool: True if blocking is active (needs a local Chrome driver with CDP)
+    """
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or BLOCKED_URL_PATTERNS})
+        return True
+    except Exception as e:
+        print(f"Could not block URLs: {e}")
+        return False
+
+
+def make_driver(headless: bool = True, lean: bool = None):
+    """
+    Create a Selenium WebDriver instance
+    
+    Args:
+        headless: Run the browser without a window
+        lean: Use the lean browsing profile (defaults to CART_LEAN_BROWSING): return from
+              page loads at DOMContentLoaded, no images, blocked media/fonts/trackers
+    """
+    if lean is None:
+        lean = LEAN_BROWSING
     SELENIUM_URL = os.getenv("SELENIUM_URL", "")
     options = Options()
     
@@ -40,18 +118,29 @@ def make_driver(headless: bool = True):
     
     options.add_experimental_option("excludeSwitches", ["enable-logging", "enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
-    options.add_experimental_option("prefs", {
+    prefs = {
         "profile.default_content_setting_values.notifications": 2,
         "credentials_enable_service": False,
         "profile.password_manager_enabled": False
-    })
+    }
+    
+    if lean:
+        # The cart flow waits for the elements it needs itself, so don't wait for every subresource
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        prefs["profile.managed_default_content_settings.images"] = 2
+    
+    options.add_experimental_option("prefs", prefs)
     
     # Try to use remote Selenium if URL is provided (Docker environment)
     # Otherwise, use local Chrome driver
     try:
         if SELENIUM_URL and SELENIUM_URL.startswith("http"):
             print(f"Attempting to connect to remote Selenium: {SELENIUM_URL}")
-            return webdriver.Remote(command_executor=SELENIUM_URL, options=options)
+            driver = webdriver.Remote(command_executor=SELENIUM_URL, options=options)
+            if lean:
+                block_urls(driver)
+            return driver
     except Exception as e:
         print(f"Remote Selenium not available: {e}, falling back to local Chrome")
     
@@ -59,10 +148,11 @@ def make_driver(headless: bool = True):
     try:
         print("Creating local Chrome driver...")
         from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
         
-        service = Service(ChromeDriverManager().install())
+        service = Service(get_chromedriver_path())
         driver = webdriver.Chrome(service=service, options=options)
+        if lean:
+            block_urls(driver)
         print("Chrome driver created successfully")
         return driver
     except Exception as e:
@@ -70,6 +160,8 @@ def make_driver(headless: bool = True):
         # Last resort: try default Chrome driver
         try:
             driver = webdriver.Chrome(options=options)
+            if lean:
+                block_urls(driver)
             print("Chrome driver created using default method")
             return driver
         except Exception as e2:
@@ -100,7 +192,6 @@ def login_to_digitec(driver, email: str, password: str) -> bool:
         
         # Click Next
         driver.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
-        time.sleep(1)
         
         # Password field
         password_field = wait.until(EC.presence_of_element_located((By.ID, "password")))
@@ -108,9 +199,12 @@ def login_to_digitec(driver, email: str, password: str) -> bool:
         
         # Click login
         driver.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
-        time.sleep(3)
         
-        # Check if logged in
+        # Logged in once we are redirected away from the login page
+        try:
+            wait.until(lambda d: "id.digitecgalaxus.ch" not in d.current_url)
+        except TimeoutException:
+            pass
         return "id.digitecgalaxus.ch" not in driver.current_url
         
     except Exception as e:
@@ -118,6 +212,61 @@ def login_to_digitec(driver, email: str, password: str) -> bool:
         return False
 
 
+def ensure_logged_in(driver, email: str, password: str, restore: bool = True) -> bool:
+    """
+    Log a driver in, reusing the stored session when it is still valid
+    
+    Args:
+        driver: Selenium WebDriver instance
+        email: Account email
+        password: Account password
+        restore: Try the stored session before the login form
+    
+    Returns:
+        bool: True if the driver is logged in
+    """
+    if restore and restore_session(driver, email, password):
+        if probe_logged_in(driver):
+            print("✅ Restored stored Digitec session")
+            return True
+        print("Stored Digitec session is no longer valid, logging in...")
+    
+    if not login_to_digitec(driver, email, password):
+        return False
+    save_session(driver, email, password)
+    return True
+
+
+def get_driver_pool(email: str = None, password: str = None) -> DriverPool:
+    """
+    Get the driver pool for a Digitec account, creating it on first use
+    
+    Args:
+        email: Digitec account email (optional, drivers are logged in when given)
+        password: Digitec account password
+    
+    Returns:
+        DriverPool: Pool whose drivers are logged in to this account
+    """
+    key = (email, password) if email and password else None
+    with _driver_pools_lock:
+        pool = _driver_pools.get(key)
+        if pool is None:
+            login = (lambda driver: ensure_logged_in(driver, email, password)) if key else None
+            pool = DriverPool(factory=lambda: make_driver(headless=True), login=login)
+            _driver_pools[key] = pool
+        return pool
+
+
+def close_driver_pools():
+    """Quit all pooled drivers"""
+    with _driver_pools_lock:
+        pools = list(_driver_pools.values())
+        _driver_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
 def add_product_to_cart(product_url: str, email: str = None, password: str = None) -> dict:
     """
     Add a product to the Digitec/Galaxus cart
@@ -130,238 +279,199 @@ def add_product_to_cart(product_url: str, email: str = None, password: str = Non
     Returns:
         dict: {"success": bool, "message": str, "cart_url": str}
     """
-    driver = None
+    print("=" * 50)
+    print("Starting add_product_to_cart")
+    print(f"URL: {product_url}")
+    print("=" * 50)
+    
+    try:
+        with get_driver_pool(email, password).checkout() as pooled:
+            print("Driver checked out from pool")
+            # Pooled drivers are logged in when created; retry once if that failed
+            if email and password and not pooled.logged_in:
+                print("Driver is not logged in, retrying login...")
+                pooled.logged_in = ensure_logged_in(pooled.driver, email, password, restore=False)
+                if not pooled.logged_in:
+                    return {
+                        "success": False,
+                        "message": "Fehler: Login fehlgeschlagen",
+                        "cart_url": None
+                    }
+            return _add_product_with_driver(pooled.driver, product_url)
+    except Exception as e:
+        print(f"Error in add_product_to_cart: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Fehler: {str(e)}",
+            "cart_url": None
+        }
+
+
+def _add_product_with_driver(driver, product_url: str) -> dict:
+    """Add a product to the cart using an already started (and logged in) driver"""
+    budget = LatencyBudget(PRODUCT_BUDGET, label=f"add_product_to_cart {product_url}")
+    job_id = debug_artifacts.new_job_id("add")
     try:
-        print("=" * 50)
-        print("Starting add_product_to_cart")
-        print(f"URL: {product_url}")
-        print("=" * 50)
-        
-        driver = make_driver(headless=True)  # Headless mode - browser runs in background
-        print("Driver created successfully")
-        
-        # Login if credentials provided
-        if email and password:
-            print("Attempting login...")
-            login_success = login_to_digitec(driver, email, password)
-            if not login_success:
-                print("Login failed or skipped, continuing anyway...")
-        
         # Navigate to product page
         print(f"Navigating to: {product_url}")
-        driver.get(product_url)
-        wait = WebDriverWait(driver, 15)
+        with budget.step("navigate"):
+            driver.get(product_url)
         
         # Wait for page to load - look for any button to ensure page is interactive
         print("Waiting for page to load...")
-        try:
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "button")))
-            print("Page loaded, buttons detected")
-        except TimeoutException:
-            print("Timeout waiting for page to load")
+        with budget.step("page load"):
+            try:
+                WebDriverWait(driver, budget.timeout(PAGE_LOAD_TIMEOUT)).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "button"))
+                )
+                print("Page loaded, buttons detected")
+            except TimeoutException:
+                print("Timeout waiting for page to load")
         
-        # Additional wait to ensure JavaScript has executed
-        time.sleep(2)  # Reduced from 3
+        # Wait until the page's JavaScript has settled (no DOM changes or requests)
+        with budget.step("page quiet"):
+            wait_for_page_quiet(driver, budget.timeout(PAGE_QUIET_TIMEOUT))
+        cart_count_before = get_cart_count(driver)
+        cart_count_after = None
         
         print(f"Current URL: {driver.current_url}")
         print(f"Page title: {driver.title}")
         
-        # Common selectors for "Add to Cart" button on Digitec/Galaxus
-        add_to_cart_selectors = [
-            (By.ID, "addToCartButton"),  # The button has this ID
-            (By.CSS_SELECTOR, "button[data-test='addToCartButton']"),
-            (By.XPATH, "//button[contains(text(), 'In den Warenkorb legen')]"),  # Exact text match
-            (By.XPATH, "//button[contains(text(), 'In den Warenkorb')]"),  # Partial match
-            (By.CSS_SELECTOR, "button[aria-label*='Warenkorb']"),
-            (By.CSS_SELECTOR, "button[data-cy='add-to-cart']"),
-            (By.CSS_SELECTOR, "button.add-to-cart"),
-            (By.CSS_SELECTOR, ".productDetail__addToCart button"),
-            (By.CSS_SELECTOR, "[data-testid='add-to-cart-button']"),
-            (By.XPATH, "//button[contains(text(), 'Warenkorb')]"),
-            (By.XPATH, "//button[contains(@class, 'add')]"),
-        ]
+        # Find the add to cart button (learned selector order, then in-browser scoring)
+        with budget.step("find button"):
+            add_button, matched_by = find_add_to_cart_button(driver, product_url, budget.timeout(BUTTON_TIMEOUT))
         
-        button_found = False
-        for selector_type, selector_value in add_to_cart_selectors:
+        button_found = add_button is not None
+        if button_found:
+            print(f"Button found by {matched_by}")
+            
+            # Scroll to button
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", add_button)
+            
+            # Get button details before clicking
+            button_text = add_button.text
+            button_aria = add_button.get_attribute("aria-label")
+            print(f"Found button - Text: '{button_text}', Aria-label: '{button_aria}'")
+            
+            # Check if button is enabled/clickable
+            is_enabled = add_button.is_enabled()
+            is_displayed = add_button.is_displayed()
+            print(f"Button state - Enabled: {is_enabled}, Displayed: {is_displayed}")
+            
+            # Print cookies before clicking
+            cookies_before = len(driver.get_cookies())
+            print(f"Cookies before click: {cookies_before}")
+            
+            # Try regular click first
             try:
-                print(f"Trying selector: {selector_type} = {selector_value}")
-                add_button = wait.until(
-                    EC.element_to_be_clickable((selector_type, selector_value))
-                )
-                
-                # Scroll to button
-                driver.execute_script("arguments[0].scrollIntoView(true);", add_button)
-                time.sleep(0.5)
-                
-                # Get button details before clicking
-                button_text = add_button.text
-                button_aria = add_button.get_attribute("aria-label")
-                print(f"Found button - Text: '{button_text}', Aria-label: '{button_aria}'")
-                
-                # Check if button is enabled/clickable
-                is_enabled = add_button.is_enabled()
-                is_displayed = add_button.is_displayed()
-                print(f"Button state - Enabled: {is_enabled}, Displayed: {is_displayed}")
-                
-                # Print cookies before clicking
-                cookies_before = len(driver.get_cookies())
-                print(f"Cookies before click: {cookies_before}")
-                
-                # Try regular click first
-                try:
-                    print("Attempting regular click...")
-                    add_button.click()
-                    print("Regular click executed")
-                except Exception as click_error:
-                    print(f"Regular click failed: {click_error}, trying JavaScript click...")
-                    driver.execute_script("arguments[0].click();", add_button)
-                    print("JavaScript click executed")
-                
-                # Wait a bit and check cookies after
-                time.sleep(2)
-                cookies_after = len(driver.get_cookies())
-                print(f"Cookies after click: {cookies_after}")
-                
-                if cookies_after > cookies_before:
-                    print(f"✅ {cookies_after - cookies_before} new cookie(s) added")
-                
-                button_found = True
-                
-                # Wait for cart to update and any animation/popup to appear
-                time.sleep(2)  # Reduced from 3
-                
-                # Check for modals or popups that might have appeared
-                try:
-                    modals = driver.find_elements(By.CSS_SELECTOR, "[role='dialog'], .modal, [class*='popup']")
-                    if modals:
-                        print(f"Found {len(modals)} modal(s)/popup(s)")
-                        for modal in modals:
-                            print(f"Modal text: {modal.text[:200]}")
-                except:
-                    pass
-                
-                # Save screenshot after clicking
-                driver.save_screenshot("debug_after_cart_click.png")
-                print("Screenshot saved after cart click")
-                
-                # Save page source after click
-                with open("debug_after_click_source.html", "w", encoding="utf-8") as f:
-                    f.write(driver.page_source)
-                print("Page source saved after click")
-                
-                # Check for success indicators
-                try:
-                    # Look for common success messages or modals
-                    success_indicators = [
-                        (By.XPATH, "//*[contains(text(), 'Warenkorb')]"),
-                        (By.XPATH, "//*[contains(text(), 'hinzugefügt')]"),
-                        (By.XPATH, "//*[contains(text(), 'added')]"),
-                        (By.CSS_SELECTOR, "[class*='success']"),
-                        (By.CSS_SELECTOR, "[class*='notification']"),
-                        (By.CSS_SELECTOR, "[role='alert']")
-                    ]
-                    
-                    for sel_type, sel_val in success_indicators:
-                        try:
-                            indicator = driver.find_element(sel_type, sel_val)
-                            print(f"✅ Found success indicator: {indicator.text[:100]}")
-                        except:
-                            continue
-                except Exception as e:
-                    print(f"No obvious success indicators: {e}")
-                
-                # Instead of navigating to cart, wait longer for the sidebar to load
-                time.sleep(2)  # Reduced from 5
-                
-                # Look for cart sidebar with items
-                try:
-                    cart_sidebar = driver.find_element(By.CSS_SELECTOR, "[aria-label='Warenkorb']")
-                    cart_text = cart_sidebar.text
-                    print(f"Cart sidebar text: {cart_text[:200]}")
-                    
-                    if "Noch nichts passendes gefunden" in cart_text or "nichts" in cart_text.lower():
-                        print("⚠️  Cart sidebar shows empty state")
-                    else:
-                        print("✅ Cart sidebar has content (product may be added)")
-                except Exception as e:
-                    print(f"Could not check cart sidebar: {e}")
-                
-                # Try clicking the cart icon in header to see count
-                print("Checking cart icon in header...")
-                try:
-                    cart_button = driver.find_element(By.ID, "toggleShoppingCartButton")
-                    cart_aria = cart_button.get_attribute("aria-label")
-                    print(f"Cart button aria-label: {cart_aria}")
-                    
-                    if "Keine Produkte" in cart_aria:
-                        print("⚠️ Cart icon shows: No products in cart")
-                    else:
-                        print("✅ Cart icon may show items")
-                except Exception as e:
-                    print(f"Could not check cart icon: {e}")
-                
-
-                
-                break
-                
-            except (TimeoutException, NoSuchElementException) as e:
-                print(f"Selector failed: {e}")
-                continue
-        
-        if not button_found:
-            # Try to find any button containing cart-related text
-            print("Primary selectors failed, scanning all buttons...")
+                print("Attempting regular click...")
+                add_button.click()
+                print("Regular click executed")
+            except Exception as click_error:
+                print(f"Regular click failed: {click_error}, trying JavaScript click...")
+                driver.execute_script("arguments[0].click();", add_button)
+                print("JavaScript click executed")
+            
+            # Wait for the cart count in the header to change
+            with budget.step("cart update"):
+                cart_count_after = wait_for_cart_change(driver, cart_count_before, budget.timeout(CART_UPDATE_TIMEOUT))
+            if cart_count_after is not None:
+                print(f"✅ Cart count changed: {cart_count_before} -> {cart_count_after}")
+            
+            cookies_after = len(driver.get_cookies())
+            print(f"Cookies after click: {cookies_after}")
+            
+            if cookies_after > cookies_before:
+                print(f"✅ {cookies_after - cookies_before} new cookie(s) added")
+            
+            # Wait for any animation/popup to finish rendering
+            with budget.step("popup"):
+                wait_for_page_quiet(driver, budget.timeout(PAGE_QUIET_TIMEOUT))
+            
+            # Check for modals or popups that might have appeared
+            try:
+                modals = driver.find_elements(By.CSS_SELECTOR, "[role='dialog'], .modal, [class*='popup']")
+                if modals:
+                    print(f"Found {len(modals)} modal(s)/popup(s)")
+                    for modal in modals:
+                        print(f"Modal text: {modal.text[:200]}")
+            except:
+                pass
+            
+            # Sampled debug capture of successful clicks (CART_DEBUG_CAPTURE=sample/always)
+            debug_artifacts.capture(driver, job_id, "after_cart_click", success=True, selector=matched_by)
+            
+            # Check for success indicators
             try:
-                buttons = driver.find_elements(By.TAG_NAME, "button")
-                print(f"Found {len(buttons)} buttons on page")
-                for i, button in enumerate(buttons):
+                # Look for common success messages or modals
+                success_indicators = [
+                    (By.XPATH, "//*[contains(text(), 'Warenkorb')]"),
+                    (By.XPATH, "//*[contains(text(), 'hinzugefügt')]"),
+                    (By.XPATH, "//*[contains(text(), 'added')]"),
+                    (By.CSS_SELECTOR, "[class*='success']"),
+                    (By.CSS_SELECTOR, "[class*='notification']"),
+                    (By.CSS_SELECTOR, "[role='alert']")
+                ]
+                
+                for sel_type, sel_val in success_indicators:
                     try:
-                        text = button.text.lower() if button.text else ""
-                        aria_label = button.get_attribute("aria-label") or ""
-                        aria_label_lower = aria_label.lower()
-                        class_name = button.get_attribute("class") or ""
-                        
-                        print(f"Button {i}: text='{button.text[:50]}', aria-label='{aria_label[:50]}', class='{class_name[:50]}'")
-                        
-                        if any(word in text for word in ["warenkorb", "cart", "kaufen", "bestellen", "in den warenkorb"]):
-                            print(f"Found cart button by text: {button.text}")
-                            driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                            time.sleep(0.5)
-                            button.click()
-                            button_found = True
-                            break
-                        elif any(word in aria_label_lower for word in ["warenkorb", "cart", "kaufen"]):
-                            print(f"Found cart button by aria-label: {aria_label}")
-                            driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                            time.sleep(0.5)
-                            button.click()
-                            button_found = True
-                            break
-                    except Exception as e:
+                        indicator = driver.find_element(sel_type, sel_val)
+                        print(f"✅ Found success indicator: {indicator.text[:100]}")
+                    except:
                         continue
-                        
             except Exception as e:
-                print(f"Button search failed: {e}")
+                print(f"No obvious success indicators: {e}")
+            
+            # Look for cart sidebar with items
+            try:
+                cart_sidebar = driver.find_element(By.CSS_SELECTOR, "[aria-label='Warenkorb']")
+                cart_text = cart_sidebar.text
+                print(f"Cart sidebar text: {cart_text[:200]}")
+                
+                if "Noch nichts passendes gefunden" in cart_text or "nichts" in cart_text.lower():
+                    print("⚠️  Cart sidebar shows empty state")
+                else:
+                    print("✅ Cart sidebar has content (product may be added)")
+            except Exception as e:
+                print(f"Could not check cart sidebar: {e}")
+            
+            # Try clicking the cart icon in header to see count
+            print("Checking cart icon in header...")
+            try:
+                cart_button = driver.find_element(By.ID, "toggleShoppingCartButton")
+                cart_aria = cart_button.get_attribute("aria-label")
+                print(f"Cart button aria-label: {cart_aria}")
+                
+                if "Keine Produkte" in cart_aria:
+                    print("⚠️ Cart icon shows: No products in cart")
+                else:
+                    print("✅ Cart icon may show items")
+            except Exception as e:
+                print(f"Could not check cart icon: {e}")
         
         if not button_found:
-            # Save screenshot for debugging
-            screenshot_path = "debug_no_cart_button.png"
-            driver.save_screenshot(screenshot_path)
-            print(f"Screenshot saved to: {screenshot_path}")
+            budget.report()
             
-            # Also save page source
-            with open("debug_page_source.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            print("Page source saved to: debug_page_source.html")
+            # Save screenshot and page source for debugging
+            artifacts_dir = debug_artifacts.capture(driver, job_id, "no_cart_button", success=False)
             
+            message = "Warenkorb-Button nicht gefunden"
+            if artifacts_dir:
+                message += f". Debug-Dateien: {artifacts_dir}"
             return {
                 "success": False,
-                "message": f"Warenkorb-Button nicht gefunden. Screenshot: {screenshot_path}",
+                "message": message,
                 "cart_url": None
             }
         
-        # Wait for cart update
-        time.sleep(2)
+        # Wait for cart update (unless it was already seen after the click)
+        if cart_count_after is None:
+            with budget.step("cart update"):
+                cart_count_after = wait_for_cart_change(driver, cart_count_before, budget.timeout(CART_UPDATE_TIMEOUT))
+            if cart_count_after is None:
+                print("⚠️  Cart count did not change after clicking")
+                debug_artifacts.capture(driver, job_id, "cart_unchanged", success=False)
+        budget.report()
         
         # Get cart URL
         cart_url = "https://www.digitec.ch/cart"
@@ -378,115 +488,99 @@ def add_product_to_cart(product_url: str, email: str = None, password: str = Non
         traceback.print_exc()
         
         # Try to save debug info even on error
-        try:
-            if driver:
-                screenshot_path = "debug_error_screenshot.png"
-                driver.save_screenshot(screenshot_path)
-                print(f"Error screenshot saved to: {screenshot_path}")
-                
-                with open("debug_error_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(driver.page_source)
-                print("Error page source saved to: debug_error_page_source.html")
-        except:
-            pass
+        debug_artifacts.capture(driver, job_id, "error", success=False, error=str(e))
             
         return {
             "success": False,
             "message": f"Fehler: {str(e)}",
             "cart_url": None
         }
+
+
+def _add_product_by_url(driver, url: str) -> dict:
+    """
+    Add one product without the diagnostics of add_product_to_cart (the fast path for batch jobs)
+    
+    Raises:
+        TransientCartError: If the page didn't load in time or the browser failed
+        CartProductError: If the page has no add-to-cart button
+    """
+    budget = LatencyBudget(PRODUCT_BUDGET, label=f"add_multiple_products_to_cart {url}")
+    try:
+        with budget.step("navigate"):
+            driver.get(url)
+        
+        # Wait for page to load
+        with budget.step("page load"):
+            wait_for_ready_state(driver, budget.timeout(PAGE_LOAD_TIMEOUT))
+        
+        # Find and click add to cart button
+        with budget.step("find button"):
+            add_button, _ = find_add_to_cart_button(driver, url, budget.timeout(BUTTON_TIMEOUT))
+        if add_button is None:
+            debug_artifacts.capture(driver, debug_artifacts.new_job_id("batch"), "no_cart_button", success=False)
+            raise CartProductError("Warenkorb-Button nicht gefunden")
+        cart_count_before = get_cart_count(driver)
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", add_button)
         
+        # Use JavaScript click (more reliable)
+        driver.execute_script("arguments[0].click();", add_button)
+        
+        # Wait for cart to update before the driver moves on
+        with budget.step("cart update"):
+            cart_count = wait_for_cart_change(driver, cart_count_before, budget.timeout(CART_UPDATE_TIMEOUT))
+        if cart_count is None:
+            print(f"⚠️  Cart count did not change after clicking for {url}")
+        return {"cart_count": cart_count}
+    except WebDriverException as e:
+        raise TransientCartError(str(e)) from e
     finally:
-        if driver:
-            try:
-                print("Closing browser...")
-                driver.quit()
-                print("Browser closed successfully")
-            except Exception as e:
-                print(f"Error closing driver: {e}")
+        budget.report()
 
 
-def add_multiple_products_to_cart(product_urls: list, email: str = None, password: str = None) -> dict:
+def add_multiple_products_to_cart(product_urls: list, email: str = None, password: str = None, concurrency: int = CONCURRENCY,
+                                  on_progress=None) -> dict:
     """
-    Add multiple products to the cart in one session
+    Add multiple products to the cart, several at a time
+    
+    Each product is added by its own pooled driver (all logged in to the same
+    account, so they share one cart); transient failures are retried.
     
     Args:
         product_urls: List of product URLs to add
         email: Digitec account email (optional)
         password: Digitec account password (optional)
+        concurrency: Maximum number of products added at the same time
+        on_progress: Called with ("started" | "added" | "failed", data) per product as it happens
     
     Returns:
-        dict: {"success": bool, "added": int, "failed": int, "cart_url": str}
+        dict: {"success": bool, "added": int, "failed": int, "cart_url": str, "results": list}
     """
-    driver = None
-    added = 0
-    failed = 0
+    pool = get_driver_pool(email, password)
+    logged_in = bool(email and password)
+    
+    def add_one(url: str) -> dict:
+        with pool.checkout() as pooled:
+            # Pooled drivers are logged in when created; retry once if that failed
+            if logged_in and not pooled.logged_in:
+                pooled.logged_in = ensure_logged_in(pooled.driver, email, password, restore=False)
+                if not pooled.logged_in:
+                    raise CartLoginError("Login fehlgeschlagen")
+            return _add_product_by_url(pooled.driver, url)
+    
+    # Without an account every browser has its own cart, so stay on one driver
+    workers = min(concurrency, pool.size) if logged_in else 1
     
     try:
-        driver = make_driver(headless=True)
-        
-        # Login once for all products
-        if email and password:
-            login_success = login_to_digitec(driver, email, password)
-            if not login_success:
-                return {
-                    "success": False,
-                    "added": 0,
-                    "failed": len(product_urls),
-                    "message": "Login fehlgeschlagen",
-                    "cart_url": None
-                }
-        
-        # Process each product
-        for url in product_urls:
-            try:
-                driver.get(url)
-                wait = WebDriverWait(driver, 10)
-                
-                # Wait for page to load
-                time.sleep(2)
-                
-                # Try to find and click add to cart button using the ID
-                try:
-                    add_button = wait.until(EC.element_to_be_clickable((By.ID, "addToCartButton")))
-                    driver.execute_script("arguments[0].scrollIntoView(true);", add_button)
-                    time.sleep(0.3)
-                    
-                    # Use JavaScript click (more reliable)
-                    driver.execute_script("arguments[0].click();", add_button)
-                    added += 1
-                    time.sleep(1.5)  # Wait for cart to update
-                    
-                except Exception as e:
-                    print(f"Failed to add {url}: {e}")
-                    failed += 1
-                    
-            except Exception as e:
-                print(f"Error processing {url}: {e}")
-                failed += 1
-        
-        return {
-            "success": added > 0,
-            "added": added,
-            "failed": failed,
-            "message": f"{added} Produkt(e) hinzugefügt, {failed} fehlgeschlagen",
-            "cart_url": "https://www.galaxus.ch/de/checkout/cart"
-        }
-        
+        on_start, on_result = progress_callbacks(on_progress)
+        outcomes = run_cart_jobs(product_urls, add_one, concurrency=workers, on_start=on_start, on_result=on_result)
+        return merge_outcomes(outcomes, cart_url="https://www.galaxus.ch/de/checkout/cart")
     except Exception as e:
         print(f"Error in add_multiple_products_to_cart: {str(e)}")
         return {
             "success": False,
-            "added": added,
-            "failed": failed,
+            "added": 0,
+            "failed": len(product_urls),
             "message": f"Fehler: {str(e)}",
             "cart_url": None
         }
-        
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
-
@@ -0,0 +1,127 @@
+"""
+Previews for many product URLs at once (onboarding a whole household)
+URLs are deduplicated by Galaxus product id, the remaining products are
+previewed concurrently and results are yielded as they complete, so the
+route can stream them. Page downloads go through a per-host rate limiter to
+stay polite to the shop; products already in the product cache cost nothing.
+"""
+
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .recognize_products import parse_product_id
+
+MAX_URLS = int(os.getenv("BULK_PREVIEW_MAX_URLS", "100"))
+CONCURRENCY = int(os.getenv("BULK_PREVIEW_CONCURRENCY", "4"))
+HOST_RATE = float(os.getenv("PREVIEW_HOST_RATE", "4"))  # page downloads per second and host
+HOST_BURST = int(os.getenv("PREVIEW_HOST_BURST", "4"))
+GALAXUS_HOST = "galaxus.ch"
+
+
+class HostRateLimiter:
+    """
+    Token bucket per host: at most burst requests at once, then rate per second
+
+    Args:
+        rate: Requests per second and host
+        burst: Requests allowed back to back before the rate applies
+    """
+
+    def __init__(self, rate: float = HOST_RATE, burst: int = HOST_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, url_or_host: str):
+        """Block until a request to the host may be made"""
+        host = urlparse(url_or_host).hostname or url_or_host
+        while True:
+            with self._lock:
+                now = self._clock()
+                tokens, updated_at = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            self._sleep(wait)
+
+
+def rate_limited(fetch: Callable, limiter: HostRateLimiter, host: str = GALAXUS_HOST) -> Callable:
+    """Wrap a fetch function so every call first waits for the host's rate limit"""
+    @functools.wraps(fetch)
+    def limited(*args, **kwargs):
+        limiter.acquire(host)
+        return fetch(*args, **kwargs)
+    return limited
+
+
+def dedupe_urls(urls: List[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Group URLs by product id
+
+    Returns:
+        tuple: ({product_id: [urls, in input order]} in order of first appearance, [URLs without a product id])
+    """
+    products: Dict[str, List[str]] = {}
+    invalid = []
+    for url in urls:
+        url = (url or "").strip()
+        if not url:
+            continue
+        product_id = parse_product_id(url)
+        if product_id:
+            products.setdefault(product_id, []).append(url)
+        else:
+            invalid.append(url)
+    return products, invalid
+
+
+def preview_products(urls: List[str], get_preview: Callable[[str], Optional[dict]],
+                     concurrency: int = CONCURRENCY) -> Iterator[dict]:
+    """
+    Preview every distinct product of urls, yielding results as they complete
+
+    Args:
+        urls: Product URLs (duplicates and URL variants of one product are previewed once)
+        get_preview: Preview data by product id (e.g. ProductCache.get_by_id)
+        concurrency: Products previewed at the same time
+
+    Yields:
+        dict: {"url", "product_id", "success", "duplicates", "title", "image_url", "price", ...}
+              or {"url", "product_id", "success": False, "error"}
+    """
+    products, invalid = dedupe_urls(urls)
+    for url in invalid:
+        yield {"url": url, "product_id": None, "success": False, "error": "Keine Galaxus-Produkt-URL"}
+    if not products:
+        return
+
+    def preview(product_id: str) -> dict:
+        first_url, *duplicates = products[product_id]
+        result = {"url": first_url, "product_id": product_id, "duplicates": duplicates}
+        try:
+            data = get_preview(product_id)
+        except Exception as e:
+            return {**result, "success": False, "error": str(e)}
+        if not data or not data.get("title"):
+            return {**result, "success": False, "error": "Produktdaten konnten nicht geladen werden"}
+        return {**result, "success": True, **data}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(products))), thread_name_prefix="preview")
+    try:
+        futures = [executor.submit(preview, product_id) for product_id in products]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Stop queued previews if the consumer goes away (e.g. a closed stream)
+        executor.shutdown(wait=False, cancel_futures=True)
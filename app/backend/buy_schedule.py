@@ -0,0 +1,225 @@
+"""
+Next buy date calculation for subscriptions
+Computes the next occurrence of a subscription cadence in constant time
+instead of stepping forward one interval at a time.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+# Preset frequencies offered in the UI, mapped to (unit, step)
+PRESET_MAP = {
+    "täglich": ("days", 1),
+    "wöchentlich": ("weeks", 1),
+    "alle 2 Wochen": ("weeks", 2),
+    "monatlich": ("months", 1),
+    "alle 2 Monate": ("months", 2),
+    "vierteljährlich": ("months", 3),
+    "halbjährlich": ("months", 6),
+    "jährlich": ("years", 1),
+}
+
+# Custom frequency units - support both German and English
+UNIT_MAP = {
+    "days": "days",
+    "weeks": "weeks",
+    "months": "months",
+    "years": "years",
+    "Tag(e)": "days",
+    "Woche(n)": "weeks",
+    "Monat(e)": "months",
+    "Jahr(e)": "years",
+    "tage": "days",
+    "wochen": "weeks",
+    "monate": "months",
+    "jahre": "years",
+}
+
+# Column order expected by next_buy_dates() for each subscription row
+SCHEDULE_COLUMNS = (
+    "start_date", "frequency_type", "frequency_value", "frequency_unit",
+    "specific_day_type", "weekday", "monthday", "frequency",
+)
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def parse_start_date(start_date_str: Optional[str], today: date) -> date:
+    """Parse a stored start date, falling back to today for missing or invalid values"""
+    if not start_date_str:
+        return today
+    try:
+        return datetime.strptime(start_date_str, DATE_FORMAT).date()
+    except (ValueError, TypeError):
+        return today
+
+
+def resolve_increment(frequency_type: Optional[str], frequency_value: Optional[int] = None,
+                      frequency_unit: Optional[str] = None,
+                      frequency_preset: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Resolve the frequency settings of a subscription to an increment
+
+    Returns:
+        tuple: (unit, step) where unit is one of "days", "weeks", "months", "years"
+    """
+    if frequency_type == "preset":
+        return PRESET_MAP.get(frequency_preset, ("days", 1))
+
+    if frequency_type == "custom" and frequency_value and frequency_unit:
+        try:
+            step = int(frequency_value)
+        except (ValueError, TypeError):
+            step = 0
+        if step > 0:
+            return UNIT_MAP.get(frequency_unit, "days"), step
+
+    # Default to daily
+    return "days", 1
+
+
+def _set_monthday(d: date, monthday: int) -> date:
+    """Move a date to a specific day of its month (-1 = last day), clamped to the month length"""
+    last_day = calendar.monthrange(d.year, d.month)[1]
+    if monthday == -1:
+        return d.replace(day=last_day)
+    if monthday < 1:
+        return d
+    return d.replace(day=min(monthday, last_day))
+
+
+def next_occurrence(start: date, unit: str, step: int, today: date,
+                    specific_day_type: Optional[str] = None,
+                    weekday: Optional[int] = None, monthday: Optional[int] = None) -> date:
+    """
+    Get the first occurrence of a cadence that falls after today
+
+    Occurrences are start + k * step for k >= 1, anchored on the start date, so
+    a subscription started on the 31st lands on the last day of shorter months
+    and returns to the 31st afterwards. A start date in the future is returned
+    unchanged.
+    """
+    if start > today:
+        return start
+
+    if unit in ("days", "weeks"):
+        step_days = step * 7 if unit == "weeks" else step
+        periods = (today - start).days // step_days + 1
+        next_date = start + timedelta(days=periods * step_days)
+    else:
+        step_months = step * 12 if unit == "years" else step
+        elapsed_months = (today.year - start.year) * 12 + (today.month - start.month)
+        periods = max(elapsed_months // step_months, 1)
+        next_date = start + relativedelta(months=periods * step_months)
+        if next_date <= today:
+            next_date = start + relativedelta(months=(periods + 1) * step_months)
+
+    # Apply specific day constraints if set
+    if specific_day_type == "weekday" and weekday is not None:
+        next_date += timedelta(days=(weekday - next_date.weekday()) % 7)
+    elif specific_day_type == "monthday" and monthday is not None:
+        next_date = _set_monthday(next_date, monthday)
+
+        # If we're past this day in the current month, move to next occurrence
+        if next_date <= today:
+            next_date += relativedelta(months=step if unit == "months" else 1)
+            next_date = _set_monthday(next_date, monthday)
+
+    return next_date
+
+
+def next_buy_date(start_date_str: Optional[str], frequency_type: Optional[str],
+                  frequency_value: Optional[int] = None, frequency_unit: Optional[str] = None,
+                  specific_day_type: Optional[str] = None, weekday: Optional[int] = None,
+                  monthday: Optional[int] = None, frequency_preset: Optional[str] = None,
+                  today: Optional[date] = None) -> str:
+    """Calculate the next buy date (YYYY-MM-DD) based on start date and frequency settings"""
+    today = today or date.today()
+    start = parse_start_date(start_date_str, today)
+    unit, step = resolve_increment(frequency_type, frequency_value, frequency_unit, frequency_preset)
+    return next_occurrence(start, unit, step, today, specific_day_type, weekday, monthday).strftime(DATE_FORMAT)
+
+
+def schedule_row(start_date: Optional[str], frequency_type: Optional[str], frequency_value, frequency_unit,
+                 specific_day_type, weekday, monthday, frequency, created_at: Optional[str] = None) -> tuple:
+    """
+    Build a row for next_buy_dates(), mapping legacy subscriptions
+
+    Legacy subscriptions store their interval in days as frequency (e.g. "7") and
+    have no frequency type or start date; they become a custom interval of that
+    many days, starting on the day they were created.
+    """
+    if not start_date and created_at:
+        start_date = created_at[:10]
+    if frequency_type in (None, "", "preset") and str(frequency).isdigit() and int(frequency) > 0:
+        frequency_type, frequency_value, frequency_unit = "custom", int(frequency), "days"
+    return (start_date, frequency_type, frequency_value, frequency_unit,
+            specific_day_type, weekday, monthday, frequency)
+
+
+def next_buy_dates(rows: Iterable[Sequence], today: Optional[date] = None) -> List[str]:
+    """
+    Calculate next buy dates for many subscriptions in one pass
+
+    Args:
+        rows: Subscription rows with the fields listed in SCHEDULE_COLUMNS, in that order
+        today: Reference date (defaults to the current date)
+
+    Returns:
+        list: Next buy dates (YYYY-MM-DD), in the same order as rows
+    """
+    today = today or date.today()
+    increments = {}
+    results = []
+
+    for (start_date_str, frequency_type, frequency_value, frequency_unit,
+         specific_day_type, weekday, monthday, frequency) in rows:
+        frequency_preset = frequency if frequency_type == "preset" else None
+
+        key = (frequency_type, frequency_value, frequency_unit, frequency_preset)
+        increment = increments.get(key)
+        if increment is None:
+            increment = increments[key] = resolve_increment(*key)
+
+        start = parse_start_date(start_date_str, today)
+        next_date = next_occurrence(start, increment[0], increment[1], today,
+                                    specific_day_type, weekday, monthday)
+        results.append(next_date.strftime(DATE_FORMAT))
+
+    return results
+
+
+def roll_over_next_buy_dates(pool, today: Optional[date] = None) -> int:
+    """
+    Advance next buy dates that are due or already passed
+
+    next_buy_date is computed when a subscription is created or updated, so only
+    rows whose date is today or earlier (or was never set) need to be touched.
+    All of them are recalculated and written back in a single transaction.
+
+    Args:
+        pool: Database connection pool
+        today: Reference date (defaults to the current date)
+
+    Returns:
+        int: Number of subscriptions that were rolled over
+    """
+    today = today or date.today()
+
+    with pool.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, created_at, {", ".join(SCHEDULE_COLUMNS)}
+            FROM subscriptions
+            WHERE next_buy_date IS NULL OR next_buy_date <= ?
+        """, (today.strftime(DATE_FORMAT),)).fetchall()
+
+        next_dates = next_buy_dates((schedule_row(*row[2:], created_at=row[1]) for row in rows), today=today)
+        updates = [(next_date, row[0]) for next_date, row in zip(next_dates, rows)]
+
+        if updates:
+            conn.executemany("UPDATE subscriptions SET next_buy_date = ? WHERE id = ?", updates)
+
+    return len(updates)
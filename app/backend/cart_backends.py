@@ -0,0 +1,217 @@
+"""
+Cart backends: how products get into the Digitec/Galaxus cart
+HttpCartBackend replays the shop's add-to-cart request with the cookies of
+the stored browser session (see cart_session), which costs one HTTP request
+instead of a Chrome page load. SeleniumCartBackend drives the real page and
+is used as the fallback whenever the HTTP path is unavailable or fails.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import requests
+
+from .add_to_cart import add_multiple_products_to_cart, add_product_to_cart
+from .cart_engine import merge_outcomes, progress_callbacks, run_cart_jobs
+from .cart_session import read_snapshot
+from .recognize_products import parse_product_id
+
+# The HTTP fast path is off until the cart endpoint is configured
+HTTP_ENDPOINT = os.getenv("CART_HTTP_ENDPOINT", "")
+HTTP_ORIGIN = os.getenv("CART_HTTP_ORIGIN", "https://www.galaxus.ch")
+HTTP_TIMEOUT = float(os.getenv("CART_HTTP_TIMEOUT", "10"))
+HTTP_CONCURRENCY = int(os.getenv("CART_HTTP_CONCURRENCY", "4"))
+CART_URL = "https://www.galaxus.ch/de/checkout/cart"
+
+
+class CartBackendError(Exception):
+    """The backend could not add the product (the caller may fall back to another backend)"""
+
+
+class CartBackend(ABC):
+    """Interface of a cart backend; results have the shape of add_to_cart's functions"""
+
+    name = "base"
+
+    def available(self, email: Optional[str], password: Optional[str]) -> bool:
+        return True
+
+    @abstractmethod
+    def add_product(self, product_url: str, email: str = None, password: str = None) -> dict:
+        """
+        Returns:
+            dict: {"success": bool, "message": str, "cart_url": str}
+        """
+
+    @abstractmethod
+    def add_products(self, product_urls: List[str], email: str = None, password: str = None,
+                     on_progress=None) -> dict:
+        """
+        on_progress, when given, is called with ("started" | "added" | "failed", data) per product.
+
+        Returns:
+            dict: {"success": bool, "added": int, "failed": int, "message": str, "cart_url": str, "results": list}
+        """
+
+
+class SeleniumCartBackend(CartBackend):
+    """Adds products through pooled headless Chrome sessions"""
+
+    name = "selenium"
+
+    def add_product(self, product_url: str, email: str = None, password: str = None) -> dict:
+        return add_product_to_cart(product_url, email, password)
+
+    def add_products(self, product_urls: List[str], email: str = None, password: str = None,
+                     on_progress=None) -> dict:
+        return add_multiple_products_to_cart(product_urls, email, password, on_progress=on_progress)
+
+
+class HttpCartBackend(CartBackend):
+    """
+    Adds products by POSTing {"productId", "quantity"} to the cart endpoint with the account's session cookies
+
+    Args:
+        endpoint: Path of the add-to-cart endpoint (CART_HTTP_ENDPOINT)
+        origin: Shop origin the endpoint and cookies belong to (CART_HTTP_ORIGIN)
+        timeout: Request timeout in seconds
+    """
+
+    name = "http"
+
+    def __init__(self, endpoint: str = HTTP_ENDPOINT, origin: str = HTTP_ORIGIN, timeout: float = HTTP_TIMEOUT,
+                 concurrency: int = HTTP_CONCURRENCY, snapshot_loader=read_snapshot):
+        self.endpoint = endpoint
+        self.origin = origin.rstrip("/")
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.snapshot_loader = snapshot_loader
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def available(self, email: Optional[str], password: Optional[str]) -> bool:
+        return bool(self.endpoint and email and password)
+
+    def _session(self, email: str, password: str) -> requests.Session:
+        """requests session carrying the cookies of the account's stored browser session"""
+        with self._lock:
+            session = self._sessions.get(email)
+            if session is not None:
+                return session
+
+        snapshot = self.snapshot_loader(email, password)
+        if not snapshot or not snapshot.get("cookies"):
+            raise CartBackendError("Keine gespeicherte Sitzung")
+
+        session = requests.Session()
+        session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Accept": "application/json",
+            "Origin": self.origin,
+        })
+        for cookie in snapshot["cookies"]:
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        with self._lock:
+            self._sessions[email] = session
+        return session
+
+    def _forget_session(self, email: str):
+        with self._lock:
+            session = self._sessions.pop(email, None)
+        if session:
+            session.close()
+
+    def add_product(self, product_url: str, email: str = None, password: str = None) -> dict:
+        if not self.available(email, password):
+            raise CartBackendError("HTTP-Warenkorb nicht konfiguriert")
+        product_id = parse_product_id(product_url)
+        if not product_id:
+            raise CartBackendError(f"Keine Produkt-ID in {product_url}")
+
+        session = self._session(email, password)
+        try:
+            response = session.post(
+                f"{self.origin}{self.endpoint}",
+                json={"productId": int(product_id), "quantity": 1},
+                headers={"Referer": product_url},
+                timeout=self.timeout,
+                allow_redirects=False,
+            )
+        except requests.RequestException as e:
+            raise CartBackendError(f"Anfrage fehlgeschlagen: {e}") from e
+
+        if response.status_code in (401, 403) or response.is_redirect:
+            # Session expired: reload the stored snapshot (refreshed by the next browser login) next time
+            self._forget_session(email)
+            raise CartBackendError("Sitzung abgelaufen")
+        if not response.ok:
+            raise CartBackendError(f"Warenkorb-Anfrage fehlgeschlagen ({response.status_code})")
+
+        return {
+            "success": True,
+            "message": "Produkt wurde zum Warenkorb hinzugefügt",
+            "cart_url": CART_URL
+        }
+
+    def add_products(self, product_urls: List[str], email: str = None, password: str = None,
+                     on_progress=None) -> dict:
+        def add_one(url):
+            self.add_product(url, email, password)
+            return {"backend": self.name}
+
+        on_start, on_result = progress_callbacks(on_progress)
+        outcomes = run_cart_jobs(product_urls, add_one, concurrency=self.concurrency, retries=0,
+                                 on_start=on_start, on_result=on_result)
+        return merge_outcomes(outcomes, cart_url=CART_URL)
+
+
+class FallbackCartBackend(CartBackend):
+    """Tries the fast backend first and hands everything it couldn't add to the fallback"""
+
+    name = "fallback"
+
+    def __init__(self, fast: CartBackend, fallback: CartBackend):
+        self.fast = fast
+        self.fallback = fallback
+
+    def add_product(self, product_url: str, email: str = None, password: str = None) -> dict:
+        if self.fast.available(email, password):
+            try:
+                return self.fast.add_product(product_url, email, password)
+            except Exception as e:
+                print(f"⚠️  {self.fast.name} cart backend failed ({e}), falling back to {self.fallback.name}")
+        return self.fallback.add_product(product_url, email, password)
+
+    def add_products(self, product_urls: List[str], email: str = None, password: str = None,
+                     on_progress=None) -> dict:
+        if not self.fast.available(email, password):
+            return self.fallback.add_products(product_urls, email, password, on_progress=on_progress)
+
+        def fast_progress(event, data):
+            # Products the fast path misses are not failed yet, the fallback still gets them
+            if on_progress and event != "failed":
+                on_progress(event, data)
+
+        fast_result = self.fast.add_products(product_urls, email, password, on_progress=fast_progress)
+        outcomes = [outcome for outcome in fast_result["results"] if outcome["success"]]
+        remaining = [outcome["url"] for outcome in fast_result["results"] if not outcome["success"]]
+        if remaining:
+            print(f"⚠️  {len(remaining)} product(s) not added by {self.fast.name}, falling back to {self.fallback.name}")
+            fallback_result = self.fallback.add_products(remaining, email, password, on_progress=on_progress)
+            outcomes += fallback_result.get("results") or [
+                {"url": url, "success": False, "message": fallback_result.get("message")} for url in remaining
+            ]
+        return merge_outcomes(outcomes, cart_url=CART_URL)
+
+
+_backend = None
+
+
+def get_cart_backend() -> CartBackend:
+    """The configured cart backend: HTTP fast path with Selenium fallback"""
+    global _backend
+    if _backend is None:
+        _backend = FallbackCartBackend(HttpCartBackend(), SeleniumCartBackend())
+    return _backend
@@ -0,0 +1,157 @@
+"""
+Concurrent execution of per-product cart jobs
+Fans product URLs out over a bounded number of worker threads (each using its
+own pooled browser), retries transient failures and merges the per-product
+outcomes into the {"added", "failed"} result the routes return.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+CONCURRENCY = int(os.getenv("CART_CONCURRENCY", "3"))
+RETRIES = int(os.getenv("CART_RETRIES", "2"))
+RETRY_BACKOFF = 1.0
+
+
+class TransientCartError(Exception):
+    """A failure that is worth retrying (timeouts, crashed or disconnected browsers)"""
+
+
+class CartLoginError(Exception):
+    """The browser could not be logged in to the account"""
+
+
+class CartProductError(Exception):
+    """The product can't be added, e.g. it has no add-to-cart button (sold out or not a product page)"""
+
+
+def default_is_transient(error: Exception) -> bool:
+    return isinstance(error, (TransientCartError, TimeoutError, ConnectionError))
+
+
+def run_with_retries(
+    job: Callable,
+    item,
+    retries: int = RETRIES,
+    backoff: float = RETRY_BACKOFF,
+    is_transient: Callable[[Exception], bool] = default_is_transient,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict:
+    """
+    Run job(item), retrying transient errors with exponential backoff
+
+    Returns:
+        dict: {"url", "success", "attempts", "message"} (plus whatever dict the job returned)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            outcome = {"url": item, "success": True, "attempts": attempt, "message": "Hinzugefügt"}
+            outcome.update(job(item) or {})
+            return outcome
+        except Exception as e:
+            if attempt <= retries and is_transient(e):
+                print(f"⚠️  Attempt {attempt} for {item} failed ({e}), retrying...")
+                sleep(backoff * 2 ** (attempt - 1))
+                continue
+            print(f"❌ Failed to add {item}: {e}")
+            return {
+                "url": item,
+                "success": False,
+                "attempts": attempt,
+                "message": str(e),
+                "login_failed": isinstance(e, CartLoginError),
+            }
+
+
+def run_cart_jobs(
+    items: List,
+    job: Callable,
+    concurrency: int = CONCURRENCY,
+    on_result: Optional[Callable[[dict], None]] = None,
+    on_start: Optional[Callable[[str], None]] = None,
+    **retry_options,
+) -> List[dict]:
+    """
+    Run job for every item with at most concurrency jobs at a time
+
+    Args:
+        items: Product URLs
+        job: Adds one product; raises on failure
+        concurrency: Maximum number of jobs running at once
+        on_result: Called with each outcome as soon as it is known
+        on_start: Called with each item when its job starts
+        retry_options: Passed to run_with_retries
+
+    Returns:
+        list: One outcome per item, in the order of items
+    """
+    if not items:
+        return []
+
+    def run(item):
+        if on_start:
+            on_start(item)
+        started = time.monotonic()
+        outcome = run_with_retries(job, item, **retry_options)
+        outcome["seconds"] = round(time.monotonic() - started, 2)
+        if on_result:
+            on_result(outcome)
+        return outcome
+
+    workers = max(1, min(concurrency, len(items)))
+    if workers == 1:
+        return [run(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cart") as executor:
+        return list(executor.map(run, items))
+
+
+def progress_callbacks(on_progress: Optional[Callable[[str, dict], None]]):
+    """
+    Turn a progress callback into run_cart_jobs' on_start / on_result hooks
+
+    on_progress(event, data) is called with "started" ({"url"}) and with
+    "added" / "failed" (the outcome, including "seconds").
+
+    Returns:
+        tuple: (on_start, on_result), both None without on_progress
+    """
+    if not on_progress:
+        return None, None
+
+    def on_start(url):
+        on_progress("started", {"url": url})
+
+    def on_result(outcome):
+        on_progress("added" if outcome["success"] else "failed", outcome)
+
+    return on_start, on_result
+
+
+def merge_outcomes(outcomes: List[dict], cart_url: str) -> dict:
+    """
+    Combine per-product outcomes into the result shape of add_multiple_products_to_cart
+
+    Returns:
+        dict: {"success", "added", "failed", "message", "cart_url", "results"}
+    """
+    added = sum(1 for outcome in outcomes if outcome["success"])
+    failed = len(outcomes) - added
+
+    if outcomes and all(outcome.get("login_failed") for outcome in outcomes):
+        message = "Login fehlgeschlagen"
+        cart_url = None
+    else:
+        message = f"{added} Produkt(e) hinzugefügt, {failed} fehlgeschlagen"
+
+    return {
+        "success": added > 0,
+        "added": added,
+        "failed": failed,
+        "message": message,
+        "cart_url": cart_url,
+        "results": outcomes,
+    }
@@ -0,0 +1,212 @@
+"""
+Durable SQLite queue of cart jobs
+The web app only enqueues a job and returns its id; cart workers (see
+app/cart_worker.py) claim queued jobs, run them with their own browser pool
+and store the result. Running jobs send heartbeats, so jobs of a worker that
+died are put back into the queue instead of being lost. Workers also record
+per-product progress events, which the web app streams to the browser.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from .db import ConnectionPool
+
+MAX_ATTEMPTS = int(os.getenv("CART_JOB_MAX_ATTEMPTS", "3"))
+HEARTBEAT_TIMEOUT = float(os.getenv("CART_JOB_HEARTBEAT_TIMEOUT", "120"))
+EVENT_RETENTION = float(os.getenv("CART_JOB_EVENT_RETENTION", str(24 * 3600)))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_COLUMNS = "id, user_id, kind, product_urls, status, attempts, result, error, worker, created_at, started_at, finished_at"
+
+
+def _job_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "kind": row[2],
+        "product_urls": json.loads(row[3]),
+        "status": row[4],
+        "attempts": row[5],
+        "result": json.loads(row[6]) if row[6] else None,
+        "error": row[7],
+        "worker": row[8],
+        "created_at": row[9],
+        "started_at": row[10],
+        "finished_at": row[11],
+    }
+
+
+def enqueue_job(pool: ConnectionPool, user_id: int, product_urls: List[str], kind: str = "batch") -> int:
+    """
+    Add a cart job to the queue
+
+    Args:
+        user_id: Owner of the job
+        product_urls: Products to add to the cart
+        kind: "single" (one subscription) or "batch" (all active subscriptions)
+
+    Returns:
+        int: The job id
+    """
+    with pool.connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO cart_jobs (user_id, kind, product_urls) VALUES (?, ?, ?)",
+            (user_id, kind, json.dumps(product_urls))
+        )
+        return cursor.lastrowid
+
+
+def claim_next_job(pool: ConnectionPool, worker: str) -> Optional[dict]:
+    """
+    Take the oldest queued job and mark it as running for this worker
+
+    Safe to call from several worker processes: a job is only claimed by the
+    worker whose conditional update succeeds.
+    """
+    while True:
+        with pool.connection() as conn:
+            row = conn.execute(
+                "SELECT id FROM cart_jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if not row:
+                return None
+            cursor = conn.execute(
+                """UPDATE cart_jobs
+                   SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, heartbeat_at = ?
+                   WHERE id = ? AND status = ?""",
+                (RUNNING, worker, datetime.now().isoformat(), time.time(), row[0], QUEUED)
+            )
+            if cursor.rowcount == 1:
+                job = conn.execute(f"SELECT {_COLUMNS} FROM cart_jobs WHERE id = ?", (row[0],)).fetchone()
+                return _job_from_row(job)
+
+
+def heartbeat(pool: ConnectionPool, job_id: int):
+    """Record that the worker running the job is still alive"""
+    with pool.connection() as conn:
+        conn.execute("UPDATE cart_jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+
+def complete_job(pool: ConnectionPool, job_id: int, result: dict):
+    """Store the result of a finished job"""
+    status = DONE if result.get("success") else FAILED
+    with pool.connection() as conn:
+        conn.execute(
+            "UPDATE cart_jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result, default=str), datetime.now().isoformat(), job_id)
+        )
+
+
+def fail_job(pool: ConnectionPool, job_id: int, error: str, max_attempts: int = MAX_ATTEMPTS):
+    """Record an error; the job is queued again until it has used max_attempts"""
+    with pool.connection() as conn:
+        conn.execute(
+            """UPDATE cart_jobs
+               SET status = CASE WHEN attempts < ? THEN ? ELSE ? END,
+                   error = ?, finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END
+               WHERE id = ?""",
+            (max_attempts, QUEUED, FAILED, error, max_attempts, datetime.now().isoformat(), job_id)
+        )
+
+
+def requeue_stale_jobs(pool: ConnectionPool, timeout: float = HEARTBEAT_TIMEOUT,
+                       max_attempts: int = MAX_ATTEMPTS) -> int:
+    """
+    Put running jobs whose worker stopped sending heartbeats back into the queue
+
+    Returns:
+        int: Number of jobs requeued or given up on
+    """
+    with pool.connection() as conn:
+        cursor = conn.execute(
+            """UPDATE cart_jobs
+               SET status = CASE WHEN attempts < ? THEN ? ELSE ? END,
+                   finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END,
+                   error = 'Worker nicht mehr erreichbar'
+               WHERE status = ? AND heartbeat_at < ?""",
+            (max_attempts, QUEUED, FAILED, max_attempts, datetime.now().isoformat(), RUNNING, time.time() - timeout)
+        )
+        return cursor.rowcount
+
+
+def get_job(pool: ConnectionPool, job_id: int, user_id: Optional[int] = None) -> Optional[dict]:
+    """Get a job (only if it belongs to user_id, when given)"""
+    with pool.connection() as conn:
+        if user_id is None:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM cart_jobs WHERE id = ?", (job_id,)).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM cart_jobs WHERE id = ? AND user_id = ?", (job_id, user_id)
+            ).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def get_recent_jobs(pool: ConnectionPool, user_id: int, limit: int = 20) -> List[dict]:
+    """Get a user's most recent jobs, newest first"""
+    with pool.connection() as conn:
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM cart_jobs WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, limit)
+        ).fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def queue_position(pool: ConnectionPool, job_id: int) -> int:
+    """Number of queued jobs ahead of this one"""
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM cart_jobs WHERE status = ? AND id < ?", (QUEUED, job_id)
+        ).fetchone()[0]
+
+
+def add_job_event(pool: ConnectionPool, job_id: int, event: str, data: Optional[dict] = None) -> int:
+    """
+    Record a progress event of a job
+
+    Args:
+        event: e.g. "started", "added", "failed"
+        data: JSON-serialisable details (product url, message, seconds, ...)
+
+    Returns:
+        int: The event id (increasing, usable as SSE event id)
+    """
+    with pool.connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO cart_job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event, json.dumps(data or {}, default=str), time.time())
+        )
+        return cursor.lastrowid
+
+
+def get_job_events(pool: ConnectionPool, job_id: int, after_id: int = 0, limit: int = 100) -> List[dict]:
+    """Get a job's events with an id greater than after_id, oldest first"""
+    with pool.connection() as conn:
+        rows = conn.execute(
+            "SELECT id, event, data, created_at FROM cart_job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit)
+        ).fetchall()
+    return [
+        {"id": row[0], "event": row[1], "data": json.loads(row[2]) if row[2] else {}, "created_at": row[3]}
+        for row in rows
+    ]
+
+
+def iter_job_events(pool: ConnectionPool, job_id: int, after_id: int = 0, page_size: int = 100) -> Iterator[List[dict]]:
+    """Pages of a job's events with an id greater than after_id, until none are left"""
+    while True:
+        events = get_job_events(pool, job_id, after_id, page_size)
+        if not events:
+            return
+        yield events
+        after_id = events[-1]["id"]
+
+
+def prune_job_events(pool: ConnectionPool, max_age: float = EVENT_RETENTION) -> int:
+    """Delete events older than max_age seconds; returns the number deleted"""
+    with pool.connection() as conn:
+        cursor = conn.execute("DELETE FROM cart_job_events WHERE created_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
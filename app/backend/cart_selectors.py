@@ -0,0 +1,228 @@
+"""
+Add-to-cart button discovery
+All candidate selectors are checked in one in-browser script per poll, in
+the order of how often they found the button on the product's domain before.
+If none of them matches, every button on the page is scored in-browser by its
+text, aria-label, id and class, again in a single round-trip.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+STATS_PATH = os.getenv("CART_SELECTOR_STATS", "artifacts/selector_stats.json")
+STATS_SAVE_INTERVAL = float(os.getenv("CART_SELECTOR_STATS_SAVE_INTERVAL", "60"))  # seconds between writes
+POLL_INTERVAL = 0.1
+MIN_BUTTON_SCORE = 5
+
+# Common selectors for the "Add to Cart" button on Digitec/Galaxus, in default order
+ADD_TO_CART_SELECTORS = [
+    (By.ID, "addToCartButton"),  # The button has this ID
+    (By.CSS_SELECTOR, "button[data-test='addToCartButton']"),
+    (By.XPATH, "//button[contains(text(), 'In den Warenkorb legen')]"),  # Exact text match
+    (By.XPATH, "//button[contains(text(), 'In den Warenkorb')]"),  # Partial match
+    (By.CSS_SELECTOR, "button[aria-label*='Warenkorb']"),
+    (By.CSS_SELECTOR, "button[data-cy='add-to-cart']"),
+    (By.CSS_SELECTOR, "button.add-to-cart"),
+    (By.CSS_SELECTOR, ".productDetail__addToCart button"),
+    (By.CSS_SELECTOR, "[data-testid='add-to-cart-button']"),
+    (By.XPATH, "//button[contains(text(), 'Warenkorb')]"),
+    (By.XPATH, "//button[contains(@class, 'add')]"),
+]
+
+# (keyword, score) matched against the lower-cased text and aria-label of each button
+BUTTON_KEYWORDS = [
+    ("in den warenkorb", 10),
+    ("warenkorb", 5),
+    ("add to cart", 8),
+    ("cart", 4),
+    ("kaufen", 3),
+    ("bestellen", 2),
+]
+
+_USABLE_JS = """
+function usable(el) {
+    if (!el || el.disabled || el.getAttribute("aria-disabled") === "true") return false;
+    if (el.id === "toggleShoppingCartButton") return false;  // header cart button
+    const style = window.getComputedStyle(el);
+    return el.getClientRects().length > 0 && style.visibility !== "hidden" && style.display !== "none";
+}
+"""
+
+# Returns [index, element] of the first selector that matches a usable element, or null
+_FIRST_MATCH_SCRIPT = _USABLE_JS + """
+const selectors = arguments[0];
+for (let i = 0; i < selectors.length; i++) {
+    const [type, value] = selectors[i];
+    let el = null;
+    try {
+        if (type === "id") el = document.getElementById(value);
+        else if (type === "xpath") el = document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        else el = document.querySelector(value);
+    } catch (e) {
+        continue;
+    }
+    if (usable(el)) return [i, el];
+}
+return null;
+"""
+
+# Returns [score, element, description] of the best scoring usable button, or null
+_SCORE_BUTTONS_SCRIPT = _USABLE_JS + """
+const keywords = arguments[0];
+let best = null;
+for (const el of document.querySelectorAll("button, [role='button'], input[type='submit']")) {
+    if (!usable(el)) continue;
+    const text = (el.innerText || el.value || "").toLowerCase();
+    const aria = (el.getAttribute("aria-label") || "").toLowerCase();
+    const idClass = ((el.id || "") + " " + (el.getAttribute("class") || "")).toLowerCase();
+    let score = 0;
+    for (const [keyword, weight] of keywords) {
+        if (text.includes(keyword)) score += weight;
+        if (aria.includes(keyword)) score += weight;
+    }
+    if (/add-?to-?cart|addtobasket/.test(idClass)) score += 6;
+    if (!best || score > best[0]) {
+        best = [score, el, `text='${text.slice(0, 50)}', aria-label='${aria.slice(0, 50)}'`];
+    }
+}
+return best;
+"""
+
+
+def selector_label(selector: Tuple[str, str]) -> str:
+    return f"{selector[0]}={selector[1]}"
+
+
+class SelectorStats:
+    """
+    Per-domain hit/miss counts of the add-to-cart selectors
+
+    Args:
+        path: JSON file to persist the counts in (None keeps them in memory)
+        save_interval: Minimum seconds between writes by save_if_due; save() at shutdown writes the rest
+    """
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = STATS_SAVE_INTERVAL,
+                 clock=time.monotonic):
+        self.path = Path(path) if path else None
+        self.save_interval = save_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stats = {}  # domain -> {label: [hits, misses]}
+        self._dirty = False
+        self._saved_at = clock()
+        if self.path and self.path.exists():
+            try:
+                self._stats = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not read selector stats: {e}")
+
+    def ranked(self, domain: str, selectors: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Order selectors by hit rate on the domain (unseen selectors keep their default order)"""
+        with self._lock:
+            stats = dict(self._stats.get(domain, {}))
+
+        def hit_rate(item):
+            index, selector = item
+            hits, misses = stats.get(selector_label(selector), (0, 0))
+            # Smoothed so one lucky hit doesn't outrank a selector with a long record
+            return (-(hits + 1) / (hits + misses + 2), index)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=hit_rate)]
+
+    def record(self, domain: str, selector: Tuple[str, str], hit: bool):
+        with self._lock:
+            counts = self._stats.setdefault(domain, {}).setdefault(selector_label(selector), [0, 0])
+            counts[0 if hit else 1] += 1
+            self._dirty = True
+
+    def save_if_due(self):
+        """Save unless the last save was less than save_interval ago (called after every lookup)"""
+        with self._lock:
+            due = self._dirty and self._clock() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def save(self):
+        """Write the counts if anything changed, through a per-process temp file so workers don't clobber each other's"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._stats, indent=2)
+                self._dirty = False
+                self._saved_at = self._clock()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(data)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"⚠️  Could not save selector stats: {e}")
+
+    def snapshot(self, domain: str) -> dict:
+        with self._lock:
+            return {label: tuple(counts) for label, counts in self._stats.get(domain, {}).items()}
+
+
+selector_stats = SelectorStats(STATS_PATH)
+
+
+def find_add_to_cart_button(driver, url: str, timeout: float, stats: SelectorStats = None):
+    """
+    Find the add-to-cart button of a product page
+
+    Polls all selectors at once (best selector for the domain first) until one
+    matches a visible, enabled button, then falls back to scoring all buttons.
+
+    Args:
+        driver: Selenium WebDriver on the product page
+        url: Product URL (its domain keys the selector stats)
+        timeout: Seconds to wait for one of the selectors to match
+
+    Returns:
+        tuple: (WebElement, description) or (None, None) if no button was found
+    """
+    stats = stats or selector_stats
+    domain = urlsplit(url).hostname or ""
+    ranked = stats.ranked(domain, ADD_TO_CART_SELECTORS)
+
+    match = None
+    try:
+        match = WebDriverWait(driver, max(timeout, 0), poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script(_FIRST_MATCH_SCRIPT, [list(selector) for selector in ranked]) or False
+        )
+    except TimeoutException:
+        pass
+
+    if match:
+        index, element = match
+        # Selectors ranked ahead of the winner missed on this page
+        for position, selector in enumerate(ranked[:index + 1]):
+            stats.record(domain, selector, hit=position == index)
+        stats.save_if_due()
+        return element, selector_label(ranked[index])
+
+    for selector in ranked:
+        stats.record(domain, selector, hit=False)
+    stats.save_if_due()
+
+    scored = driver.execute_script(_SCORE_BUTTONS_SCRIPT, BUTTON_KEYWORDS)
+    if scored and scored[0] >= MIN_BUTTON_SCORE:
+        score, element, description = scored
+        return element, f"scored {score}: {description}"
+    return None, None
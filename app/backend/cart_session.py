@@ -0,0 +1,210 @@
+"""
+Encrypted Digitec/Galaxus browser session snapshots
+After a successful login the driver's cookies and localStorage are written
+to an encrypted file per account. New drivers are hydrated from it and only
+run the full login form when a cheap authenticated probe request fails.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from cryptography.fernet import Fernet, InvalidToken
+
+SESSION_DIR = Path(os.getenv("CART_SESSION_DIR", "artifacts/sessions"))
+SESSION_MAX_AGE = float(os.getenv("CART_SESSION_MAX_AGE", str(7 * 86400)))
+PROBE_PATH = os.getenv("CART_SESSION_PROBE_PATH", "/de/user/orders")
+PROBE_TIMEOUT = 10
+
+# Fields accepted by the CDP Network.setCookies command
+_CDP_COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+# Resolves with true if the probe URL answers without redirecting (to the login page)
+_PROBE_SCRIPT = """
+const url = arguments[0], done = arguments[arguments.length - 1];
+fetch(url, {credentials: "include", redirect: "manual"})
+    .then(response => done(response.type !== "opaqueredirect" && response.ok))
+    .catch(() => done(false));
+"""
+
+
+@functools.lru_cache(maxsize=32)
+def _fernet(email: str, password: str) -> Fernet:
+    """
+    Encryption key for an account's snapshot: CART_SESSION_KEY if set,
+    otherwise derived from the account credentials
+    """
+    key = os.getenv("CART_SESSION_KEY")
+    if not key:
+        salt = hashlib.sha256(email.lower().encode()).digest()
+        derived = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 200_000)
+        key = base64.urlsafe_b64encode(derived)
+    return Fernet(key)
+
+
+def session_path(email: str) -> Path:
+    """Snapshot file of an account (the file name doesn't reveal the email)"""
+    return SESSION_DIR / f"{hashlib.sha256(email.lower().encode()).hexdigest()}.session"
+
+
+def write_snapshot(email: str, password: str, snapshot: dict):
+    """Encrypt and store a session snapshot"""
+    path = session_path(email)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    token = _fernet(email, password).encrypt(json.dumps(snapshot).encode())
+    # Own temp file per process and thread: workers may save the same account at once
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(token)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(email: str, password: str) -> Optional[dict]:
+    """
+    Load an account's session snapshot
+
+    Returns:
+        dict: The snapshot, or None if there is none, it is too old or can't be decrypted
+    """
+    path = session_path(email)
+    try:
+        token = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        snapshot = json.loads(_fernet(email, password).decrypt(token, ttl=int(SESSION_MAX_AGE)))
+    except (InvalidToken, ValueError):
+        print("⚠️  Stored Digitec session is expired or unreadable, discarding it")
+        clear_snapshot(email)
+        return None
+    return snapshot
+
+
+def clear_snapshot(email: str):
+    session_path(email).unlink(missing_ok=True)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _has_cdp(driver) -> bool:
+    return hasattr(driver, "execute_cdp_cmd")
+
+
+def save_session(driver, email: str, password: str) -> bool:
+    """
+    Snapshot the driver's cookies and the current origin's localStorage
+
+    Uses CDP to read the cookies of all domains (including the login domain)
+    where available, otherwise only those of the current page.
+    """
+    try:
+        origin = _origin(driver.current_url)
+        cookies, source = None, "webdriver"
+        if _has_cdp(driver):
+            try:
+                cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+                source = "cdp"
+            except Exception:
+                cookies = None
+        if cookies is None:
+            cookies = driver.get_cookies()
+        local_storage = driver.execute_script(
+            "const items = {};"
+            "for (let i = 0; i < localStorage.length; i++) {"
+            "  const key = localStorage.key(i); items[key] = localStorage.getItem(key);"
+            "}"
+            "return items;"
+        ) or {}
+
+        write_snapshot(email, password, {
+            "saved_at": time.time(),
+            "origin": origin,
+            "cookie_source": source,
+            "cookies": cookies,
+            "local_storage": local_storage,
+        })
+        print(f"✅ Saved Digitec session ({len(cookies)} cookies)")
+        return True
+    except Exception as e:
+        print(f"⚠️  Could not save Digitec session: {e}")
+        return False
+
+
+def _add_cookies(driver, snapshot: dict):
+    cookies = snapshot.get("cookies", [])
+    if snapshot.get("cookie_source") == "cdp" and _has_cdp(driver):
+        params = [{key: cookie[key] for key in _CDP_COOKIE_FIELDS if key in cookie} for cookie in cookies]
+        # Session cookies come back with expires = -1, which setCookies rejects
+        for param in params:
+            if param.get("expires", 0) < 0:
+                del param["expires"]
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        return
+
+    # Without CDP, cookies can only be set for the page the driver is on
+    host = urlsplit(snapshot["origin"]).hostname or ""
+    for cookie in cookies:
+        if not host.endswith(cookie.get("domain", "").lstrip(".")):
+            continue
+        cookie = {key: value for key, value in cookie.items() if key != "sameSite" or value in ("Strict", "Lax", "None")}
+        if "expiry" in cookie:
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            continue
+
+
+def restore_session(driver, email: str, password: str) -> bool:
+    """
+    Hydrate a driver from the account's snapshot
+
+    Returns:
+        bool: True if a snapshot was applied (not yet whether it is still logged in)
+    """
+    snapshot = read_snapshot(email, password)
+    if not snapshot:
+        return False
+    try:
+        origin = snapshot["origin"]
+        # A small same-origin page, so cookies and localStorage can be set without loading the shop
+        if snapshot.get("cookie_source") == "cdp" and _has_cdp(driver):
+            _add_cookies(driver, snapshot)
+            driver.get(f"{origin}/robots.txt")
+        else:
+            driver.get(f"{origin}/robots.txt")
+            _add_cookies(driver, snapshot)
+        driver.execute_script(
+            "const items = arguments[0];"
+            "for (const key in items) { localStorage.setItem(key, items[key]); }",
+            snapshot.get("local_storage", {})
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️  Could not restore Digitec session: {e}")
+        return False
+
+
+def probe_logged_in(driver, origin: Optional[str] = None) -> bool:
+    """
+    Check with a single request from the page whether the driver's session is authenticated
+
+    The probe page redirects to the login when the session is not valid.
+    """
+    try:
+        origin = origin or _origin(driver.current_url)
+        driver.set_script_timeout(PROBE_TIMEOUT)
+        return bool(driver.execute_async_script(_PROBE_SCRIPT, f"{origin}{PROBE_PATH}"))
+    except Exception as e:
+        print(f"⚠️  Session probe failed: {e}")
+        return False
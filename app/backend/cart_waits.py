@@ -0,0 +1,165 @@
+"""
+Readiness conditions and a latency budget for the cart automation
+Instead of sleeping for a fixed time after each step, the cart flow waits for
+the condition it actually needs (document ready, DOM and network quiet, cart
+count changed) and every wait is capped by what is left of the job's budget.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+CART_BUTTON_ID = "toggleShoppingCartButton"
+POLL_INTERVAL = 0.1
+
+# Resolves once neither the DOM nor the resource list has changed for quietMs,
+# or with false after timeoutMs
+_PAGE_QUIET_SCRIPT = """
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+let quietTimer = null, capTimer = null, perf = null, finished = false;
+const observer = new MutationObserver(() => reset());
+function finish(quiet) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    if (perf) perf.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(capTimer);
+    done(quiet);
+}
+function reset() {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(true), quietMs);
+}
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+try {
+    perf = new PerformanceObserver(() => reset());
+    perf.observe({type: "resource"});
+} catch (e) {}
+capTimer = setTimeout(() => finish(false), timeoutMs);
+reset();
+"""
+
+
+class LatencyBudget:
+    """
+    Time budget for one cart job, split into named steps
+
+    Each wait asks the budget for its timeout, so a slow step leaves less
+    time for the following ones instead of adding up to minutes.
+
+    Args:
+        total: Seconds the whole job may take
+        label: Name used in the timing log
+    """
+
+    def __init__(self, total: float, label: str = "", clock=time.monotonic):
+        self.total = total
+        self.label = label
+        self._clock = clock
+        self._start = clock()
+        self.steps: List[Tuple[str, float]] = []
+
+    def elapsed(self) -> float:
+        return self._clock() - self._start
+
+    def remaining(self) -> float:
+        return max(self.total - self.elapsed(), 0.0)
+
+    def timeout(self, step_max: float) -> float:
+        """Timeout for the next wait: the step's own limit, capped by what is left of the budget"""
+        return min(step_max, self.remaining())
+
+    @contextmanager
+    def step(self, name: str):
+        """Record how long the wrapped step took"""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.steps.append((name, self._clock() - start))
+
+    def summary(self) -> str:
+        steps = ", ".join(f"{name} {duration:.2f}s" for name, duration in self.steps)
+        return f"{self.label}: {steps} | total {self.elapsed():.2f}s of {self.total:.0f}s"
+
+    def report(self):
+        print(f"⏱️  {self.summary()}")
+
+
+def parse_cart_count(aria_label: Optional[str]) -> Optional[int]:
+    """
+    Read the number of products from the cart button's aria-label
+
+    Returns:
+        int: Number of products (0 for "Keine Produkte"), or None if it can't be read
+    """
+    if not aria_label:
+        return None
+    if "Keine Produkte" in aria_label:
+        return 0
+    match = re.search(r"\d+", aria_label)
+    return int(match.group()) if match else None
+
+
+def get_cart_count(driver) -> Optional[int]:
+    """Get the cart count shown in the header, or None if the cart button isn't there"""
+    try:
+        button = driver.find_element(By.ID, CART_BUTTON_ID)
+        return parse_cart_count(button.get_attribute("aria-label"))
+    except Exception:
+        return None
+
+
+def wait_for_ready_state(driver, timeout: float, states: Tuple[str, ...] = ("interactive", "complete")) -> bool:
+    """Wait until document.readyState is one of states"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script("return document.readyState") in states
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_page_quiet(driver, timeout: float, quiet_ms: int = 300) -> bool:
+    """
+    Wait until the DOM has stopped changing and no new network requests were made for quiet_ms
+
+    Returns:
+        bool: True if the page went quiet, False if the timeout was hit first
+    """
+    if timeout <= 0:
+        return False
+    try:
+        driver.set_script_timeout(timeout + 1)
+        return bool(driver.execute_async_script(_PAGE_QUIET_SCRIPT, quiet_ms, int(timeout * 1000)))
+    except Exception as e:
+        print(f"Page quiet wait failed: {e}")
+        return False
+
+
+def wait_for_cart_change(driver, count_before: Optional[int], timeout: float) -> Optional[int]:
+    """
+    Wait until the cart count in the header differs from count_before
+
+    Returns:
+        int: The new cart count, or None if it didn't change within the timeout
+    """
+    seen = []
+
+    def changed(d) -> bool:
+        count = get_cart_count(d)
+        seen.append(count)
+        return count is not None and count != count_before
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(changed)
+        return seen[-1]
+    except TimeoutException:
+        return None
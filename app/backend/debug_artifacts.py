@@ -0,0 +1,162 @@
+"""
+Debug artifacts (screenshot, page source) for cart jobs
+Capturing is failure-only by default, successful runs are only sampled.
+Artifacts go into one directory per job under artifacts/debug; compressing
+and writing them, and evicting old jobs by age and total size, happens on a
+background thread so the cart flow only pays for grabbing the data.
+"""
+
+import gzip
+import json
+import os
+import random
+import secrets
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+CAPTURE_MODES = ("off", "failure", "sample", "always")
+CAPTURE_MODE = os.getenv("CART_DEBUG_CAPTURE", "failure")
+SAMPLE_RATE = float(os.getenv("CART_DEBUG_SAMPLE_RATE", "0.05"))
+ARTIFACTS_DIR = Path(os.getenv("CART_ARTIFACTS_DIR", "artifacts/debug"))
+MAX_TOTAL_BYTES = int(float(os.getenv("CART_ARTIFACTS_MAX_MB", "200")) * 1024 * 1024)
+MAX_AGE = float(os.getenv("CART_ARTIFACTS_MAX_AGE_DAYS", "7")) * 86400
+
+FLUSH_TIMEOUT = 10  # seconds shutdown waits for pending artifacts
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
+
+
+def should_capture(success: bool, mode: str = None, sample_rate: float = None, rng=random.random) -> bool:
+    """
+    Decide whether a step's artifacts are captured
+
+    Args:
+        success: Whether the step succeeded
+        mode: off, failure (failures only), sample (failures and a sample of
+              successes) or always; defaults to CART_DEBUG_CAPTURE
+        sample_rate: Share of successful steps captured in sample mode
+    """
+    mode = mode or CAPTURE_MODE
+    if mode == "always":
+        return True
+    if mode == "off":
+        return False
+    if not success:
+        return True
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    return mode == "sample" and rng() < rate
+
+
+def new_job_id(prefix: str = "cart") -> str:
+    """Unique, time-sortable id for a cart job's artifact directory"""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{prefix}-{secrets.token_hex(3)}"
+
+
+def _dir_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def evict(root: Path = None, max_total_bytes: int = None, max_age: float = None, now: float = None) -> int:
+    """
+    Delete job directories older than max_age, then the oldest ones until the total fits max_total_bytes
+
+    Returns:
+        int: Number of job directories deleted
+    """
+    root = root or ARTIFACTS_DIR
+    max_total_bytes = MAX_TOTAL_BYTES if max_total_bytes is None else max_total_bytes
+    max_age = MAX_AGE if max_age is None else max_age
+    now = time.time() if now is None else now
+    if not root.exists():
+        return 0
+
+    jobs = sorted((path.stat().st_mtime, path) for path in root.iterdir() if path.is_dir())
+    sizes = {path: _dir_size(path) for _, path in jobs}
+    total = sum(sizes.values())
+    removed = 0
+    for mtime, path in jobs:
+        if now - mtime <= max_age and total <= max_total_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        removed += 1
+    return removed
+
+
+def _write(job_dir: Path, name: str, screenshot: Optional[bytes], page_source: Optional[str], metadata: dict):
+    try:
+        job_dir.mkdir(parents=True, exist_ok=True)
+        if screenshot:
+            # PNG is already compressed
+            (job_dir / f"{name}.png").write_bytes(screenshot)
+        if page_source:
+            with gzip.open(job_dir / f"{name}.html.gz", "wt", encoding="utf-8") as f:
+                f.write(page_source)
+        (job_dir / f"{name}.json").write_text(json.dumps(metadata, indent=2, ensure_ascii=False))
+        evict(job_dir.parent)
+    except Exception as e:
+        print(f"⚠️  Could not write debug artifacts: {e}")
+
+
+def capture(driver, job_id: str, name: str, success: bool, **metadata) -> Optional[Path]:
+    """
+    Capture a screenshot and the page source of the driver's current page if the capture mode asks for it
+
+    Only the grab from the browser runs on the calling thread; compression,
+    writing and eviction are done in the background.
+
+    Args:
+        driver: Selenium WebDriver
+        job_id: Cart job id (see new_job_id), one directory per job
+        name: Step name, used as the file name
+        success: Whether the step succeeded (see should_capture)
+        metadata: Extra details stored next to the artifacts
+
+    Returns:
+        Path: The job's artifact directory, or None if nothing was captured
+    """
+    if not should_capture(success):
+        return None
+
+    try:
+        screenshot = driver.get_screenshot_as_png()
+    except Exception:
+        screenshot = None
+    try:
+        page_source = driver.page_source
+        url = driver.current_url
+        title = driver.title
+    except Exception:
+        page_source, url, title = None, None, None
+
+    job_dir = ARTIFACTS_DIR / job_id
+    metadata = {
+        "name": name,
+        "success": success,
+        "url": url,
+        "title": title,
+        "captured_at": datetime.now().isoformat(),
+        **metadata,
+    }
+    _writer.submit(_write, job_dir, name, screenshot, page_source, metadata)
+    print(f"📦 Debug artifacts for {name} are written to {job_dir}")
+    return job_dir
+
+
+def flush(timeout: float = None) -> bool:
+    """
+    Wait until all pending artifacts are written (used by tests and on app/worker shutdown)
+
+    Returns:
+        bool: False if the timeout passed before everything was written
+    """
+    try:
+        _writer.submit(lambda: None).result(timeout=timeout)
+        return True
+    except TimeoutError:
+        print("⚠️  Not all debug artifacts were written before shutdown")
+        return False
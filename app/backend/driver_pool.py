@@ -0,0 +1,220 @@
+"""
+Pool of warm, logged-in WebDriver sessions
+Starting Chrome and logging in to Digitec/Galaxus takes most of a cart job's
+time, so drivers are created once, kept idle between jobs and checked out
+per job. Drivers are health-checked on checkout, recycled after a number of
+uses or a maximum age, and replaced in the background when they crash.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "3"))
+MAX_USES = int(os.getenv("DRIVER_MAX_USES", "50"))
+MAX_AGE = float(os.getenv("DRIVER_MAX_AGE", "1800"))
+CHECKOUT_TIMEOUT = float(os.getenv("DRIVER_CHECKOUT_TIMEOUT", "120"))
+
+
+class DriverPoolTimeout(TimeoutError):
+    """No driver became available within the checkout timeout"""
+
+
+class PooledDriver:
+    """A driver owned by the pool, with its usage bookkeeping"""
+
+    def __init__(self, driver, created_at: float, logged_in: bool = False):
+        self.driver = driver
+        self.created_at = created_at
+        self.logged_in = logged_in
+        self.uses = 0
+
+
+def is_healthy(driver) -> bool:
+    """Check that the browser session still responds"""
+    try:
+        driver.execute_script("return document.readyState")
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Keeps up to size drivers alive and hands them out one job at a time
+
+    Args:
+        factory: Creates a new WebDriver
+        login: Called with a new driver, returns True if the login succeeded
+        size: Maximum number of drivers (idle and checked out)
+        max_uses: Jobs a driver may serve before it is replaced
+        max_age: Seconds a driver may live before it is replaced
+        checkout_timeout: Seconds to wait for a free driver
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        login: Optional[Callable] = None,
+        size: int = POOL_SIZE,
+        max_uses: int = MAX_USES,
+        max_age: float = MAX_AGE,
+        checkout_timeout: float = CHECKOUT_TIMEOUT,
+        health_check: Callable = is_healthy,
+        clock=time.monotonic,
+    ):
+        self.factory = factory
+        self.login = login
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self._clock = clock
+        self._idle: List[PooledDriver] = []  # most recently used last
+        self._created = 0  # idle + checked out + being created
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _create(self) -> PooledDriver:
+        driver = self.factory()
+        logged_in = False
+        if self.login:
+            try:
+                logged_in = bool(self.login(driver))
+            except Exception as e:
+                print(f"⚠️  Driver login failed: {e}")
+        print(f"✅ Driver created (logged in: {logged_in})")
+        return PooledDriver(driver, self._clock(), logged_in)
+
+    def _quit(self, pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Error closing driver: {e}")
+
+    def _expired(self, pooled: PooledDriver) -> bool:
+        return pooled.uses >= self.max_uses or self._clock() - pooled.created_at >= self.max_age
+
+    def _discard(self, pooled: PooledDriver, replace: bool = True):
+        """Quit a driver, free its slot and start a replacement in the background"""
+        self._quit(pooled)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+            closed = self._closed
+        if replace and not closed:
+            threading.Thread(target=self.warm, name="driver-pool-warm", daemon=True).start()
+
+    def _acquire(self) -> PooledDriver:
+        deadline = self._clock() + self.checkout_timeout
+        while True:
+            pooled = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        raise DriverPoolTimeout(f"No driver available after {self.checkout_timeout}s")
+                    self._cond.wait(remaining)
+
+            if pooled is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+
+            if not self._expired(pooled) and self.health_check(pooled.driver):
+                return pooled
+            print("⚠️  Replacing stale or crashed driver")
+            self._discard(pooled, replace=False)
+
+    def _release(self, pooled: PooledDriver, failed: bool):
+        pooled.uses += 1
+        if self._expired(pooled) or (failed and not self.health_check(pooled.driver)):
+            self._discard(pooled)
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+            self._created -= 1
+        self._quit(pooled)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Borrow a driver for one job
+
+        Yields:
+            PooledDriver: .driver is the WebDriver, .logged_in tells whether its login succeeded
+        """
+        pooled = self._acquire()
+        failed = False
+        try:
+            yield pooled
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(pooled, failed)
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """
+        Create drivers until count (default: size) exist and return how many were created
+        """
+        target = self.size if count is None else min(count, self.size)
+        created = 0
+        while True:
+            with self._cond:
+                if self._closed or self._created >= target:
+                    return created
+                self._created += 1
+            try:
+                pooled = self._create()
+            except Exception as e:
+                print(f"❌ Could not warm up driver: {e}")
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                return created
+            with self._cond:
+                if not self._closed:
+                    self._idle.append(pooled)
+                    self._cond.notify()
+                    created += 1
+                    continue
+                self._created -= 1
+            self._quit(pooled)
+            return created
+
+    def warm_in_background(self, count: Optional[int] = None):
+        """Warm up drivers without blocking the caller"""
+        threading.Thread(target=self.warm, args=(count,), name="driver-pool-warm", daemon=True).start()
+
+    def close(self):
+        """Quit all idle drivers; checked-out drivers are quit when they are returned"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "created": self._created, "idle": len(self._idle)}
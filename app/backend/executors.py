@@ -0,0 +1,42 @@
+"""
+Bounded executors for blocking work called from async routes
+SQLite queries and outbound HTTP (scraping) each get their own thread pool,
+so a slow product page can neither stall the event loop nor starve the
+threads that serve ordinary page views. Selenium sessions run in the cart
+workers (see cart_worker), not in the web app's executors.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .db import POOL_SIZE
+
+DB_WORKERS = int(os.getenv("DB_WORKERS", str(POOL_SIZE)))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+
+async def run_in(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    """Run a blocking function on an executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database function on the database executor"""
+    return await run_in(db_executor, func, *args, **kwargs)
+
+
+async def run_io(func, *args, **kwargs):
+    """Run blocking network or subprocess work (e.g. scraping) on the I/O executor"""
+    return await run_in(io_executor, func, *args, **kwargs)
+
+
+def shutdown_executors(wait: bool = False):
+    """Stop all executors, cancelling work that has not started yet"""
+    for executor in (db_executor, io_executor):
+        executor.shutdown(wait=wait, cancel_futures=True)
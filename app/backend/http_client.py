@@ -0,0 +1,112 @@
+"""
+Shared pooled HTTP clients for outbound requests (product pages)
+One requests session per process keeps connections to galaxus.ch alive, so a
+preview costs one request instead of DNS + TCP + TLS handshakes every time.
+Connections are pooled per host, responses are compressed (brotli when the
+brotli package is installed) and idempotent requests are retried with
+backoff.
+"""
+
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa: F401 - urllib3 decodes "br" when it is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "5"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+# Connections kept open per host
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+POOL_HOSTS = 10
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "de-CH,de;q=0.9,en;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def make_session(retries: int = RETRIES, backoff: float = RETRY_BACKOFF, pool_size: int = POOL_SIZE) -> requests.Session:
+    """
+    Create a requests session with keep-alive connection pools and retries
+
+    Args:
+        retries: Retries for connection errors and 429/5xx responses (GET/HEAD only)
+        backoff: Backoff factor between retries (0.3 -> 0.3s, 0.6s, 1.2s, ...)
+        pool_size: Connections kept open per host
+
+    Returns:
+        requests.Session: The configured session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def get(url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    GET a URL over the shared session
+
+    Args:
+        url: URL to fetch
+        timeout: (connect, read) timeout; defaults to HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT
+        kwargs: Passed to requests (headers, stream, ...)
+
+    Returns:
+        requests.Response: The response (not checked for errors)
+    """
+    return get_session().get(url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+
+def close_clients():
+    """Close the shared session"""
+    global _session
+    with _lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
@@ -0,0 +1,276 @@
+"""
+Versioned database schema migrations
+The schema version is stored in PRAGMA user_version. Each migration runs
+once, in order, inside its own transaction, so startup no longer has to
+inspect every table for missing columns.
+"""
+
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str]]):
+    existing = _columns(conn, table)
+    for name, definition in columns:
+        if name not in existing:
+            print(f"📦 Migrating database: Adding {name} column to {table}...")
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _baseline_schema(conn: sqlite3.Connection):
+    """Create the original tables and bring databases from before versioning up to date"""
+    existing_columns = _columns(conn, "users")
+
+    if not existing_columns:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                hashed_password TEXT NOT NULL,
+                two_factor_enabled BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    else:
+        if 'email' not in existing_columns:
+            print("📦 Migrating database: Adding email column...")
+            conn.execute("ALTER TABLE users ADD COLUMN email TEXT")
+            # Set default email for existing users
+            conn.execute("UPDATE users SET email = username || '@example.com' WHERE email IS NULL")
+        _add_missing_columns(conn, "users", [("two_factor_enabled", "BOOLEAN DEFAULT 0")])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS verification_codes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            code TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            used BOOLEAN DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            name TEXT NOT NULL,
+            image_url TEXT,
+            price TEXT,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    _add_missing_columns(conn, "products", [("image_url", "TEXT"), ("price", "TEXT")])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            frequency TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER,
+            start_date TEXT,
+            frequency_type TEXT,
+            frequency_value INTEGER,
+            frequency_unit TEXT,
+            specific_day_type TEXT,
+            weekday INTEGER,
+            monthday INTEGER,
+            next_buy_date TEXT,
+            FOREIGN KEY (product_id) REFERENCES products (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    _add_missing_columns(conn, "subscriptions", [
+        ("start_date", "TEXT"),
+        ("frequency_type", "TEXT"),
+        ("frequency_value", "INTEGER"),
+        ("frequency_unit", "TEXT"),
+        ("specific_day_type", "TEXT"),
+        ("weekday", "INTEGER"),
+        ("monthday", "INTEGER"),
+        ("next_buy_date", "TEXT"),
+    ])
+
+
+def _hot_query_indexes(conn: sqlite3.Connection):
+    """Add secondary indexes for the per-user dashboard, login and due-date queries"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_user_added ON products (user_id, added_at)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_user_active_created
+        ON subscriptions (user_id, is_active, created_at)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_product_active
+        ON subscriptions (product_id, is_active, user_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_next_buy_active
+        ON subscriptions (next_buy_date, is_active)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_verification_codes_user_code
+        ON verification_codes (user_id, code, used, created_at)
+    """)
+    conn.execute("ANALYZE")
+
+
+def _sessions_table(conn: sqlite3.Connection):
+    """Persist login and pending 2FA sessions so they survive restarts and are shared between workers"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            namespace TEXT NOT NULL,
+            token TEXT NOT NULL,
+            user_id INTEGER,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, token)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (namespace, expires_at)")
+
+
+def _cart_jobs_table(conn: sqlite3.Connection):
+    """Durable queue of cart jobs processed by the cart workers"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cart_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            product_urls TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            heartbeat_at REAL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cart_jobs_status ON cart_jobs (status, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cart_jobs_user ON cart_jobs (user_id, id)")
+
+
+def _cart_job_events_table(conn: sqlite3.Connection):
+    """Per-product progress events of cart jobs, streamed to the browser"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cart_job_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            data TEXT,
+            created_at REAL NOT NULL,
+            FOREIGN KEY (job_id) REFERENCES cart_jobs (id) ON DELETE CASCADE
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cart_job_events_job ON cart_job_events (job_id, id)")
+
+
+def _product_cache_table(conn: sqlite3.Connection):
+    """Scraped product metadata by Galaxus product id, shared by all users and workers"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_cache (
+            product_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_cache_accessed ON product_cache (accessed_at)")
+
+
+def _price_refresh_tables(conn: sqlite3.Connection):
+    """Last known price and HTTP validators per Galaxus product id, plus a history of price changes"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_prices (
+            product_id TEXT PRIMARY KEY,
+            price TEXT,
+            currency TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            checked_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT NOT NULL,
+            price TEXT NOT NULL,
+            currency TEXT,
+            recorded_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_history_product ON price_history (product_id, recorded_at)")
+
+
+# (version, description, migration) - append new migrations, never reorder or edit applied ones
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "baseline schema", _baseline_schema),
+    (2, "indexes for hot queries", _hot_query_indexes),
+    (3, "sessions table", _sessions_table),
+    (4, "cart job queue", _cart_jobs_table),
+    (5, "cart job progress events", _cart_job_events_table),
+    (6, "product metadata cache", _product_cache_table),
+    (7, "price refresh", _price_refresh_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version a database has been migrated to"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> int:
+    """
+    Apply all pending migrations up to target (defaults to the latest)
+
+    Args:
+        conn: Open database connection
+        target: Schema version to stop at
+
+    Returns:
+        int: Schema version after migrating
+    """
+    target = LATEST_VERSION if target is None else target
+    version = get_schema_version(conn)
+
+    if conn.in_transaction:
+        conn.commit()
+
+    for migration_version, description, migration in MIGRATIONS:
+        if migration_version <= version or migration_version > target:
+            continue
+
+        # The write lock is taken up front and the version read again under it:
+        # the web app and the cart workers migrate the same database at startup
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = get_schema_version(conn)
+            if migration_version <= version:
+                conn.commit()
+                continue
+            print(f"📦 Migrating database to version {migration_version}: {description}...")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {migration_version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = migration_version
+
+    return version
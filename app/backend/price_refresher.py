@@ -0,0 +1,222 @@
+"""
+Background price refresh for stored products
+Products are checked in priority order - the soonest next buy date of an
+active subscription first, then the longest unchecked - so dashboard and
+reminder email prices are current without scraping on demand. Every Galaxus
+product is downloaded once no matter how many users saved it, with a
+conditional request (ETag / Last-Modified) over the shared HTTP pool, so
+unchanged pages cost a 304 instead of a full page. Results are written back
+in one transaction with batched UPDATEs; price_history keeps the first price
+seen and then only a row per actual change.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from . import http_client
+from .db import ConnectionPool
+from .recognize_products import parse_product_html, parse_product_id
+from .structured_data import parse_amount
+
+INTERVAL_MINUTES = float(os.getenv("PRICE_REFRESH_INTERVAL_MINUTES", "30"))
+BATCH_SIZE = int(os.getenv("PRICE_REFRESH_BATCH", "50"))  # products per run
+CONCURRENCY = int(os.getenv("PRICE_REFRESH_CONCURRENCY", "4"))
+MIN_AGE = float(os.getenv("PRICE_REFRESH_MIN_AGE", str(12 * 3600)))  # seconds between checks of one product
+HISTORY_LIMIT = 100
+
+
+def product_url(product_id: str) -> str:
+    return f"https://galaxus.ch/product/{product_id}"
+
+
+def same_price(a: Optional[str], b: Optional[str]) -> bool:
+    """Compare prices by amount, so "65" and "65.00" (metadata vs structured data) are the same"""
+    amount_a, amount_b = parse_amount(a), parse_amount(b)
+    if amount_a is None or amount_b is None:
+        return a == b
+    return round(amount_a, 2) == round(amount_b, 2)
+
+
+def select_due_products(pool: ConnectionPool, limit: int = BATCH_SIZE, min_age: float = MIN_AGE,
+                        now: Optional[float] = None) -> List[dict]:
+    """
+    Galaxus products whose price should be checked, most urgent first
+
+    Args:
+        pool: Database connection pool
+        limit: Maximum number of products
+        min_age: Seconds since the last check before a product is due again
+        now: Current time (defaults to time.time())
+
+    Returns:
+        list: [{"product_id", "rows" ({products.id: stored price}), "next_buy_date",
+                "price", "etag", "last_modified", "checked_at"} (None for never checked products)]
+    """
+    now = time.time() if now is None else now
+    with pool.connection() as conn:
+        rows = conn.execute("""
+            SELECT p.id, p.url, p.price, MIN(s.next_buy_date)
+            FROM products p
+            LEFT JOIN subscriptions s ON s.product_id = p.id AND s.is_active = 1
+            GROUP BY p.id
+        """).fetchall()
+        checked = {
+            row[0]: row[1:]
+            for row in conn.execute("SELECT product_id, price, etag, last_modified, checked_at FROM product_prices")
+        }
+
+    products: Dict[str, dict] = {}
+    for row_id, url, price, next_buy_date in rows:
+        product_id = parse_product_id(url or "")
+        if not product_id:
+            continue
+        product = products.setdefault(product_id, {"product_id": product_id, "rows": {}, "next_buy_date": None})
+        product["rows"][row_id] = price
+        if next_buy_date and (product["next_buy_date"] is None or next_buy_date < product["next_buy_date"]):
+            product["next_buy_date"] = next_buy_date
+
+    due = []
+    for product in products.values():
+        price, etag, last_modified, checked_at = checked.get(product["product_id"], (None, None, None, None))
+        if checked_at is not None and now - checked_at < min_age:
+            continue
+        product.update(price=price, etag=etag, last_modified=last_modified, checked_at=checked_at)
+        due.append(product)
+
+    # Soonest next buy first (products without an active subscription last), then the longest unchecked
+    due.sort(key=lambda p: (p["next_buy_date"] is None, p["next_buy_date"] or "", p["checked_at"] or 0))
+    return due[:limit]
+
+
+def fetch_price(product_id: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+    """
+    Conditionally download a product page and read its price
+
+    Returns:
+        dict: {"modified": False} for a 304, else {"modified": True, "price", "currency", "etag", "last_modified"}
+
+    Raises:
+        requests.HTTPError: For error responses
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    url = product_url(product_id)
+    resp = http_client.get(url, headers=headers)
+    if resp.status_code == 304:
+        return {"modified": False}
+    resp.raise_for_status()
+
+    data = parse_product_html(resp.content, url)
+    return {
+        "modified": True,
+        "price": data["price"],
+        "currency": data.get("currency"),
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+
+
+def refresh_prices(pool: ConnectionPool, fetch: Callable[..., dict] = fetch_price, limit: int = BATCH_SIZE,
+                   concurrency: int = CONCURRENCY, min_age: float = MIN_AGE, clock=time.time,
+                   on_change: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Check the prices of the most urgent due products and store the results
+
+    Args:
+        pool: Database connection pool
+        fetch: fetch_price or a replacement with the same signature (e.g. rate limited)
+        limit: Products checked in this run
+        concurrency: Pages downloaded at the same time
+        min_age: Seconds since the last check before a product is due again
+        clock: Time source
+        on_change: Called with the product id of every product whose price changed, once
+            stored (e.g. ProductCache.invalidate, so previews don't serve the old price)
+
+    Returns:
+        dict: {"checked", "changed" (stored prices updated), "unchanged", "failed"}
+    """
+    due = select_due_products(pool, limit, min_age, now=clock())
+    stats = {"checked": len(due), "unchanged": 0, "changed": 0, "failed": 0}
+    if not due:
+        return stats
+
+    def check(product: dict):
+        try:
+            return product, fetch(product["product_id"], product["etag"], product["last_modified"])
+        except Exception as e:
+            print(f"⚠️ Price refresh failed for product {product['product_id']}: {e}")
+            return product, None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(due))), thread_name_prefix="price") as executor:
+        results = list(executor.map(check, due))
+
+    now = clock()
+    checked, product_updates, history, changed = [], [], [], []
+    for product, result in results:
+        if result is None:
+            stats["failed"] += 1
+            continue
+
+        price, currency = product["price"], None
+        etag, last_modified = product["etag"], product["last_modified"]
+        if result["modified"]:
+            etag, last_modified, currency = result["etag"], result["last_modified"], result["currency"]
+            # Keep the last known price if the page doesn't show one (e.g. a changed layout)
+            price = result["price"] or price
+
+        outdated = [
+            (price, row_id) for row_id, stored in product["rows"].items() if price and not same_price(stored, price)
+        ]
+        product_updates.extend(outdated)
+        first_seen = product["price"] is None
+        price_changed = bool(price) and not first_seen and not same_price(product["price"], price)
+        # History starts with the first price seen and then only grows when it changes
+        if price and (first_seen or price_changed):
+            history.append((product["product_id"], price, currency, now))
+        if outdated or price_changed:
+            changed.append(product["product_id"])
+        stats["changed" if outdated or price_changed else "unchanged"] += 1
+        checked.append((product["product_id"], price, currency, etag, last_modified, now))
+
+    with pool.connection() as conn:
+        conn.executemany("""
+            INSERT INTO product_prices (product_id, price, currency, etag, last_modified, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (product_id) DO UPDATE SET
+                price = excluded.price,
+                currency = COALESCE(excluded.currency, product_prices.currency),
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                checked_at = excluded.checked_at
+        """, checked)
+        conn.executemany("UPDATE products SET price = ? WHERE id = ?", product_updates)
+        conn.executemany(
+            "INSERT INTO price_history (product_id, price, currency, recorded_at) VALUES (?, ?, ?, ?)", history
+        )
+
+    if on_change:
+        for product_id in changed:
+            on_change(product_id)
+
+    return stats
+
+
+def get_price_history(pool: ConnectionPool, product_id: str, limit: int = HISTORY_LIMIT) -> List[dict]:
+    """
+    Recorded price changes of a Galaxus product, newest first
+
+    Returns:
+        list: [{"price", "currency", "recorded_at"}]
+    """
+    with pool.connection() as conn:
+        rows = conn.execute("""
+            SELECT price, currency, recorded_at FROM price_history
+            WHERE product_id = ? ORDER BY recorded_at DESC, id DESC LIMIT ?
+        """, (product_id, limit)).fetchall()
+    return [{"price": price, "currency": currency, "recorded_at": recorded_at} for price, currency, recorded_at in rows]
@@ -0,0 +1,206 @@
+"""
+Product metadata cache keyed by Galaxus product id
+Previews of the same product (by any user, seconds or days apart) are served
+from an in-memory LRU in front of the SQLite product_cache table instead of
+downloading and parsing the product page again. Entries older than the
+fresh TTL are still returned while a background refresh runs
+(stale-while-revalidate); only entries past the stale TTL are fetched
+before answering.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Callable, Optional
+
+from .cache import TTLCache
+from .db import ConnectionPool
+from .recognize_products import parse_product_id, recognize_product_id
+
+FRESH_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "3600"))
+STALE_TTL = float(os.getenv("PRODUCT_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_SIZE", "5000"))
+MEMORY_SIZE = 1000
+ACCESS_FLUSH_INTERVAL = 60  # seconds between writing memory hits back as accessed_at
+
+
+class ProductCache:
+    """
+    Product id -> preview data ({"title", "image_url", "price"})
+
+    Args:
+        pool: Database connection pool (the product_cache table)
+        fetch: Scrapes a product by id; defaults to recognize_product_id
+        fresh_ttl: Seconds an entry is served without refreshing it
+        stale_ttl: Seconds an entry may be served at all (refreshed in the background once past fresh_ttl)
+        max_entries: Rows kept in the table; evict() drops the least recently used beyond that
+        executor: Runs background refreshes; defaults to the I/O executor
+    """
+
+    def __init__(self, pool: ConnectionPool, fetch: Callable[[str], Optional[dict]] = recognize_product_id,
+                 fresh_ttl: float = FRESH_TTL, stale_ttl: float = STALE_TTL, max_entries: int = MAX_ENTRIES,
+                 memory_size: int = MEMORY_SIZE, executor: Optional[Executor] = None, clock=time.time):
+        self.pool = pool
+        self.fetch = fetch
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._executor = executor
+        self._clock = clock
+        self._memory = TTLCache(maxsize=memory_size, ttl=stale_ttl, clock=clock)  # id -> (data, fetched_at)
+        self._inflight = {}  # id -> Future of the running fetch
+        self._accessed = {}  # id -> time of the last memory hit not yet written to the table
+        self._accessed_flushed_at = clock()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[dict]:
+        """Preview data for a product URL, or None if it has no Galaxus product id"""
+        product_id = parse_product_id(url or "")
+        if not product_id:
+            return None
+        return self.get_by_id(product_id)
+
+    def get_by_id(self, product_id: str) -> Optional[dict]:
+        """
+        Preview data for a product id, fetched only if it isn't cached or is past the stale TTL
+
+        Raises:
+            Whatever fetch raises, when the product has to be fetched before answering
+        """
+        entry = self._memory.get(product_id)
+        if entry:
+            self._touch(product_id)
+        else:
+            entry = self._load(product_id)
+        if entry:
+            data, fetched_at = entry
+            age = self._clock() - fetched_at
+            if age < self.fresh_ttl:
+                return data
+            if age < self.stale_ttl:
+                self._refresh_in_background(product_id)
+                return data
+        return self._fetch(product_id)
+
+    def invalidate(self, product_id: str):
+        """Forget a product, so the next get fetches it again"""
+        self._memory.delete(product_id)
+        with self._lock:
+            self._accessed.pop(product_id, None)
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM product_cache WHERE product_id = ?", (product_id,))
+
+    def evict(self) -> int:
+        """
+        Delete entries past the stale TTL and the least recently used beyond max_entries
+
+        Returns:
+            int: Number of rows deleted
+        """
+        self._memory.prune()
+        # Memory hits count as use too, or the hottest entries would look the least recently used
+        self.flush_accessed()
+        with self.pool.connection() as conn:
+            expired = conn.execute(
+                "DELETE FROM product_cache WHERE fetched_at < ?", (self._clock() - self.stale_ttl,)
+            ).rowcount
+            overflow = conn.execute(
+                """DELETE FROM product_cache WHERE product_id IN (
+                       SELECT product_id FROM product_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            ).rowcount
+        return expired + overflow
+
+    def flush_accessed(self) -> int:
+        """
+        Write the access times of memory hits to the table in one batch
+
+        Returns:
+            int: Number of entries written
+        """
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            self._accessed_flushed_at = self._clock()
+        if accessed:
+            with self.pool.connection() as conn:
+                conn.executemany(
+                    "UPDATE product_cache SET accessed_at = MAX(accessed_at, ?) WHERE product_id = ?",
+                    [(accessed_at, product_id) for product_id, accessed_at in accessed.items()]
+                )
+        return len(accessed)
+
+    def _touch(self, product_id: str):
+        """Remember a memory hit; written back every ACCESS_FLUSH_INTERVAL seconds instead of per hit"""
+        now = self._clock()
+        with self._lock:
+            self._accessed[product_id] = now
+            due = now - self._accessed_flushed_at >= ACCESS_FLUSH_INTERVAL
+        if due:
+            self.flush_accessed()
+
+    def _load(self, product_id: str):
+        """Read an entry from the table (and keep it in memory); marks it as recently used"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT data, fetched_at FROM product_cache WHERE product_id = ?", (product_id,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE product_cache SET accessed_at = ? WHERE product_id = ?", (self._clock(), product_id))
+
+        entry = (json.loads(row[0]), row[1])
+        self._memory.set(product_id, entry)
+        return entry
+
+    def _store(self, product_id: str, data: dict):
+        now = self._clock()
+        self._memory.set(product_id, (data, now))
+        with self.pool.connection() as conn:
+            conn.execute(
+                """INSERT INTO product_cache (product_id, data, fetched_at, accessed_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (product_id) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at,
+                                                          accessed_at = excluded.accessed_at""",
+                (product_id, json.dumps(data), now, now)
+            )
+
+    def _fetch(self, product_id: str) -> Optional[dict]:
+        """Fetch and store a product; concurrent calls for the same id share one fetch"""
+        with self._lock:
+            future = self._inflight.get(product_id)
+            owner = future is None
+            if owner:
+                future = self._inflight[product_id] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            data = self.fetch(product_id)
+            # Don't cache pages we couldn't read anything from
+            if data and any(data.values()):
+                self._store(product_id, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(product_id, None)
+
+    def _refresh_in_background(self, product_id: str):
+        with self._lock:
+            if product_id in self._inflight:
+                return
+        if self._executor is None:
+            from .executors import io_executor
+            self._executor = io_executor
+        self._executor.submit(self._refresh, product_id)
+
+    def _refresh(self, product_id: str):
+        try:
+            self._fetch(product_id)
+        except Exception as e:
+            print(f"⚠️  Refreshing cached product {product_id} failed: {e}")
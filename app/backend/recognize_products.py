@@ -1,12 +1,142 @@
+import os
 import re
-import requests
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+from . import http_client
+from .structured_data import extract_structured_product, parse_amount
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+# BeautifulSoup tree builder: lxml (C, several times faster) when installed
+HTML_PARSER = os.getenv("HTML_PARSER") or DEFAULT_PARSER
+# Stop downloading a product page once the preview data has been read: the
+# structured product data (JSON-LD / __NEXT_DATA__) or, with
+# HTML_STRUCTURED_DATA=0, a <head> with all the preview meta tags
+HEAD_ONLY = os.getenv("HTML_HEAD_ONLY", "1") == "1"
+STRUCTURED_DATA = os.getenv("HTML_STRUCTURED_DATA", "1") == "1"
+CHUNK_SIZE = 16 * 1024
+
+HEAD_END = re.compile(rb"</head\s*>", re.I)
+# og:title, og:image and a price meta tag, the first choices of pick_title, pick_first_image_url and get_price
+HEAD_METADATA = (
+    re.compile(rb"""property=["']og:title["']""", re.I),
+    re.compile(rb"""property=["']og:image["']""", re.I),
+    re.compile(rb"""itemprop=["']price["']|property=["']product:price:amount["']""", re.I),
+)
+
+def split_head(html: bytes) -> bytes | None:
+    """
+    Returns the document up to and including </head> if the head has all the
+    preview metadata, otherwise None (the whole page is needed).
+    """
+    end = HEAD_END.search(html)
+    if not end:
+        return None
+    head = html[:end.end()]
+    if all(pattern.search(head) for pattern in HEAD_METADATA):
+        return head
+    return None
+
+SCRIPT_START = re.compile(rb"<script\b[^>]*>", re.I)
+SCRIPT_END = re.compile(rb"</script\s*>", re.I)
+JSON_LD_TYPE = re.compile(rb"""\btype=["']?application/ld\+json""", re.I)
+NEXT_DATA_ID = re.compile(rb"""\bid=["']?__NEXT_DATA__""", re.I)
+PRODUCT_TYPE = re.compile(rb'"@type"\s*:\s*(\[[^\]]*)?"Product"')
+# Bytes read while looking for structured data before fetch_document falls
+# back to the <head> (or the whole page) instead
+STRUCTURED_DATA_LIMIT = int(os.getenv("HTML_STRUCTURED_DATA_LIMIT", str(512 * 1024)))
+
+class StructuredSplitter:
+    """
+    split_structured for a page that arrives in chunks. Each call only scans
+    the bytes added since the previous call, so every script block is found
+    and checked once, when it closes. Once limit bytes have been read
+    without complete structured data it answers like split_head.
+    """
 
-def fetch_html(url: str) -> str:
-    resp = requests.get(url, timeout=5)
-    resp.raise_for_status()
-    return resp.text
+    def __init__(self, limit: int | None = STRUCTURED_DATA_LIMIT):
+        self.limit = limit
+        self.pos = 0  # where scanning continues
+        self.script = None  # (content start, kind) of the <script> that hasn't closed yet
+        self.head_only = False  # limit reached, only the <head> is looked at
+
+    def __call__(self, html: bytes | bytearray) -> bytes | None:
+        if self.head_only:
+            return split_head(html)
+        while True:
+            if self.script is None:
+                start = SCRIPT_START.search(html, self.pos)
+                if not start:
+                    # A tag cut off at the end of the chunk is scanned again
+                    tag = html.rfind(b"<", self.pos)
+                    self.pos = tag if tag != -1 else len(html)
+                    break
+                tag = start.group()
+                kind = "json_ld" if JSON_LD_TYPE.search(tag) else "next_data" if NEXT_DATA_ID.search(tag) else None
+                self.script = (start.end(), kind)
+                self.pos = start.end()
+            end = SCRIPT_END.search(html, self.pos)
+            if not end:
+                # Keeps a "</script>" cut off at the end of the chunk in reach
+                self.pos = max(self.pos, len(html) - 16)
+                break
+            content_start, kind = self.script
+            self.script = None
+            self.pos = end.end()
+            if kind and self._has_product(html, kind, content_start, end):
+                return bytes(html[:end.end()])
+        if self.limit is not None and len(html) >= self.limit:
+            self.head_only = True
+            return split_head(html)
+        return None
+
+    @staticmethod
+    def _has_product(html: bytes | bytearray, kind: str, content_start: int, end: re.Match) -> bool:
+        """Whether the document up to this block has the product's title and price"""
+        if kind == "json_ld" and not PRODUCT_TYPE.search(html, content_start, end.start()):
+            # JSON-LD without a Product isn't decoded
+            return False
+        product = extract_structured_product(bytes(html[:end.end()]))
+        return bool(product and product["title"] and product["price"] is not None)
+
+def split_structured(html: bytes) -> bytes | None:
+    """
+    Returns the document up to the end of the first complete JSON-LD block
+    with a Product or of the __NEXT_DATA__ script, if it has the product's
+    title and price, otherwise None.
+    """
+    return StructuredSplitter(limit=None)(html)
+
+def fetch_document(url: str, head_only: bool = HEAD_ONLY, structured: bool = STRUCTURED_DATA) -> tuple[bytes, bool]:
+    """
+    Download a page as bytes. With head_only, stops reading (and closes the
+    connection) as soon as the preview data has been read: the structured
+    product data if structured, else a <head> with all the preview metadata.
+    Structured data is looked for in the first STRUCTURED_DATA_LIMIT bytes,
+    then the <head> is used. Pages without either are read in full.
+
+    Returns (html, truncated), truncated is True if only a prefix was read.
+    """
+    split = StructuredSplitter() if structured else split_head
+    with http_client.get(url, stream=True) as resp:
+        resp.raise_for_status()
+        html = bytearray()
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            html += chunk
+            if head_only:
+                prefix = split(html)
+                if prefix is not None:
+                    return bytes(prefix), True
+        return bytes(html), False
+
+def make_soup(html: str | bytes, parser: str | None = None) -> BeautifulSoup:
+    # Bytes are decoded by BeautifulSoup using the page's <meta charset>
+    return BeautifulSoup(html, parser or HTML_PARSER)
 
 def pick_title(soup: BeautifulSoup) -> str | None:
     # Prefer Open Graph, then <title>, then <h1>
@@ -48,6 +178,26 @@ def _canonicalize_img_url(u: str | None, base: str) -> str | None:
     return urljoin(base, u)
 
 
+IMAGE_URL = re.compile(r"\.(png|jpe?g|webp|gif)(\?.*)?$", re.I)
+
+def _img_tag_url(img: Tag, base_url: str) -> str | None:
+    # Try common lazy-load attributes in priority order
+    candidates = [
+        img.get("src"),
+        img.get("data-src"),
+        img.get("data-original"),
+        img.get("data-lazy-src"),
+        img.get("data-flickity-lazyload"),
+        _url_from_srcset(img.get("srcset", "")),
+        _url_from_srcset(img.get("data-srcset", "")),
+    ]
+    for c in candidates:
+        u = _canonicalize_img_url(c, base_url)
+        if u:
+            return u
+    return None
+
+
 def pick_first_image_url(soup: BeautifulSoup, base_url: str) -> str | None:
     # 1) Open Graph first (most reliable on product pages)
     og = soup.find("meta", property="og:image")
@@ -73,23 +223,12 @@ def pick_first_image_url(soup: BeautifulSoup, base_url: str) -> str | None:
     # 4) First <img> in DOM, considering lazy-load attributes
     img = soup.find("img")
     if img:
-        # Try common lazy-load attributes in priority order
-        candidates = [
-            img.get("src"),
-            img.get("data-src"),
-            img.get("data-original"),
-            img.get("data-lazy-src"),
-            img.get("data-flickity-lazyload"),
-            _url_from_srcset(img.get("srcset", "")),
-            _url_from_srcset(img.get("data-srcset", "")),
-        ]
-        for c in candidates:
-            u = _canonicalize_img_url(c, base_url)
-            if u:
-                return u
+        u = _img_tag_url(img, base_url)
+        if u:
+            return u
 
     # 5) Last resort: any <meta content> ending with an image extension
-    meta_img = soup.find("meta", content=re.compile(r"\.(png|jpe?g|webp|gif)(\?.*)?$", re.I))
+    meta_img = soup.find("meta", content=IMAGE_URL)
     if meta_img and meta_img.get("content"):
         u = _canonicalize_img_url(meta_img["content"].strip(), base_url)
         if u:
@@ -97,12 +236,32 @@ def pick_first_image_url(soup: BeautifulSoup, base_url: str) -> str | None:
 
     return None
 
-import re
+PLAIN_AMOUNT = re.compile(r"\d[\d'’]*(?:[.,]\d+)?")
+
+def format_price(price: str | float | None) -> str | None:
+    """
+    Prices from metadata and structured data as "64.90"; visible price texts
+    like "CHF 249.–" are kept as they are.
+    """
+    if isinstance(price, (int, float)):
+        return f"{price:.2f}"
+    price = (price or "").strip()
+    if PLAIN_AMOUNT.fullmatch(price):
+        return f"{parse_amount(price):.2f}"
+    return price or None
+
+PRICE_TEXT = re.compile(r"(CHF|EUR|€|\$)\s*[\d'’.,\-–]+|[\d'’.,\-–]+\s*(CHF|EUR|€|\$)")
+
+def _is_price_like(tag: Tag) -> bool:
+    return tag.name in ["span", "div"] and (
+        "price" in " ".join(tag.get("class", [])).lower()
+        or "price" in (tag.get("id", "")).lower()
+    )
 
 def get_price(soup: BeautifulSoup) -> str | None:
     """
     Try to extract a visible or metadata price string from a product page.
-    Returns a cleaned string like 'CHF 249.–' or '249.00 CHF'.
+    Returns a cleaned string like 'CHF 249.–' or '249.00 CHF', metadata amounts as '249.00'.
     """
 
     # 1. Look for schema.org / Open Graph metadata
@@ -113,16 +272,11 @@ def get_price(soup: BeautifulSoup) -> str | None:
     ]
     for tag_name, attrs in meta_selectors:
         tag = soup.find(tag_name, attrs=attrs)
-        if tag and tag.get("content"):
-            return tag["content"].strip()
+        if tag and tag.get("content") and tag["content"].strip():
+            return format_price(tag["content"])
 
     # 2. Common visible price classes or ids
-    price_like = soup.find(
-        lambda tag: tag.name in ["span", "div"] and (
-            "price" in " ".join(tag.get("class", [])).lower()
-            or "price" in (tag.get("id", "")).lower()
-        )
-    )
+    price_like = soup.find(_is_price_like)
     if price_like and price_like.get_text(strip=True):
         text = price_like.get_text(strip=True)
         if re.search(r"\d", text):
@@ -130,23 +284,156 @@ def get_price(soup: BeautifulSoup) -> str | None:
 
     # 3. Regex scan for CHF/€/$ patterns anywhere in text
     # Example matches: "CHF 249.–", "CHF 249.00", "249.00 CHF"
-    match = re.search(
-        r"(CHF|EUR|€|\$)\s*[\d'’.,\-–]+|[\d'’.,\-–]+\s*(CHF|EUR|€|\$)",
-        soup.get_text(" ", strip=True)
-    )
+    match = PRICE_TEXT.search(soup.get_text(" ", strip=True))
     if match:
         return match.group(0).strip()
 
     return None
 
 
+# Meta tags extract_metadata looks for: (attribute, value) -> candidate name
+META_CANDIDATES = {
+    ("property", "og:title"): "og:title",
+    ("name", "twitter:title"): "twitter:title",
+    ("property", "og:image"): "og:image",
+    ("name", "twitter:image"): "twitter:image",
+    ("itemprop", "price"): "itemprop:price",
+    ("property", "product:price:amount"): "product:price:amount",
+    ("name", "twitter:data1"): "twitter:data1",
+}
+
+def _content(tag: Tag | None) -> str | None:
+    return tag["content"].strip() if tag and tag.get("content") else None
+
+def _best_candidates_found(first: dict, base_url: str) -> bool:
+    # Nothing later in the document can beat the first choice of each field
+    return (
+        bool(_content(first.get("og:title")))
+        and bool(_content(first.get("itemprop:price")))
+        and bool(_canonicalize_img_url(_content(first.get("og:image")), base_url))
+    )
+
+def extract_metadata(soup: BeautifulSoup, base_url: str) -> dict:
+    """
+    Title, image and price in one walk over the document.
+
+    Collects the first tag of every kind pick_title, pick_first_image_url and
+    get_price look for, then applies their priority rules, so the result is
+    the same as calling the three functions. The walk stops as soon as every
+    field has its first choice, and the document text is only joined for the
+    price regex if no price tag matched.
+    """
+    first = {}
+    price_like_found = False
+    for node in soup.descendants:
+        if not isinstance(node, Tag):
+            continue
+        name = node.name
+        if name == "meta":
+            attrs = node.attrs
+            for attribute in ("property", "name", "itemprop"):
+                candidate = META_CANDIDATES.get((attribute, attrs.get(attribute)))
+                if candidate and candidate not in first:
+                    first[candidate] = node
+                    # The first choices of all three fields are meta tags
+                    if _best_candidates_found(first, base_url):
+                        return _pick_from(first, soup, base_url)
+            content = attrs.get("content")
+            if content and "meta:image" not in first and IMAGE_URL.search(content):
+                first["meta:image"] = node
+        elif name == "title" or name == "h1" or name == "img":
+            first.setdefault(name, node)
+        elif name == "link":
+            rel = node.get("rel") or []
+            if "image_src" in (rel if isinstance(rel, str) else " ".join(rel)):
+                first.setdefault("link:image_src", node)
+        elif not price_like_found and (name == "span" or name == "div") and _is_price_like(node):
+            first["price-like"] = node
+            price_like_found = True
+
+    return _pick_from(first, soup, base_url)
+
+def _pick_from(first: dict, soup: BeautifulSoup, base_url: str) -> dict:
+    return {
+        "title": _pick_title_from(first),
+        "image_url": _pick_image_from(first, base_url),
+        "price": _pick_price_from(first, soup),
+    }
+
+def _pick_title_from(first: dict) -> str | None:
+    title = _content(first.get("og:title"))
+    if title:
+        return title
+    tag = first.get("title")
+    if tag and tag.string:
+        return tag.string.strip()
+    tag = first.get("h1")
+    if tag and tag.get_text(strip=True):
+        return tag.get_text(strip=True)
+    return _content(first.get("twitter:title"))
+
+def _pick_image_from(first: dict, base_url: str) -> str | None:
+    for candidate in ("og:image", "link:image_src", "twitter:image", "img", "meta:image"):
+        tag = first.get(candidate)
+        if not tag:
+            continue
+        if candidate == "img":
+            u = _img_tag_url(tag, base_url)
+        elif candidate == "link:image_src":
+            u = _canonicalize_img_url(tag["href"].strip(), base_url) if tag.get("href") else None
+        else:
+            u = _canonicalize_img_url(_content(tag), base_url)
+        if u:
+            return u
+    return None
+
+def _pick_price_from(first: dict, soup: BeautifulSoup) -> str | None:
+    for candidate in ("itemprop:price", "product:price:amount", "twitter:data1"):
+        price = _content(first.get(candidate))
+        if price:
+            return format_price(price)
+
+    price_like = first.get("price-like")
+    if price_like:
+        text = price_like.get_text(strip=True)
+        if text and re.search(r"\d", text):
+            return text
+
+    # Only now pay for joining the whole document's text
+    match = PRICE_TEXT.search(soup.get_text(" ", strip=True))
+    return match.group(0).strip() if match else None
+
+
+def parse_product_html(html: str | bytes, url: str, parser: str | None = None) -> dict:
+    """
+    Preview data of a product page: {"title", "image_url", "price"} plus
+    "currency", "availability" and "images" where the page has structured data.
+
+    JSON-LD / __NEXT_DATA__ come first; the HTML is only parsed for the
+    heuristics if one of title, image and price is still missing.
+    """
+    structured = extract_structured_product(html, url) or {}
+    images = structured.get("images") or []
+    price = structured.get("price")
+    data = {
+        "title": structured.get("title"),
+        "image_url": images[0] if images else None,
+        "price": format_price(price),
+        "currency": structured.get("currency"),
+        "availability": structured.get("availability"),
+        "images": images,
+    }
+
+    if not (data["title"] and data["image_url"] and data["price"]):
+        fallback = extract_metadata(make_soup(html, parser), url)
+        for key, value in fallback.items():
+            data[key] = data[key] or value
+    return data
+
+
 def get_product_data_from_url(url: str) -> dict:
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
-    title = pick_title(soup)
-    image_url = pick_first_image_url(soup, url)
-    price = get_price(soup)
-    return {"title": title, "image_url": image_url, "price": price}
+    html, _ = fetch_document(url)
+    return parse_product_html(html, url)
 
 
 def recognize_products(url: str):
@@ -155,11 +442,15 @@ def recognize_products(url: str):
     """
     product_id = parse_product_id(url)
     if product_id:
-
-        galaxus_url = f"https://galaxus.ch/product/{product_id}"
-        product_data = get_product_data_from_url(galaxus_url)
-        return product_data
+        return recognize_product_id(product_id)
     return None
+
+
+def recognize_product_id(product_id: str) -> dict:
+    """
+    Scrape the preview data of a galaxus product by its id.
+    """
+    return get_product_data_from_url(f"https://galaxus.ch/product/{product_id}")
     
 
 
@@ -0,0 +1,113 @@
+"""
+Persistent session storage with expiry
+Sessions live in the SQLite sessions table so they survive restarts and are
+shared between uvicorn workers; a short-lived in-memory LRU in front of it
+keeps the per-request token lookup off the database.
+"""
+
+import hashlib
+import json
+import secrets
+import time
+from typing import Optional
+
+from .cache import TTLCache
+from .db import ConnectionPool
+
+# How long a worker may serve a session from memory before re-checking the database
+# (bounds how long a logout in another worker can go unnoticed)
+LOCAL_CACHE_TTL = 60
+
+
+def _token_key(token: str) -> str:
+    """Only a hash of the token is stored, so the table does not contain usable cookies"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore:
+    """
+    Token -> session data mapping with a fixed lifetime per entry
+
+    Supports the dict operations the routes use (store[token] = data,
+    token in store, store[token], del store[token]) plus create/get/delete.
+    The user_id in the session data is also stored in its own column.
+    """
+
+    def __init__(self, pool: ConnectionPool, namespace: str, ttl: float, cache_size: int = 10000):
+        self.pool = pool
+        self.namespace = namespace
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=cache_size, ttl=min(ttl, LOCAL_CACHE_TTL))
+
+    def create(self, data: dict) -> str:
+        """Store data under a new random token and return the token"""
+        token = secrets.token_urlsafe(32)
+        self[token] = data
+        return token
+
+    def get(self, token: Optional[str]) -> Optional[dict]:
+        """Get the session data for a token, or None if it is unknown or expired"""
+        if not token:
+            return None
+
+        key = _token_key(token)
+        now = time.time()
+        entry = self._cache.get(key)
+        if entry is None:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT data, expires_at FROM sessions WHERE namespace = ? AND token = ?",
+                    (self.namespace, key)
+                ).fetchone()
+            if not row:
+                return None
+            entry = (json.loads(row[0]), row[1])
+            self._cache.set(key, entry, ttl=min(self._cache.ttl, max(row[1] - now, 0)))
+
+        data, expires_at = entry
+        if expires_at <= now:
+            self.delete(token)
+            return None
+        return data
+
+    def delete(self, token: Optional[str]):
+        """Remove a session"""
+        if not token:
+            return
+        key = _token_key(token)
+        self._cache.delete(key)
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE namespace = ? AND token = ?", (self.namespace, key))
+
+    def evict_expired(self) -> int:
+        """Delete all expired sessions of this namespace and return how many were removed"""
+        self._cache.prune()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time())
+            )
+            return cursor.rowcount
+
+    def __setitem__(self, token: str, data: dict):
+        key = _token_key(token)
+        expires_at = time.time() + self.ttl
+        with self.pool.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO sessions (namespace, token, user_id, data, expires_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (self.namespace, key, data.get("user_id"), json.dumps(data, default=str), expires_at)
+            )
+        self._cache.set(key, (data, expires_at))
+
+    def __getitem__(self, token: str) -> dict:
+        data = self.get(token)
+        if data is None:
+            raise KeyError(token)
+        return data
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def __delitem__(self, token: str):
+        self.delete(token)
@@ -0,0 +1,186 @@
+"""
+Product data from the structured data embedded in product pages
+Reads schema.org Product/Offer objects from <script type="application/ld+json">
+blocks and, if there are none, the product of a Next.js __NEXT_DATA__ payload.
+The scripts are located with a regex and decoded with orjson when installed,
+so no HTML tree has to be built; recognize_products only falls back to its
+meta tag / class name / text heuristics for fields this doesn't find.
+"""
+
+import json
+import re
+from collections import deque
+from typing import Any, Iterator, List, Optional
+from urllib.parse import urljoin
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+JSON_LD = re.compile(r"""<script[^>]*\btype=["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""", re.I | re.S)
+NEXT_DATA = re.compile(r"""<script[^>]*\bid=["']?__NEXT_DATA__["']?[^>]*>(.*?)</script\s*>""", re.I | re.S)
+
+# Keys holding the amount in price objects of __NEXT_DATA__ payloads
+PRICE_AMOUNT_KEYS = ("amountInclusive", "amount", "value", "price")
+
+
+def _json_blocks(pattern: re.Pattern, html: str) -> Iterator[Any]:
+    for match in pattern.finditer(html):
+        try:
+            yield _loads(match.group(1).strip())
+        except ValueError:
+            # Broken blocks are skipped (both decoders raise ValueError subclasses)
+            continue
+
+
+def _is_type(node: dict, type_name: str) -> bool:
+    types = node.get("@type")
+    if isinstance(types, list):
+        return type_name in types
+    return types == type_name
+
+
+def _walk(data: Any) -> Iterator[dict]:
+    """Every dict in a JSON document, breadth first (the page's main product before nested ones)"""
+    queue = deque([data])
+    while queue:
+        node = queue.popleft()
+        if isinstance(node, dict):
+            yield node
+            queue.extend(node.values())
+        elif isinstance(node, list):
+            queue.extend(node)
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Amount of a price given as number or text ("64.90", "1'299.00", "CHF 17.95"), None if there is none"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # "64.90", "64,90", "1'299.00", "1.299,00", "1,299"
+        digits = re.sub(r"[^\d.,]", "", value)
+        comma = digits.rfind(",")
+        if comma > digits.rfind(".") and len(digits) - comma <= 3:
+            digits = digits.replace(".", "").replace(",", ".")
+        else:
+            digits = digits.replace(",", "")
+        try:
+            return float(digits)
+        except ValueError:
+            return None
+    return None
+
+
+def _image_urls(value: Any) -> List[str]:
+    """schema.org image: URL, ImageObject or a list of either"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        url = value.get("url") or value.get("contentUrl")
+        return [url] if isinstance(url, str) else []
+    if isinstance(value, list):
+        return [url for item in value for url in _image_urls(item)]
+    return []
+
+
+def _availability(value: Any) -> Optional[str]:
+    """"https://schema.org/InStock" -> "InStock" """
+    if isinstance(value, dict):
+        value = value.get("state") or value.get("status")
+    if not isinstance(value, str) or not value:
+        return None
+    return value.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _offer(offers: Any) -> dict:
+    """First offer with a price (Offer, AggregateOffer or a list of offers)"""
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if not isinstance(offer, dict):
+            continue
+        specification = offer.get("priceSpecification")
+        if isinstance(specification, list):
+            specification = specification[0] if specification else None
+        if not isinstance(specification, dict):
+            specification = {}
+        amounts = (offer.get("price"), offer.get("lowPrice"), specification.get("price"))
+        price = next((amount for amount in map(parse_amount, amounts) if amount is not None), None)
+        if price is not None:
+            return {
+                "price": price,
+                "currency": offer.get("priceCurrency") or specification.get("priceCurrency"),
+                "availability": _availability(offer.get("availability")),
+            }
+    return {}
+
+
+def _from_json_ld(html: str) -> Optional[dict]:
+    for block in _json_blocks(JSON_LD, html):
+        for node in _walk(block):
+            if not _is_type(node, "Product"):
+                continue
+            offer = _offer(node.get("offers"))
+            return {
+                "title": node.get("name") if isinstance(node.get("name"), str) else None,
+                "price": offer.get("price"),
+                "currency": offer.get("currency"),
+                "availability": offer.get("availability"),
+                "images": _image_urls(node.get("image")),
+            }
+    return None
+
+
+def _next_price(value: Any):
+    """(amount, currency) of a __NEXT_DATA__ price: a number or an object like {"amountInclusive", "currency"}"""
+    if isinstance(value, dict):
+        for key in PRICE_AMOUNT_KEYS:
+            amount = parse_amount(value.get(key))
+            if amount is not None:
+                return amount, value.get("currency")
+        return None, None
+    return parse_amount(value), None
+
+
+def _from_next_data(html: str) -> Optional[dict]:
+    """The first object with a name and a price in the page props (layout is not documented, so best effort)"""
+    for block in _json_blocks(NEXT_DATA, html):
+        props = block.get("props", {}).get("pageProps", block) if isinstance(block, dict) else block
+        for node in _walk(props):
+            if not isinstance(node.get("name"), str) or "price" not in node:
+                continue
+            price, currency = _next_price(node["price"])
+            if price is None:
+                continue
+            images = node.get("images") or node.get("image") or node.get("imageUrl")
+            return {
+                "title": node["name"],
+                "price": price,
+                "currency": currency or node.get("currency"),
+                "availability": _availability(node.get("availability")),
+                "images": _image_urls(images),
+            }
+    return None
+
+
+def extract_structured_product(html: str | bytes, base_url: str = "") -> Optional[dict]:
+    """
+    Product data from JSON-LD, or else __NEXT_DATA__
+
+    Args:
+        html: Page source
+        base_url: URL of the page, relative image URLs are resolved against it
+
+    Returns:
+        dict: {"title", "price" (float), "currency", "availability" (e.g. "InStock"), "images" (list)}
+              with None / [] for what the page doesn't say, or None without structured product data
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+
+    product = _from_json_ld(html) or _from_next_data(html)
+    if product:
+        product["images"] = [urljoin(base_url, url.strip()) for url in product["images"] if url.strip()]
+    return product
@@ -5,37 +5,35 @@ Handles generating and sending subscription reminder emails
 
 import os
 import re
-import sqlite3
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from .buy_schedule import SCHEDULE_COLUMNS, next_buy_dates, schedule_row
+from .db import get_pool
 from .emailer import send_email
 
 # Database path - will be set from main.py
 DB_PATH = None
+db = None
 
 def set_db_path(path: str):
-    """Set the database path"""
-    global DB_PATH
+    """Set the database path and attach to its shared connection pool"""
+    global DB_PATH, db
     DB_PATH = path
+    db = get_pool(path)
 
 def get_active_subscriptions(user_id: int) -> List[dict]:
     """Get all active subscriptions for a user"""
     if not DB_PATH:
         raise RuntimeError("Database path not set")
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
-        FROM subscriptions s
-        JOIN products p ON s.product_id = p.id
-        WHERE s.is_active = 1 AND s.user_id = ?
-        ORDER BY s.created_at DESC
-    """, (user_id,))
-    
-    rows = cursor.fetchall()
-    conn.close()
+    with db.connection() as conn:
+        rows = conn.execute("""
+            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
+            FROM subscriptions s
+            JOIN products p ON s.product_id = p.id
+            WHERE s.is_active = 1 AND s.user_id = ?
+            ORDER BY s.created_at DESC
+        """, (user_id,)).fetchall()
     
     subscriptions = []
     for row in rows:
@@ -51,62 +49,81 @@ def get_active_subscriptions(user_id: int) -> List[dict]:
         })
     return subscriptions
 
-def get_subscriptions_due_date(user_id: int, target_date: datetime) -> List[dict]:
-    """Get subscriptions for a user that are due on a specific date"""
-    if not DB_PATH:
-        raise RuntimeError("Database path not set")
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
-        FROM subscriptions s
-        JOIN products p ON s.product_id = p.id
-        WHERE s.is_active = 1 AND s.user_id = ?
-        ORDER BY s.created_at DESC
-    """, (user_id,))
+def get_subscriptions_due_by_user(target_date: datetime, user_id: Optional[int] = None) -> Dict[int, dict]:
+    """
+    Get all active subscriptions due on a specific date, grouped by user
     
-    rows = cursor.fetchall()
-    conn.close()
+    Uses the stored next_buy_date, so a single indexed query finds almost all
+    due rows. Rows whose stored date is missing or already passed (e.g. the
+    rollover job has not run yet) are recalculated in one batch.
     
-    from datetime import timedelta
+    Args:
+        target_date: Date to check for due subscriptions
+        user_id: Optional user ID to restrict the lookup to
     
-    def get_next_buy_date(created_at: datetime, frequency: int) -> datetime:
-        """Calculate next buy date for a subscription"""
-        days_since_creation = (datetime.now() - created_at).days
-        days_until_next = frequency - (days_since_creation % frequency)
-        next_buy_date = datetime.now() + timedelta(days=days_until_next)
-        return next_buy_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    Returns:
+        dict: {user_id: {"email": str, "subscriptions": [dict, ...]}}
+    """
+    if not DB_PATH:
+        raise RuntimeError("Database path not set")
     
-    subscriptions = []
-    target_date_normalized = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    target = target_date.strftime("%Y-%m-%d")
+    today = date.today()
     
+    query = f"""
+        SELECT u.id, u.email, s.id, s.product_id, p.name, p.url, p.image_url, p.price,
+               s.frequency, s.created_at, s.next_buy_date, {", ".join("s." + c for c in SCHEDULE_COLUMNS)}
+        FROM subscriptions s
+        JOIN users u ON u.id = s.user_id
+        JOIN products p ON p.id = s.product_id
+        WHERE s.is_active = 1
+          AND (s.next_buy_date = ? OR s.next_buy_date IS NULL OR s.next_buy_date <= ?)
+    """
+    params = [target, today.strftime("%Y-%m-%d")]
+    if user_id is not None:
+        query += " AND s.user_id = ?"
+        params.append(user_id)
+    query += " ORDER BY s.created_at DESC"
+    
+    with db.connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    
+    # Recalculate stale rows in one pass
+    stale = [row for row in rows if row[10] != target]
+    stale_dates = next_buy_dates(
+        (schedule_row(*row[11:], created_at=row[9]) for row in stale), today=today
+    )
+    recalculated = {row[2]: next_date for row, next_date in zip(stale, stale_dates)}
+    
+    due = {}
     for row in rows:
-        try:
-            created_at = datetime.fromisoformat(row[7]) if row[7] else datetime.now()
-            frequency = int(row[6]) if isinstance(row[6], (int, str)) and str(row[6]).isdigit() else None
-            
-            if frequency:
-                next_buy = get_next_buy_date(created_at, frequency)
-                
-                # Check if this subscription is due on the target date
-                if next_buy.date() == target_date_normalized.date():
-                    subscriptions.append({
-                        "id": row[0],
-                        "product_id": row[1],
-                        "product_name": row[2],
-                        "product_url": row[3],
-                        "product_image": row[4],
-                        "product_price": row[5],
-                        "frequency": row[6],
-                        "created_at": created_at
-                    })
-        except (ValueError, TypeError) as e:
-            print(f"Error processing subscription {row[0]}: {e}")
+        next_date = recalculated.get(row[2], row[10])
+        if next_date != target:
             continue
+        
+        try:
+            created_at = datetime.fromisoformat(row[9]) if row[9] else datetime.now()
+        except (ValueError, TypeError):
+            created_at = datetime.now()
+        
+        entry = due.setdefault(row[0], {"email": row[1], "subscriptions": []})
+        entry["subscriptions"].append({
+            "id": row[2],
+            "product_id": row[3],
+            "product_name": row[4],
+            "product_url": row[5],
+            "product_image": row[6],
+            "product_price": row[7],
+            "frequency": row[8],
+            "created_at": created_at
+        })
     
-    return subscriptions
+    return due
+
+def get_subscriptions_due_date(user_id: int, target_date: datetime) -> List[dict]:
+    """Get subscriptions for a user that are due on a specific date"""
+    due = get_subscriptions_due_by_user(target_date, user_id)
+    return due.get(user_id, {}).get("subscriptions", [])
 
 def generate_subscription_email_html(subscriptions: List[dict], base_url: str, template_path: str) -> str:
     """Generate HTML email from template with subscription data"""
@@ -172,7 +189,8 @@ def generate_subscription_email_html(subscriptions: List[dict], base_url: str, t
     
     return email_html
 
-def send_subscription_reminder_email(user_email: str, user_id: int, base_url: str, template_path: str, target_date: Optional[datetime] = None) -> dict:
+def send_subscription_reminder_email(user_email: str, user_id: int, base_url: str, template_path: str, target_date: Optional[datetime] = None,
+                                     subscriptions: Optional[List[dict]] = None) -> dict:
     """
     Send subscription reminder email to a user
     
@@ -182,16 +200,18 @@ def send_subscription_reminder_email(user_email: str, user_id: int, base_url: st
         base_url: Base URL for absolute links (e.g., http://localhost:8000)
         template_path: Path to email template file
         target_date: Optional specific date to check for subscriptions (defaults to all active subscriptions)
+        subscriptions: Optional pre-fetched subscriptions (e.g. from get_subscriptions_due_by_user)
     
     Returns:
         dict with success status and message
     """
     
     # Get subscriptions - either all active or only those due on target_date
-    if target_date:
-        subscriptions = get_subscriptions_due_date(user_id, target_date)
-    else:
-        subscriptions = get_active_subscriptions(user_id)
+    if subscriptions is None:
+        if target_date:
+            subscriptions = get_subscriptions_due_date(user_id, target_date)
+        else:
+            subscriptions = get_active_subscriptions(user_id)
     
     if not subscriptions:
         return {
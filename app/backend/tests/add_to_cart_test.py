@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from app.backend import add_to_cart
+from app.backend.add_to_cart import BLOCKED_URL_PATTERNS, add_product_to_cart, block_urls
+from app.backend.cart_engine import run_cart_jobs
+
+
+class FakeCdpDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+        return {}
+
+
+def test_block_urls_uses_cdp():
+    driver = FakeCdpDriver()
+    assert block_urls(driver)
+    assert driver.commands == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}),
+    ]
+
+
+def test_block_urls_without_cdp():
+    assert not block_urls(object())
+
+
+class LoggedOutPool:
+    def __init__(self):
+        self.pooled = SimpleNamespace(driver=object(), logged_in=False)
+
+    @contextmanager
+    def checkout(self):
+        yield self.pooled
+
+
+@pytest.mark.parametrize("login_works", [True, False])
+def test_single_product_retries_login(monkeypatch, login_works):
+    pool = LoggedOutPool()
+    logins = []
+    monkeypatch.setattr(add_to_cart, "get_driver_pool", lambda email, password: pool)
+    monkeypatch.setattr(add_to_cart, "ensure_logged_in",
+                        lambda driver, email, password, restore=True: logins.append(restore) or login_works)
+    monkeypatch.setattr(add_to_cart, "_add_product_with_driver", lambda driver, url: {"success": True, "url": url})
+
+    result = add_product_to_cart("https://www.galaxus.ch/de/product/a-1234567", "a@b.ch", "secret")
+
+    assert logins == [False]
+    assert pool.pooled.logged_in is login_works
+    assert result["success"] is login_works
+    if not login_works:
+        assert result["message"] == "Fehler: Login fehlgeschlagen"
+
+
+def test_missing_cart_button_is_not_retried(monkeypatch):
+    captured = []
+    monkeypatch.setattr(add_to_cart, "wait_for_ready_state", lambda driver, timeout: None)
+    monkeypatch.setattr(add_to_cart, "find_add_to_cart_button", lambda driver, url, timeout: (None, None))
+    monkeypatch.setattr(add_to_cart.debug_artifacts, "capture", lambda driver, job_id, step, **kwargs: captured.append(step))
+    driver = SimpleNamespace(get=lambda url: None)
+
+    outcomes = run_cart_jobs(["https://www.galaxus.ch/de/product/a-1234567"],
+                             lambda url: add_to_cart._add_product_by_url(driver, url), sleep=lambda seconds: None)
+
+    assert outcomes[0]["success"] is False
+    assert outcomes[0]["attempts"] == 1
+    assert captured == ["no_cart_button"]
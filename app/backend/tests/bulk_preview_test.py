@@ -0,0 +1,78 @@
+import threading
+import time
+
+from app.backend.bulk_preview import HostRateLimiter, dedupe_urls, preview_products, rate_limited
+
+PAMPERS = "https://www.galaxus.ch/de/s10/product/pampers-premium-protection-gr-5-monatsbox-152-stueck-windeln-23688428"
+LEGO = "https://www.galaxus.de/de/s5/product/lego-millennium-falcon-75192-lego-star-wars-lego-seltene-sets-lego-7238420"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_urls_are_grouped_by_product_id():
+    products, invalid = dedupe_urls([PAMPERS, LEGO, PAMPERS + "?utm_source=google", "https://example.com/x", ""])
+    assert products == {"23688428": [PAMPERS, PAMPERS + "?utm_source=google"], "7238420": [LEGO]}
+    assert invalid == ["https://example.com/x"]
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate_per_host():
+    clock = Clock()
+    limiter = HostRateLimiter(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        limiter.acquire("https://galaxus.ch/product/1")
+    limiter.acquire("digitec.ch")
+
+    assert clock.sleeps == [0.5, 0.5]
+    assert clock.now == 1.0
+
+
+def test_products_are_previewed_once_and_concurrently():
+    calls = []
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def get_preview(product_id):
+        nonlocal running, peak
+        with lock:
+            calls.append(product_id)
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        if product_id == "7238420":
+            raise ConnectionError("timeout")
+        return {"title": f"Produkt {product_id}", "image_url": None, "price": "9.90"}
+
+    urls = [PAMPERS, LEGO, PAMPERS, "https://www.galaxus.ch/de/product/x-1234567", "nope"]
+    results = {result["url"]: result for result in preview_products(urls, get_preview, concurrency=3)}
+
+    assert sorted(calls) == ["1234567", "23688428", "7238420"]
+    assert peak > 1
+    assert results[PAMPERS]["success"] and results[PAMPERS]["duplicates"] == [PAMPERS]
+    assert results[LEGO] == {"url": LEGO, "product_id": "7238420", "duplicates": [], "success": False, "error": "timeout"}
+    assert results["nope"]["error"] == "Keine Galaxus-Produkt-URL"
+
+
+def test_rate_limited_fetch_waits_for_the_limiter():
+    hosts = []
+
+    class RecordingLimiter:
+        def acquire(self, host):
+            hosts.append(host)
+
+    fetch = rate_limited(lambda product_id: {"title": product_id}, RecordingLimiter())
+    assert fetch("23688428") == {"title": "23688428"}
+    assert hosts == ["galaxus.ch"]
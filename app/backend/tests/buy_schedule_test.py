@@ -0,0 +1,137 @@
+import calendar
+from datetime import date, timedelta
+import pytest
+from dateutil.relativedelta import relativedelta
+from app.backend.buy_schedule import PRESET_MAP, next_buy_date, next_buy_dates, roll_over_next_buy_dates, schedule_row
+
+
+def reference_next_buy_date(start, unit, step, today, specific_day_type=None, weekday=None, monthday=None):
+    """Step forward one interval at a time, anchored on the start date"""
+    if start > today:
+        return start
+    k = 0
+    next_date = start
+    while next_date <= today:
+        k += 1
+        if unit == "days":
+            next_date = start + timedelta(days=k * step)
+        elif unit == "weeks":
+            next_date = start + timedelta(weeks=k * step)
+        elif unit == "months":
+            next_date = start + relativedelta(months=k * step)
+        else:
+            next_date = start + relativedelta(years=k * step)
+
+    if specific_day_type == "weekday":
+        next_date += timedelta(days=(weekday - next_date.weekday()) % 7)
+    elif specific_day_type == "monthday":
+        def set_day(d):
+            last_day = calendar.monthrange(d.year, d.month)[1]
+            return d.replace(day=last_day if monthday == -1 else min(monthday, last_day))
+        next_date = set_day(next_date)
+        if next_date <= today:
+            next_date = set_day(next_date + relativedelta(months=step if unit == "months" else 1))
+    return next_date
+
+
+TODAY = date(2025, 3, 15)
+STARTS = [date(2019, 1, 31), date(2020, 2, 29), date(2024, 12, 31), date(2025, 3, 14),
+          date(2025, 3, 15), date(2025, 2, 15), date(2023, 6, 1)]
+
+
+@pytest.mark.parametrize("preset", list(PRESET_MAP))
+@pytest.mark.parametrize("start", STARTS)
+def test_presets_match_reference(preset, start):
+    unit, step = PRESET_MAP[preset]
+    expected = reference_next_buy_date(start, unit, step, TODAY)
+    assert next_buy_date(start.isoformat(), "preset", frequency_preset=preset, today=TODAY) == expected.isoformat()
+
+
+@pytest.mark.parametrize("unit,german", [("days", "Tag(e)"), ("weeks", "wochen"), ("months", "Monat(e)"), ("years", "jahre")])
+@pytest.mark.parametrize("step", [1, 3, 10])
+@pytest.mark.parametrize("start", STARTS)
+def test_custom_units_match_reference(unit, german, step, start):
+    expected = reference_next_buy_date(start, unit, step, TODAY).isoformat()
+    assert next_buy_date(start.isoformat(), "custom", step, unit, today=TODAY) == expected
+    assert next_buy_date(start.isoformat(), "custom", step, german, today=TODAY) == expected
+
+
+@pytest.mark.parametrize("weekday", range(7))
+def test_weekday_constraint(weekday):
+    start = date(2024, 1, 10)
+    expected = reference_next_buy_date(start, "weeks", 2, TODAY, "weekday", weekday=weekday)
+    result = next_buy_date(start.isoformat(), "preset", specific_day_type="weekday", weekday=weekday,
+                           frequency_preset="alle 2 Wochen", today=TODAY)
+    assert result == expected.isoformat()
+
+
+@pytest.mark.parametrize("monthday", [-1, 1, 14, 15, 16, 31])
+@pytest.mark.parametrize("preset", ["täglich", "monatlich", "vierteljährlich"])
+def test_monthday_constraint(monthday, preset):
+    start = date(2024, 11, 20)
+    unit, step = PRESET_MAP[preset]
+    expected = reference_next_buy_date(start, unit, step, TODAY, "monthday", monthday=monthday)
+    result = next_buy_date(start.isoformat(), "preset", specific_day_type="monthday", monthday=monthday,
+                           frequency_preset=preset, today=TODAY)
+    assert result == expected.isoformat()
+
+
+def test_future_start_is_returned_unchanged():
+    assert next_buy_date("2030-01-01", "preset", frequency_preset="monatlich", today=TODAY) == "2030-01-01"
+
+
+def test_missing_or_invalid_start_counts_from_today():
+    assert next_buy_date(None, "preset", frequency_preset="wöchentlich", today=TODAY) == "2025-03-22"
+    assert next_buy_date("15.03.2025", "preset", frequency_preset="täglich", today=TODAY) == "2025-03-16"
+
+
+def test_unknown_or_invalid_frequency_defaults_to_daily():
+    assert next_buy_date("2025-01-01", "preset", frequency_preset="sometimes", today=TODAY) == "2025-03-16"
+    assert next_buy_date("2025-01-01", "custom", -3, "days", today=TODAY) == "2025-03-16"
+    assert next_buy_date("2025-01-01", None, today=TODAY) == "2025-03-16"
+
+
+def test_long_running_daily_subscription():
+    assert next_buy_date("1990-01-01", "preset", frequency_preset="täglich", today=TODAY) == "2025-03-16"
+
+
+def test_batch_matches_single_calls():
+    rows = [
+        ("2024-01-31", "preset", None, None, None, None, None, "monatlich"),
+        ("2020-02-29", "preset", None, None, None, None, None, "jährlich"),
+        ("2024-05-05", "custom", 10, "Tag(e)", None, None, None, "alle 10 Tage"),
+        ("2024-05-05", "custom", 2, "months", "monthday", None, -1, "alle 2 Monate"),
+        (None, "preset", None, None, "weekday", 0, None, "wöchentlich"),
+    ]
+    expected = [
+        next_buy_date(start, ftype, value, unit, day_type, weekday, monthday,
+                      frequency if ftype == "preset" else None, today=TODAY)
+        for start, ftype, value, unit, day_type, weekday, monthday, frequency in rows
+    ]
+    assert next_buy_dates(rows, today=TODAY) == expected
+
+
+def test_legacy_rows_are_mapped_to_day_intervals():
+    legacy = schedule_row(None, None, None, None, None, None, None, "7", created_at="2025-03-01T08:30:00")
+    assert legacy == ("2025-03-01", "custom", 7, "days", None, None, None, "7")
+    assert next_buy_dates([legacy], today=TODAY) == ["2025-03-22"]
+    # Presets and custom rows are left alone
+    preset = ("2025-03-01", "preset", None, None, None, None, None, "monatlich")
+    assert schedule_row(*preset, created_at="2024-01-01") == preset
+
+
+def test_rollover_advances_passed_dates_only(pool):
+    with pool.connection() as conn:
+        conn.executemany("""
+            INSERT INTO subscriptions (id, product_id, frequency, is_active, created_at, start_date, frequency_type, next_buy_date)
+            VALUES (?, 1, ?, 1, ?, ?, ?, ?)
+        """, [
+            (1, "7", "2025-03-01T08:30:00", None, None, None),  # legacy, every 7 days
+            (2, "wöchentlich", "2025-03-01", "2025-03-01", "preset", "2025-03-15"),
+            (3, "monatlich", "2025-03-01", "2025-03-01", "preset", "2025-04-01"),
+        ])
+
+    assert roll_over_next_buy_dates(pool, today=TODAY) == 2
+    with pool.connection() as conn:
+        dates = dict(conn.execute("SELECT id, next_buy_date FROM subscriptions"))
+    assert dates == {1: "2025-03-22", 2: "2025-03-22", 3: "2025-04-01"}
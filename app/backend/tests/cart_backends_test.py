@@ -0,0 +1,129 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.backend.cart_backends import CartBackend, CartBackendError, FallbackCartBackend, HttpCartBackend
+
+PRODUCT_URL = "https://www.galaxus.ch/de/s1/product/some-product-12345678"
+
+
+class StandInCartHandler(BaseHTTPRequestHandler):
+    """Mimics the shop's add-to-cart endpoint: needs the auth cookie, counts added products"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/cart/add":
+            self.send_response(404)
+        elif "auth=valid" not in (self.headers.get("Cookie") or ""):
+            self.send_response(302)
+            self.send_header("Location", "https://id.digitecgalaxus.ch/login")
+        else:
+            self.server.cart.append(body["productId"])
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInCartHandler)
+    server.cart = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def backend_for(shop, cookie_value="valid"):
+    snapshot = {"cookies": [{"name": "auth", "value": cookie_value, "domain": "127.0.0.1", "path": "/"}]}
+    return HttpCartBackend(
+        endpoint="/api/cart/add",
+        origin=f"http://127.0.0.1:{shop.server_address[1]}",
+        snapshot_loader=lambda email, password: snapshot,
+    )
+
+
+def test_http_backend_adds_products_with_session_cookies(shop):
+    backend = backend_for(shop)
+    result = backend.add_product(PRODUCT_URL, "me@example.com", "pw")
+    assert result["success"]
+    assert shop.cart == [12345678]
+
+    result = backend.add_products([PRODUCT_URL, PRODUCT_URL.replace("12345678", "87654321")], "me@example.com", "pw")
+    assert result["added"] == 2
+    assert sorted(shop.cart) == [12345678, 12345678, 87654321]
+
+
+def test_http_backend_rejects_expired_session(shop):
+    with pytest.raises(CartBackendError):
+        backend_for(shop, cookie_value="expired").add_product(PRODUCT_URL, "me@example.com", "pw")
+    assert shop.cart == []
+
+
+def test_http_backend_is_off_without_endpoint():
+    assert not HttpCartBackend(endpoint="").available("me@example.com", "pw")
+
+
+class RecordingBackend(CartBackend):
+    name = "recording"
+
+    def __init__(self):
+        self.urls = []
+
+    def add_product(self, product_url, email=None, password=None):
+        self.urls.append(product_url)
+        return {"success": True, "message": "ok", "cart_url": None}
+
+    def add_products(self, product_urls, email=None, password=None, on_progress=None):
+        self.urls += product_urls
+        return {
+            "success": True, "added": len(product_urls), "failed": 0, "message": "ok", "cart_url": None,
+            "results": [{"url": url, "success": True} for url in product_urls],
+        }
+
+
+def test_fallback_only_gets_what_the_fast_path_could_not_add(shop):
+    fallback = RecordingBackend()
+    backend = FallbackCartBackend(backend_for(shop), fallback)
+    digitec_url = "https://www.digitec.ch/de/s1/product/other-23456789"
+
+    result = backend.add_products([PRODUCT_URL, digitec_url], "me@example.com", "pw")
+
+    assert result["added"] == 2
+    assert shop.cart == [12345678]
+    assert fallback.urls == [digitec_url]
+
+
+def test_fallback_for_single_product_when_session_expired(shop):
+    fallback = RecordingBackend()
+    backend = FallbackCartBackend(backend_for(shop, cookie_value="expired"), fallback)
+
+    assert backend.add_product(PRODUCT_URL, "me@example.com", "pw")["success"]
+    assert fallback.urls == [PRODUCT_URL]
+
+
+def test_fallback_reports_progress_without_premature_failures(shop):
+    events = []
+    backend = FallbackCartBackend(backend_for(shop), RecordingBackend())
+    digitec_url = "https://www.digitec.ch/de/s1/product/other-23456789"
+
+    backend.add_products([PRODUCT_URL, digitec_url], "me@example.com", "pw",
+                         on_progress=lambda event, data: events.append((event, data["url"])))
+
+    # The fast path misses the digitec product, but it is handed to the fallback instead of failing
+    assert ("added", PRODUCT_URL) in events
+    assert not [event for event in events if event[0] == "failed"]
+
+
+def test_backends_must_implement_both_methods():
+    class SingleOnly(CartBackend):
+        def add_product(self, product_url, email=None, password=None):
+            return {"success": True}
+
+    with pytest.raises(TypeError):
+        SingleOnly()
@@ -0,0 +1,98 @@
+import threading
+import time
+from app.backend.cart_engine import CartLoginError, TransientCartError, merge_outcomes, progress_callbacks, run_cart_jobs
+
+
+def no_sleep(seconds):
+    pass
+
+
+def test_jobs_run_concurrently_up_to_the_limit_and_keep_order():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job(url):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {"cart_count": int(url[-1])}
+
+    urls = [f"https://www.galaxus.ch/p-{i}" for i in range(6)]
+    start = time.monotonic()
+    outcomes = run_cart_jobs(urls, job, concurrency=3)
+
+    assert peak == 3
+    assert time.monotonic() - start < 0.25
+    assert [outcome["url"] for outcome in outcomes] == urls
+    assert [outcome["cart_count"] for outcome in outcomes] == list(range(6))
+
+
+def test_transient_failures_are_retried():
+    calls = {}
+
+    def job(url):
+        calls[url] = calls.get(url, 0) + 1
+        if calls[url] < 3:
+            raise TransientCartError("timeout")
+        return {}
+
+    outcomes = run_cart_jobs(["a"], job, retries=2, sleep=no_sleep)
+    assert outcomes[0]["success"]
+    assert outcomes[0]["attempts"] == 3
+
+
+def test_permanent_failures_are_not_retried():
+    calls = []
+
+    def job(url):
+        calls.append(url)
+        raise ValueError("broken page")
+
+    outcomes = run_cart_jobs(["a"], job, retries=2, sleep=no_sleep)
+    assert calls == ["a"]
+    assert not outcomes[0]["success"]
+    assert outcomes[0]["message"] == "broken page"
+
+
+def test_progress_is_reported_per_product():
+    events = []
+    on_start, on_result = progress_callbacks(lambda event, data: events.append((event, data["url"])))
+
+    def job(url):
+        if url == "b":
+            raise ValueError("sold out")
+        return {}
+
+    outcomes = run_cart_jobs(["a", "b"], job, concurrency=1, on_start=on_start, on_result=on_result)
+    assert events == [("started", "a"), ("added", "a"), ("started", "b"), ("failed", "b")]
+    assert all(outcome["seconds"] >= 0 for outcome in outcomes)
+    assert progress_callbacks(None) == (None, None)
+
+
+def test_merge_outcomes():
+    outcomes = [
+        {"url": "a", "success": True},
+        {"url": "b", "success": False},
+        {"url": "c", "success": True},
+    ]
+    result = merge_outcomes(outcomes, cart_url="https://cart")
+    assert result["added"] == 2
+    assert result["failed"] == 1
+    assert result["success"]
+    assert result["message"] == "2 Produkt(e) hinzugefügt, 1 fehlgeschlagen"
+    assert result["results"] == outcomes
+
+
+def test_merge_outcomes_reports_login_failure():
+    def job(url):
+        raise CartLoginError("Login fehlgeschlagen")
+
+    result = merge_outcomes(run_cart_jobs(["a", "b"], job, concurrency=2), cart_url="https://cart")
+    assert result["message"] == "Login fehlgeschlagen"
+    assert result["failed"] == 2
+    assert result["cart_url"] is None
@@ -0,0 +1,123 @@
+import time
+from app.backend.cart_jobs import (
+    claim_next_job,
+    complete_job,
+    enqueue_job,
+    add_job_event,
+    fail_job,
+    get_job,
+    get_job_events,
+    get_recent_jobs,
+    iter_job_events,
+    prune_job_events,
+    queue_position,
+    requeue_stale_jobs,
+)
+from app.cart_worker import process_job
+
+URLS = ["https://www.galaxus.ch/de/product/a-1234567", "https://www.galaxus.ch/de/product/b-7654321"]
+
+
+def test_jobs_are_claimed_once_in_order(pool):
+    first = enqueue_job(pool, 1, URLS[:1], "single")
+    second = enqueue_job(pool, 1, URLS)
+    assert queue_position(pool, second) == 1
+
+    job = claim_next_job(pool, "worker-a")
+    assert job["id"] == first
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["product_urls"] == URLS[:1]
+
+    assert claim_next_job(pool, "worker-b")["id"] == second
+    assert claim_next_job(pool, "worker-a") is None
+
+
+def test_complete_job_stores_result(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    claim_next_job(pool, "worker")
+    complete_job(pool, job_id, {"success": True, "added": 2, "failed": 0})
+
+    job = get_job(pool, job_id, user_id=1)
+    assert job["status"] == "done"
+    assert job["result"]["added"] == 2
+    assert get_job(pool, job_id, user_id=2) is None
+    assert [job["id"] for job in get_recent_jobs(pool, 1)] == [job_id]
+
+
+def test_failed_jobs_are_retried_until_max_attempts(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    for _ in range(2):
+        claim_next_job(pool, "worker")
+        fail_job(pool, job_id, "browser crashed", max_attempts=2)
+    job = get_job(pool, job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == "browser crashed"
+
+
+def test_jobs_of_dead_workers_are_requeued(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    claim_next_job(pool, "worker")
+
+    assert requeue_stale_jobs(pool, timeout=60) == 0
+    with pool.connection() as conn:
+        conn.execute("UPDATE cart_jobs SET heartbeat_at = ?", (time.time() - 120,))
+    assert requeue_stale_jobs(pool, timeout=60) == 1
+    assert get_job(pool, job_id)["status"] == "queued"
+    assert get_job(pool, job_id)["finished_at"] is None
+
+    # Out of attempts: given up on like any other failed job
+    claim_next_job(pool, "worker")
+    with pool.connection() as conn:
+        conn.execute("UPDATE cart_jobs SET heartbeat_at = ?", (time.time() - 120,))
+    assert requeue_stale_jobs(pool, timeout=60, max_attempts=2) == 1
+    job = get_job(pool, job_id)
+    assert job["status"] == "failed" and job["finished_at"] is not None
+
+
+class FakeBackend:
+    def add_product(self, url, email=None, password=None):
+        return {"success": True, "message": "ok", "cart_url": "https://cart"}
+
+    def add_products(self, urls, email=None, password=None, on_progress=None):
+        for url in urls:
+            on_progress("started", {"url": url})
+            on_progress("added", {"url": url, "success": True, "seconds": 0.1})
+        return {"success": True, "added": len(urls), "failed": 0, "message": "ok", "cart_url": "https://cart"}
+
+
+def test_worker_processes_job(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    result = process_job(pool, claim_next_job(pool, "worker"), backend=FakeBackend())
+
+    assert result["added"] == 2
+    assert get_job(pool, job_id)["status"] == "done"
+    assert [event["event"] for event in get_job_events(pool, job_id)] == ["started", "added", "started", "added"]
+
+
+def test_events_are_read_incrementally_and_pruned(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    first = add_job_event(pool, job_id, "started", {"url": URLS[0]})
+    add_job_event(pool, job_id, "added", {"url": URLS[0], "seconds": 1.5})
+
+    events = get_job_events(pool, job_id, after_id=first)
+    assert [(event["event"], event["data"]["seconds"]) for event in events] == [("added", 1.5)]
+
+    assert prune_job_events(pool, max_age=3600) == 0
+    assert prune_job_events(pool, max_age=-1) == 2
+    assert get_job_events(pool, job_id) == []
+
+
+def test_all_events_of_a_finished_job_are_read(pool):
+    job_id = enqueue_job(pool, 1, URLS)
+    claim_next_job(pool, "worker-a")
+    first = add_job_event(pool, job_id, "started", {"url": URLS[0]})
+    for i in range(249):
+        add_job_event(pool, job_id, "added", {"url": URLS[0], "i": i})
+    complete_job(pool, job_id, {"added": 250})
+
+    pages = list(iter_job_events(pool, job_id, page_size=100))
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert [event["id"] for page in pages for event in page] == list(range(first, first + 250))
+    assert [len(page) for page in iter_job_events(pool, job_id, after_id=first + 199)] == [50]
@@ -0,0 +1,100 @@
+from app.backend.cart_selectors import ADD_TO_CART_SELECTORS, SelectorStats, find_add_to_cart_button, selector_label
+
+DOMAIN = "www.galaxus.ch"
+
+
+class FakeDriver:
+    """Answers the selector script with the first selector whose label is on the page"""
+
+    def __init__(self, present=(), scored=None):
+        self.present = set(present)
+        self.scored = scored
+        self.scripts = 0
+
+    def execute_script(self, script, *args):
+        self.scripts += 1
+        if "querySelectorAll" in script:
+            return self.scored
+        for index, selector in enumerate(args[0]):
+            if selector_label(tuple(selector)) in self.present:
+                return [index, f"element:{selector_label(tuple(selector))}"]
+        return None
+
+
+def test_unseen_selectors_keep_default_order():
+    stats = SelectorStats()
+    assert stats.ranked(DOMAIN, ADD_TO_CART_SELECTORS) == ADD_TO_CART_SELECTORS
+
+
+def test_winners_are_ranked_first_per_domain():
+    stats = SelectorStats()
+    winner = ADD_TO_CART_SELECTORS[4]
+    for _ in range(3):
+        stats.record(DOMAIN, ADD_TO_CART_SELECTORS[0], hit=False)
+        stats.record(DOMAIN, winner, hit=True)
+
+    assert stats.ranked(DOMAIN, ADD_TO_CART_SELECTORS)[0] == winner
+    assert stats.ranked(DOMAIN, ADD_TO_CART_SELECTORS)[-1] == ADD_TO_CART_SELECTORS[0]
+    assert stats.ranked("www.digitec.ch", ADD_TO_CART_SELECTORS) == ADD_TO_CART_SELECTORS
+
+
+def test_stats_are_persisted(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = SelectorStats(str(path))
+    stats.record(DOMAIN, ADD_TO_CART_SELECTORS[2], hit=True)
+    stats.save()
+
+    reloaded = SelectorStats(str(path))
+    assert reloaded.snapshot(DOMAIN) == {selector_label(ADD_TO_CART_SELECTORS[2]): (1, 0)}
+
+
+def test_find_button_checks_all_selectors_in_one_script_and_learns():
+    stats = SelectorStats()
+    label = selector_label(ADD_TO_CART_SELECTORS[3])
+    driver = FakeDriver(present=[label])
+
+    element, matched_by = find_add_to_cart_button(driver, f"https://{DOMAIN}/de/p-1", timeout=1, stats=stats)
+    assert element == f"element:{label}"
+    assert matched_by == label
+    assert driver.scripts == 1
+    assert stats.ranked(DOMAIN, ADD_TO_CART_SELECTORS)[0] == ADD_TO_CART_SELECTORS[3]
+
+
+def test_find_button_falls_back_to_scoring():
+    stats = SelectorStats()
+    driver = FakeDriver(scored=[10, "element:scored", "text='in den warenkorb'"])
+    element, matched_by = find_add_to_cart_button(driver, f"https://{DOMAIN}/de/p-1", timeout=0.2, stats=stats)
+    assert element == "element:scored"
+    assert matched_by.startswith("scored 10")
+
+    low_score = FakeDriver(scored=[2, "element:other", ""])
+    assert find_add_to_cart_button(low_score, f"https://{DOMAIN}/de/p-1", timeout=0.2, stats=stats) == (None, None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lookups_save_on_a_debounce(tmp_path):
+    path = tmp_path / "stats.json"
+    clock = Clock()
+    stats = SelectorStats(str(path), save_interval=60, clock=clock)
+    label = selector_label(ADD_TO_CART_SELECTORS[0])
+    driver = FakeDriver(present=[label])
+
+    find_add_to_cart_button(driver, f"https://{DOMAIN}/de/p-1", timeout=1, stats=stats)
+    assert not path.exists()
+
+    clock.now += 60
+    find_add_to_cart_button(driver, f"https://{DOMAIN}/de/p-2", timeout=1, stats=stats)
+    assert SelectorStats(str(path)).snapshot(DOMAIN) == {label: (2, 0)}
+
+    # Shutdown writes what the debounce held back
+    find_add_to_cart_button(driver, f"https://{DOMAIN}/de/p-3", timeout=1, stats=stats)
+    stats.save()
+    assert SelectorStats(str(path)).snapshot(DOMAIN) == {label: (3, 0)}
+    assert [p.name for p in tmp_path.iterdir()] == ["stats.json"]
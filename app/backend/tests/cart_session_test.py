@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+from app.backend import cart_session
+from app.backend.cart_session import read_snapshot, restore_session, save_session, session_path, write_snapshot
+
+
+class FakeDriver:
+    def __init__(self, url="https://www.galaxus.ch/de", cookies=None, local_storage=None):
+        self.current_url = url
+        self.cookies = cookies or []
+        self.local_storage = local_storage or {}
+        self.visited = []
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get(self, url):
+        self.visited.append(url)
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        if args:
+            self.local_storage.update(args[0])
+            return None
+        return dict(self.local_storage)
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cart_session, "SESSION_DIR", tmp_path)
+    monkeypatch.delenv("CART_SESSION_KEY", raising=False)
+    return tmp_path
+
+
+def test_snapshot_is_encrypted_and_round_trips():
+    driver = FakeDriver(
+        cookies=[{"name": "auth", "value": "secret-token", "domain": ".galaxus.ch", "path": "/"}],
+        local_storage={"cartId": "42"},
+    )
+    assert save_session(driver, "me@example.com", "pw")
+
+    assert b"secret-token" not in session_path("me@example.com").read_bytes()
+    snapshot = read_snapshot("me@example.com", "pw")
+    assert snapshot["origin"] == "https://www.galaxus.ch"
+    assert snapshot["cookies"][0]["value"] == "secret-token"
+    assert snapshot["local_storage"] == {"cartId": "42"}
+
+
+def test_snapshot_with_wrong_key_is_discarded():
+    save_session(FakeDriver(cookies=[{"name": "a", "value": "b", "domain": "www.galaxus.ch"}]), "me@example.com", "pw")
+
+    assert read_snapshot("me@example.com", "other") is None
+    assert not session_path("me@example.com").exists()
+
+
+def test_concurrent_writers_leave_a_complete_snapshot(session_dir):
+    writers = [
+        threading.Thread(target=write_snapshot, args=("me@example.com", "pw", {"cookies": [], "writer": i}))
+        for i in range(8)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert read_snapshot("me@example.com", "pw")["writer"] in range(8)
+    assert [path.name for path in session_dir.iterdir()] == [session_path("me@example.com").name]
+
+
+def test_restore_hydrates_cookies_of_the_origin_and_local_storage():
+    save_session(FakeDriver(
+        cookies=[
+            {"name": "auth", "value": "1", "domain": ".galaxus.ch", "path": "/", "expiry": 1.9e9, "sameSite": "Lax"},
+            {"name": "other", "value": "2", "domain": "id.digitecgalaxus.ch", "path": "/"},
+        ],
+        local_storage={"cartId": "42"},
+    ), "me@example.com", "pw")
+
+    driver = FakeDriver(url="data:,")
+    assert restore_session(driver, "me@example.com", "pw")
+    assert driver.visited == ["https://www.galaxus.ch/robots.txt"]
+    assert [cookie["name"] for cookie in driver.cookies] == ["auth"]
+    assert driver.cookies[0]["expiry"] == 1900000000
+    assert driver.local_storage == {"cartId": "42"}
+
+
+def test_restore_without_snapshot():
+    assert not restore_session(FakeDriver(), "nobody@example.com", "pw")
@@ -0,0 +1,59 @@
+from app.backend.cart_waits import LatencyBudget, parse_cart_count, wait_for_cart_change
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCartButton:
+    def __init__(self, labels):
+        self.labels = labels
+
+    def get_attribute(self, name):
+        return self.labels.pop(0) if len(self.labels) > 1 else self.labels[0]
+
+
+class FakeDriver:
+    def __init__(self, labels):
+        self.button = FakeCartButton(labels)
+
+    def find_element(self, by, value):
+        return self.button
+
+
+def test_parse_cart_count():
+    assert parse_cart_count("Keine Produkte im Warenkorb") == 0
+    assert parse_cart_count("Warenkorb, 3 Produkte") == 3
+    assert parse_cart_count("Warenkorb") is None
+    assert parse_cart_count(None) is None
+
+
+def test_budget_caps_step_timeouts_and_logs_steps():
+    clock = FakeClock()
+    budget = LatencyBudget(10, label="job", clock=clock)
+
+    with budget.step("page load"):
+        clock.now = 7.5
+    assert budget.timeout(5) == 2.5
+    assert budget.timeout(1) == 1
+
+    with budget.step("cart update"):
+        clock.now = 12
+    assert budget.remaining() == 0
+    assert budget.timeout(5) == 0
+    assert [name for name, _ in budget.steps] == ["page load", "cart update"]
+    assert budget.summary().startswith("job: page load 7.50s, cart update 4.50s")
+
+
+def test_wait_for_cart_change_returns_new_count():
+    driver = FakeDriver(["Keine Produkte", "Keine Produkte", "Warenkorb, 1 Produkt"])
+    assert wait_for_cart_change(driver, 0, timeout=2) == 1
+
+
+def test_wait_for_cart_change_times_out():
+    driver = FakeDriver(["Warenkorb, 2 Produkte"])
+    assert wait_for_cart_change(driver, 2, timeout=0.2) is None
@@ -0,0 +1,12 @@
+import pytest
+from app.backend.db import ConnectionPool
+from app.backend.migrations import migrate
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"), size=2)
+    with pool.connection() as conn:
+        migrate(conn)
+    yield pool
+    pool.close()
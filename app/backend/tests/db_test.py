@@ -0,0 +1,56 @@
+import threading
+import pytest
+from app.backend.db import get_pool
+
+
+def test_connections_are_configured(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # NORMAL == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+
+
+def test_commit_and_rollback(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (v INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise ValueError("boom")
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT v FROM t").fetchall() == [(1,)]
+
+
+def test_pool_is_bounded_across_threads(pool):
+    seen = set()
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            with pool.connection() as conn:
+                conn.execute("SELECT 1").fetchone()
+                with lock:
+                    seen.add(id(conn))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) <= pool.size
+
+
+def test_get_pool_is_shared_per_path(tmp_path):
+    path = str(tmp_path / "shared.db")
+    assert get_pool(path) is get_pool(path)
@@ -0,0 +1,73 @@
+import gzip
+import json
+import os
+import threading
+from app.backend import debug_artifacts
+from app.backend.debug_artifacts import capture, evict, flush, should_capture
+
+
+class FakeDriver:
+    current_url = "https://www.galaxus.ch/de/p-1"
+    title = "Product"
+    page_source = "<html><body>" + "x" * 1000 + "</body></html>"
+
+    def get_screenshot_as_png(self):
+        return b"\x89PNG fake"
+
+
+def test_should_capture_modes():
+    assert not should_capture(False, mode="off")
+    assert should_capture(False, mode="failure")
+    assert not should_capture(True, mode="failure")
+    assert should_capture(True, mode="always")
+    assert should_capture(True, mode="sample", sample_rate=0.1, rng=lambda: 0.05)
+    assert not should_capture(True, mode="sample", sample_rate=0.1, rng=lambda: 0.5)
+
+
+def test_capture_writes_compressed_artifacts_per_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_artifacts, "ARTIFACTS_DIR", tmp_path)
+    monkeypatch.setattr(debug_artifacts, "CAPTURE_MODE", "failure")
+
+    assert capture(FakeDriver(), "job-1", "after_click", success=True) is None
+    job_dir = capture(FakeDriver(), "job-1", "no_cart_button", success=False, selector="id=x")
+    flush()
+
+    assert job_dir == tmp_path / "job-1"
+    assert (job_dir / "no_cart_button.png").read_bytes() == b"\x89PNG fake"
+    with gzip.open(job_dir / "no_cart_button.html.gz", "rt", encoding="utf-8") as f:
+        assert f.read() == FakeDriver.page_source
+    metadata = json.loads((job_dir / "no_cart_button.json").read_text())
+    assert metadata["url"] == FakeDriver.current_url
+    assert metadata["selector"] == "id=x"
+
+
+def make_job(root, name, size, mtime):
+    job = root / name
+    job.mkdir()
+    (job / "data").write_bytes(b"x" * size)
+    os.utime(job, (mtime, mtime))
+    return job
+
+
+def test_evict_by_age_and_total_size(tmp_path):
+    now = 1_000_000
+    old = make_job(tmp_path, "old", 10, now - 10 * 86400)
+    older_recent = make_job(tmp_path, "a", 100, now - 300)
+    newest = make_job(tmp_path, "b", 100, now - 100)
+
+    removed = evict(tmp_path, max_total_bytes=150, max_age=86400, now=now)
+
+    assert removed == 2
+    assert not old.exists()
+    assert not older_recent.exists()
+    assert newest.exists()
+
+
+def test_flush_gives_up_after_timeout():
+    release = threading.Event()
+    debug_artifacts._writer.submit(release.wait)
+    try:
+        assert flush(timeout=0.01) is False
+    finally:
+        release.set()
+    assert flush() is True
@@ -0,0 +1,121 @@
+import threading
+import pytest
+from app.backend.driver_pool import DriverPool, DriverPoolTimeout
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("invalid session id")
+        return "complete"
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeFactory:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self):
+        driver = FakeDriver(len(self.created))
+        self.created.append(driver)
+        return driver
+
+
+def test_drivers_are_reused_and_logged_in_once():
+    factory = FakeFactory()
+    logins = []
+    pool = DriverPool(factory, login=lambda d: logins.append(d) or True, size=2)
+
+    with pool.checkout() as first:
+        assert first.logged_in
+    with pool.checkout() as second:
+        assert second.driver is first.driver
+
+    assert len(factory.created) == 1
+    assert len(logins) == 1
+
+
+def test_driver_is_recycled_after_max_uses():
+    factory = FakeFactory()
+    pool = DriverPool(factory, size=1, max_uses=2)
+
+    for _ in range(2):
+        with pool.checkout():
+            pass
+    old = factory.created[0]
+    assert old.quit_called
+
+    with pool.checkout() as pooled:
+        assert pooled.driver is not old
+
+
+def test_crashed_driver_is_replaced_on_checkout():
+    factory = FakeFactory()
+    pool = DriverPool(factory, size=1)
+
+    with pool.checkout() as pooled:
+        crashed = pooled.driver
+    crashed.alive = False
+
+    with pool.checkout() as pooled:
+        assert pooled.driver is not crashed
+        assert pooled.driver.alive
+    assert crashed.quit_called
+
+
+def test_failing_job_with_dead_driver_frees_its_slot():
+    factory = FakeFactory()
+    pool = DriverPool(factory, size=1)
+
+    with pytest.raises(RuntimeError):
+        with pool.checkout() as pooled:
+            pooled.driver.alive = False
+            raise RuntimeError("browser crashed")
+
+    assert factory.created[0].quit_called
+    with pool.checkout() as pooled:
+        assert pooled.driver.alive
+
+
+def test_checkout_waits_for_a_free_driver_and_times_out():
+    pool = DriverPool(FakeFactory(), size=1, checkout_timeout=0.05)
+
+    with pool.checkout():
+        with pytest.raises(DriverPoolTimeout):
+            with pool.checkout():
+                pass
+
+    released = threading.Event()
+
+    def hold():
+        with pool.checkout():
+            released.wait(1)
+
+    pool.checkout_timeout = 2
+    holder = threading.Thread(target=hold)
+    holder.start()
+    threading.Timer(0.05, released.set).start()
+    with pool.checkout() as pooled:
+        assert pooled.driver.alive
+    holder.join()
+
+
+def test_warm_and_close():
+    factory = FakeFactory()
+    pool = DriverPool(factory, size=3)
+
+    assert pool.warm() == 3
+    assert pool.stats() == {"size": 3, "created": 3, "idle": 3}
+
+    pool.close()
+    assert all(driver.quit_called for driver in factory.created)
+    with pytest.raises(RuntimeError):
+        with pool.checkout():
+            pass
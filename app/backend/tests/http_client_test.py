@@ -0,0 +1,75 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.backend.http_client import make_session
+
+PAGE = b"<html><head><meta property='og:title' content='Windeln'></head></html>"
+
+
+class StandInShopHandler(BaseHTTPRequestHandler):
+    """Keep-alive server: /flaky fails once with 503, every response is gzipped if asked for"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == "/flaky" and self.server.requests.count("/flaky") == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = PAGE
+        self.send_response(200)
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInShopHandler)
+    server.connections = 0
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection_and_are_decompressed(shop):
+    url, server = shop
+    session = make_session()
+
+    for _ in range(3):
+        response = session.get(f"{url}/product", timeout=5)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.content == PAGE
+    session.close()
+
+    assert server.connections == 1
+    assert "Mozilla" in session.headers["User-Agent"]
+
+
+def test_server_errors_are_retried(shop):
+    url, server = shop
+    session = make_session(retries=2, backoff=0)
+
+    response = session.get(f"{url}/flaky", timeout=5)
+    session.close()
+
+    assert response.status_code == 200
+    assert server.requests == ["/flaky", "/flaky"]
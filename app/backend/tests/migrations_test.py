@@ -0,0 +1,80 @@
+import sqlite3
+import pytest
+from app.backend.migrations import LATEST_VERSION, get_schema_version, migrate
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    yield conn
+    conn.close()
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_fresh_database_is_migrated_to_latest(conn):
+    assert migrate(conn) == LATEST_VERSION
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert {"idx_subscriptions_user_active_created", "idx_subscriptions_next_buy_active",
+            "idx_subscriptions_product_active", "idx_products_user_added",
+            "idx_users_email", "idx_verification_codes_user_code"} <= index_names(conn)
+
+
+def test_migrate_is_idempotent(conn):
+    migrate(conn)
+    conn.execute("INSERT INTO users (username, email, hashed_password) VALUES ('a', 'a@b.ch', 'x')")
+    conn.commit()
+    assert migrate(conn) == LATEST_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+
+
+def test_migrate_stops_at_target(conn):
+    assert migrate(conn, target=1) == 1
+    assert "idx_subscriptions_user_active_created" not in index_names(conn)
+
+
+def test_legacy_database_gets_missing_columns(conn):
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, hashed_password TEXT)")
+    conn.execute("INSERT INTO users (username, hashed_password) VALUES ('bob', 'x')")
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, url TEXT, name TEXT, added_at TEXT, user_id INTEGER)")
+    conn.execute("CREATE TABLE subscriptions (id INTEGER PRIMARY KEY, product_id INTEGER, frequency TEXT, "
+                 "is_active BOOLEAN, created_at TEXT, user_id INTEGER)")
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("SELECT email, two_factor_enabled FROM users").fetchone() == ("bob@example.com", 0)
+    product_columns = [col[1] for col in conn.execute("PRAGMA table_info(products)")]
+    assert {"image_url", "price"} <= set(product_columns)
+    subscription_columns = [col[1] for col in conn.execute("PRAGMA table_info(subscriptions)")]
+    assert {"start_date", "next_buy_date", "monthday"} <= set(subscription_columns)
+
+
+def test_hot_queries_use_indexes(conn):
+    migrate(conn)
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM subscriptions WHERE next_buy_date = ? AND is_active = 1", ("2025-01-01",)
+    ))
+    assert "idx_subscriptions_next_buy_active" in plan
+
+
+def test_migration_applied_by_another_process_is_skipped(conn, tmp_path, monkeypatch):
+    from app.backend import migrations
+
+    applied = []
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(1, "counted", applied.append)])
+    migrate(conn, target=1)
+
+    # The other process read the version before this one had migrated
+    stale_reads = [0]
+    read_version = migrations.get_schema_version
+    monkeypatch.setattr(migrations, "get_schema_version",
+                        lambda c: stale_reads.pop() if stale_reads else read_version(c))
+    other = sqlite3.connect(str(tmp_path / "test.db"))
+    try:
+        assert migrate(other, target=1) == 1
+    finally:
+        other.close()
+    assert len(applied) == 1
@@ -0,0 +1,153 @@
+from pathlib import Path
+
+import pytest
+from app.backend import price_refresher
+from app.backend.price_refresher import fetch_price, get_price_history, refresh_prices, same_price, select_due_products
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAMPERS = "https://www.galaxus.ch/de/s10/product/pampers-premium-protection-gr-5-monatsbox-152-stueck-windeln-23688428"
+LEGO = "https://www.galaxus.ch/de/s5/product/lego-millennium-falcon-75192-lego-star-wars-lego-seltene-sets-lego-7238420"
+RICOLA = "https://www.galaxus.ch/de/s3/product/ricola-kraeuterbonbons-250-g-1234567"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeShop:
+    """fetch_price replacement: product id -> price, None answers 304"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def __call__(self, product_id, etag=None, last_modified=None):
+        self.calls.append((product_id, etag))
+        price = self.prices[product_id]
+        if isinstance(price, Exception):
+            raise price
+        if price is None:
+            return {"modified": False}
+        return {"modified": True, "price": price, "currency": "CHF", "etag": f'"{price}"', "last_modified": None}
+
+
+@pytest.fixture
+def pool(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'a', 'a@b.ch', 'x')")
+        conn.execute("INSERT INTO users (id, username, email, hashed_password) VALUES (2, 'b', 'b@b.ch', 'x')")
+        conn.executemany("INSERT INTO products (id, url, name, price, user_id) VALUES (?, ?, ?, ?, ?)", [
+            (1, PAMPERS, "Pampers", "64.90", 1),
+            (2, LEGO, "Lego", "599.00", 1),
+            (3, RICOLA, "Ricola", "4.95", 1),
+            (4, PAMPERS + "?utm_source=google", "Pampers", "69.90", 2),
+            (5, "https://example.com/no-galaxus", "Anderes", "1.00", 1),
+        ])
+        conn.executemany("INSERT INTO subscriptions (product_id, user_id, frequency, is_active, next_buy_date) VALUES (?, ?, 'weekly', ?, ?)", [
+            (2, 1, 1, "2026-03-01"),
+            (4, 2, 1, "2026-04-01"),
+            (1, 1, 0, "2026-01-01"),  # inactive subscriptions don't count
+        ])
+    return pool
+
+
+def prices(pool):
+    with pool.connection() as conn:
+        return dict(conn.execute("SELECT id, price FROM products"))
+
+
+def test_due_products_are_ordered_by_next_buy_date(pool):
+    due = select_due_products(pool, now=1000.0)
+    assert [product["product_id"] for product in due] == ["7238420", "23688428", "1234567"]
+    assert due[1]["rows"] == {1: "64.90", 4: "69.90"}
+    assert [product["product_id"] for product in select_due_products(pool, limit=1, now=1000.0)] == ["7238420"]
+
+
+def test_prices_are_refreshed_once_per_product(pool):
+    shop = FakeShop({"7238420": "549.00", "23688428": "64.90", "1234567": ConnectionError("timeout")})
+    stats = refresh_prices(pool, fetch=shop, concurrency=2, clock=Clock())
+
+    assert sorted(shop.calls) == [("1234567", None), ("23688428", None), ("7238420", None)]
+    assert stats == {"checked": 3, "changed": 2, "unchanged": 0, "failed": 1}
+    assert prices(pool) == {1: "64.90", 2: "549.00", 3: "4.95", 4: "64.90", 5: "1.00"}
+    assert [entry["price"] for entry in get_price_history(pool, "7238420")] == ["549.00"]
+
+
+def test_checked_products_wait_for_min_age_and_send_validators(pool):
+    clock = Clock()
+    shop = FakeShop({"7238420": "549.00", "23688428": "64.90", "1234567": "4.95"})
+    refresh_prices(pool, fetch=shop, min_age=3600, clock=clock)
+
+    shop.calls.clear()
+    clock.now += 60
+    assert refresh_prices(pool, fetch=shop, min_age=3600, clock=clock)["checked"] == 0
+    assert shop.calls == []
+
+    # Unchanged page (304): nothing but the check time is written
+    shop.prices = {"7238420": None, "23688428": "59.90", "1234567": "4.95"}
+    clock.now += 3600
+    stats = refresh_prices(pool, fetch=shop, min_age=3600, clock=clock)
+    assert ("7238420", '"549.00"') in shop.calls
+    assert stats == {"checked": 3, "changed": 1, "unchanged": 2, "failed": 0}
+    assert prices(pool)[2] == "549.00"
+    assert [entry["price"] for entry in get_price_history(pool, "23688428")] == ["59.90", "64.90"]
+    assert len(get_price_history(pool, "1234567")) == 1
+
+
+def test_price_formatting_is_not_a_change(pool):
+    invalidated = []
+    shop = FakeShop({"7238420": "599", "23688428": "64.9", "1234567": "4.95"})
+    stats = refresh_prices(pool, fetch=shop, clock=Clock(), on_change=invalidated.append)
+
+    # Only the second Pampers row (69.90) really differs
+    assert stats == {"checked": 3, "changed": 1, "unchanged": 2, "failed": 0}
+    assert prices(pool) == {1: "64.90", 2: "599.00", 3: "4.95", 4: "64.9", 5: "1.00"}
+    assert invalidated == ["23688428"]
+
+    shop.prices = {"7238420": "599.00", "23688428": "64.90", "1234567": "5.25"}
+    stats = refresh_prices(pool, fetch=shop, min_age=0, clock=Clock(), on_change=invalidated.append)
+    assert stats == {"checked": 3, "changed": 1, "unchanged": 2, "failed": 0}
+    assert invalidated == ["23688428", "1234567"]
+    assert [entry["price"] for entry in get_price_history(pool, "7238420")] == ["599"]
+
+
+@pytest.mark.parametrize("a,b,same", [
+    ("65", "65.00", True), ("64.9", "64.90", True), ("CHF 17.95", "17.95", True), ("65.00", "64.90", False),
+    (None, "1.00", False), (None, None, True),
+])
+def test_same_price(a, b, same):
+    assert same_price(a, b) is same
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+def test_fetch_price_sends_conditional_headers(monkeypatch):
+    requests = []
+
+    def get(url, headers=None, **kwargs):
+        requests.append((url, headers))
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, (FIXTURES / "galaxus_product.html").read_bytes(), {"ETag": '"v1"'})
+
+    monkeypatch.setattr(price_refresher.http_client, "get", get)
+
+    assert fetch_price("23688428") == {
+        "modified": True, "price": "64.90", "currency": "CHF", "etag": '"v1"', "last_modified": None,
+    }
+    assert fetch_price("23688428", '"v1"', "Tue, 01 Sep 2026 10:00:00 GMT") == {"modified": False}
+    assert requests[0] == ("https://galaxus.ch/product/23688428", {})
+    assert requests[1][1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Tue, 01 Sep 2026 10:00:00 GMT"}
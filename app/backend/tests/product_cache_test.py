@@ -0,0 +1,154 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.backend.product_cache import ProductCache
+
+URL = "https://www.galaxus.ch/de/s10/product/pampers-premium-protection-gr-5-monatsbox-152-stueck-windeln-23688428?utm_source=google"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeShop:
+    def __init__(self):
+        self.calls = []
+        self.price = "CHF 49.90"
+
+    def __call__(self, product_id):
+        self.calls.append(product_id)
+        return {"title": f"Produkt {product_id}", "image_url": None, "price": self.price}
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_repeat_previews_are_served_from_cache(pool):
+    shop = FakeShop()
+    cache = ProductCache(pool, fetch=shop)
+
+    assert cache.get(URL)["title"] == "Produkt 23688428"
+    # Different URL of the same product (tracking parameters, other slug)
+    assert cache.get("https://www.galaxus.ch/de/product/windeln-23688428")["price"] == "CHF 49.90"
+    assert shop.calls == ["23688428"]
+    assert cache.get("https://example.com/product/1") is None
+
+
+def test_cache_is_shared_through_the_database(pool):
+    shop = FakeShop()
+    ProductCache(pool, fetch=shop).get(URL)
+    assert ProductCache(pool, fetch=shop).get(URL)["title"] == "Produkt 23688428"
+    assert len(shop.calls) == 1
+
+
+def test_stale_entries_are_served_while_refreshing(pool, executor):
+    shop, clock = FakeShop(), Clock()
+    cache = ProductCache(pool, fetch=shop, fresh_ttl=60, stale_ttl=3600, executor=executor, clock=clock)
+    cache.get(URL)
+
+    shop.price = "CHF 44.90"
+    clock.now += 120
+    assert cache.get(URL)["price"] == "CHF 49.90"
+    executor.shutdown(wait=True)
+    assert cache.get(URL)["price"] == "CHF 44.90"
+    assert len(shop.calls) == 2
+
+    # Past the stale TTL the product is fetched before answering
+    shop.price = "CHF 39.90"
+    clock.now += 7200
+    assert cache.get(URL)["price"] == "CHF 39.90"
+
+
+def test_concurrent_misses_share_one_fetch(pool):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(product_id):
+        calls.append(product_id)
+        started.set()
+        release.wait(5)
+        return {"title": "Windeln", "image_url": None, "price": None}
+
+    cache = ProductCache(pool, fetch=slow_fetch)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = [executor.submit(cache.get, URL)]
+        started.wait(5)
+        results += [executor.submit(cache.get, URL) for _ in range(2)]
+        time.sleep(0.05)
+        release.set()
+        assert [result.result()["title"] for result in results] == ["Windeln"] * 3
+    assert len(calls) == 1
+
+
+def test_empty_pages_are_not_cached(pool):
+    calls = []
+
+    def fetch(product_id):
+        calls.append(product_id)
+        return {"title": None, "image_url": None, "price": None}
+
+    cache = ProductCache(pool, fetch=fetch)
+    cache.get(URL)
+    cache.get(URL)
+    assert len(calls) == 2
+
+
+def test_evict_keeps_most_recently_used(pool):
+    clock = Clock()
+    cache = ProductCache(pool, fetch=FakeShop(), max_entries=2, stale_ttl=3600, clock=clock)
+    for product_id in ("1111111", "2222222", "3333333"):
+        clock.now += 1
+        cache.get_by_id(product_id)
+
+    assert cache.evict() == 1
+    with pool.connection() as conn:
+        remaining = [row[0] for row in conn.execute("SELECT product_id FROM product_cache ORDER BY product_id")]
+    assert remaining == ["2222222", "3333333"]
+
+    clock.now += 7200
+    assert cache.evict() == 2
+
+
+def test_memory_hits_count_as_recent_use(pool):
+    clock = Clock()
+    cache = ProductCache(pool, fetch=FakeShop(), max_entries=2, stale_ttl=3600, clock=clock)
+    for product_id in ("1111111", "2222222", "3333333"):
+        clock.now += 1
+        cache.get_by_id(product_id)
+    # Served from memory only: the table would still say 1111111 is the oldest
+    clock.now += 1
+    cache.get_by_id("1111111")
+
+    assert cache.evict() == 1
+    with pool.connection() as conn:
+        remaining = [row[0] for row in conn.execute("SELECT product_id FROM product_cache ORDER BY product_id")]
+    assert remaining == ["1111111", "3333333"]
+
+
+def test_memory_hits_are_written_back_in_batches(pool):
+    clock = Clock()
+    cache = ProductCache(pool, fetch=FakeShop(), clock=clock)
+    cache.get_by_id("1111111")
+
+    def accessed_at():
+        with pool.connection() as conn:
+            return conn.execute("SELECT accessed_at FROM product_cache").fetchone()[0]
+
+    clock.now += 10
+    cache.get_by_id("1111111")
+    assert accessed_at() == 1000.0
+
+    clock.now += 60
+    cache.get_by_id("1111111")
+    assert accessed_at() == 1070.0
@@ -1,6 +1,23 @@
 import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
 import pytest
-from recognize_products import parse_product_id
+from app.backend.recognize_products import (
+    extract_metadata,
+    fetch_document,
+    format_price,
+    get_price,
+    make_soup,
+    parse_product_html,
+    parse_product_id,
+    pick_first_image_url,
+    pick_title,
+    StructuredSplitter,
+    split_head,
+    split_structured,
+)
 
 
 @pytest.mark.parametrize("url,expected", [
@@ -25,3 +42,130 @@ def test_valid_urls(url, expected):
 ])
 def test_invalid_urls(url):
     assert parse_product_id(url or "") is None
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PRODUCT_URL = "https://www.galaxus.ch/de/s10/product/pampers-premium-protection-gr-5-monatsbox-152-stueck-windeln-23688428"
+
+
+def test_head_only_parse_matches_full_page():
+    html = (FIXTURES / "galaxus_product.html").read_bytes()
+    head = split_head(html)
+
+    assert head is not None and len(head) < len(html) / 10
+    preview = lambda data: {key: data[key] for key in ("title", "image_url", "price")}
+    assert preview(parse_product_html(head, PRODUCT_URL)) == preview(parse_product_html(html, PRODUCT_URL)) == {
+        "title": "Pampers Premium Protection Gr. 5 Monatsbox (152 Stück, Windeln)",
+        "image_url": "https://static01.galaxus.com/productimages/7/4/3/9/5/4/7/2/3/2/4/2/8/6/7/0/6/3/8/3e0b1c79-9fa6-4b6c-a0b5-8d1f5b0f1e1a.jpg_720.jpeg",
+        "price": "64.90",
+    }
+
+
+def test_head_without_price_needs_the_whole_page():
+    html = b"<html><head><meta property='og:title' content='x'><meta property='og:image' content='/a.jpg'></head><body>CHF 5.-</body></html>"
+    assert split_head(html) is None
+
+
+class StandInPageHandler(BaseHTTPRequestHandler):
+    """Sends the fixture page in small chunks"""
+
+    def do_GET(self):
+        html = (FIXTURES / "galaxus_product.html").read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.end_headers()
+        for start in range(0, len(html), 1024):
+            self.wfile.write(html[start:start + 1024])
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetch_document_stops_after_preview_data():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/product"
+    try:
+        structured, structured_truncated = fetch_document(url, structured=True)
+        head, truncated = fetch_document(url, structured=False)
+        full, full_truncated = fetch_document(url, head_only=False)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert structured_truncated and structured.endswith(b"</script>") and len(structured) < len(full)
+    assert parse_product_html(structured, PRODUCT_URL)["availability"] == "InStock"
+    assert truncated and head.rstrip().endswith(b"</head>")
+    assert not full_truncated and full == (FIXTURES / "galaxus_product.html").read_bytes()
+
+
+@pytest.mark.parametrize("page,complete", [
+    ("galaxus_product.html", True), ("jsonld_graph.html", True), ("next_data_only.html", True),
+    ("broken_jsonld.html", False), ("no_structured_data.html", False),
+])
+def test_split_after_structured_data(page, complete):
+    html = (FIXTURES / page).read_bytes()
+    prefix = split_structured(html)
+    assert (prefix is not None) == complete
+    if complete:
+        assert parse_product_html(prefix, PRODUCT_URL) == parse_product_html(html, PRODUCT_URL)
+        # A block cut off mid-download isn't enough
+        assert split_structured(prefix[:-12]) is None
+
+
+@pytest.mark.parametrize("page", ["galaxus_product.html", "jsonld_graph.html", "next_data_only.html", "no_structured_data.html"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_structured_splitter_matches_whole_page(page, chunk_size):
+    html = (FIXTURES / page).read_bytes()
+    split = StructuredSplitter(limit=None)
+    received = bytearray()
+    for start in range(0, len(html), chunk_size):
+        received += html[start:start + chunk_size]
+        prefix = split(received)
+        if prefix is not None:
+            break
+    assert prefix == split_structured(html)
+
+
+def test_structured_splitter_falls_back_to_head_after_limit():
+    html = (FIXTURES / "galaxus_product.html").read_bytes()
+    split = StructuredSplitter(limit=4096)
+    assert split(html[:2048]) is None
+    assert split(html[:4096]) == split_head(html)
+
+
+@pytest.mark.parametrize("price,expected", [
+    ("64.90", "64.90"), ("65", "65.00"), ("64,9", "64.90"), ("1'299.00", "1299.00"), (65.0, "65.00"),
+    ("CHF 249.–", "CHF 249.–"), (" ", None), (None, None),
+])
+def test_meta_and_structured_prices_are_formatted_alike(price, expected):
+    assert format_price(price) == expected
+
+
+EXTRACTOR_CASES = [
+    # Open Graph everywhere
+    "<head><meta property='og:title' content=' T '><meta property='og:image' content='/i.jpg'>"
+    "<meta itemprop='price' content='12.50'></head><body><h1>H</h1><img src='/other.png'></body>",
+    # Empty og tags fall through to <title>, data: URIs to <link rel=image_src>
+    "<head><meta property='og:title' content=''><title> Titel </title><meta property='og:image' content='data:image/png;base64,AA'>"
+    "<link rel='preload image_src' href='//cdn.example.com/p.webp'></head><body><div class='product-price'>CHF 9.90</div></body>",
+    # <title> with markup inside, h1, lazy-loaded img, twitter price
+    "<title>A <b>B</b></title><h1> Produkt </h1><img data-srcset='/s.jpg 1x, /l.jpg 2x'><meta name='twitter:data1' content='CHF 5'>",
+    # Only a twitter title, first price-like tag without digits, regex across elements
+    "<meta name='twitter:title' content='Tw'><span id='priceBox'>Preis</span><p><span>CHF</span> <span>249.–</span></p>",
+    # Image only in some meta content, no price at all
+    "<h1></h1><meta name='thumbnail' content='https://x.ch/p.JPG?v=2'><div class='Price'>gratis</div>",
+    # Nothing usable
+    "<html><body><p>leer</p></body></html>",
+]
+
+
+@pytest.mark.parametrize("html", EXTRACTOR_CASES + [(FIXTURES / "galaxus_product.html").read_text(encoding="utf-8")])
+def test_single_pass_extractor_matches_pickers(html):
+    soup = make_soup(html)
+    assert extract_metadata(soup, PRODUCT_URL) == {
+        "title": pick_title(soup),
+        "image_url": pick_first_image_url(soup, PRODUCT_URL),
+        "price": get_price(soup),
+    }
@@ -0,0 +1,51 @@
+import time
+import pytest
+from app.backend.session_store import SessionStore
+
+
+def test_create_get_and_delete(pool):
+    store = SessionStore(pool, "session", ttl=60)
+    token = store.create({"email": "a@b.ch", "user_id": 7})
+    assert token in store
+    assert store[token]["email"] == "a@b.ch"
+
+    del store[token]
+    assert token not in store
+    assert store.get(token) is None
+
+
+def test_sessions_are_shared_through_the_database(pool):
+    worker_a = SessionStore(pool, "session", ttl=60)
+    worker_b = SessionStore(pool, "session", ttl=60)
+    token = worker_a.create({"email": "a@b.ch", "user_id": 7})
+    assert worker_b.get(token) == {"email": "a@b.ch", "user_id": 7}
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT user_id FROM sessions").fetchone()[0] == 7
+        # Only a hash of the token is persisted
+        assert conn.execute("SELECT COUNT(*) FROM sessions WHERE token = ?", (token,)).fetchone()[0] == 0
+
+
+def test_namespaces_are_separate(pool):
+    sessions = SessionStore(pool, "session", ttl=60)
+    pending = SessionStore(pool, "pending_2fa", ttl=60)
+    token = sessions.create({"email": "a@b.ch"})
+    assert token not in pending
+
+
+def test_expired_sessions_are_rejected_and_evicted(pool):
+    store = SessionStore(pool, "session", ttl=0.05)
+    token = store.create({"email": "a@b.ch"})
+    other = store.create({"email": "c@d.ch"})
+    time.sleep(0.1)
+    assert store.get(token) is None
+    assert store.evict_expired() == 1
+    assert other not in store
+
+
+def test_unknown_or_missing_token(pool):
+    store = SessionStore(pool, "session", ttl=60)
+    assert store.get(None) is None
+    assert "nope" not in store
+    with pytest.raises(KeyError):
+        store["nope"]
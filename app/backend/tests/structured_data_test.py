@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+from app.backend.structured_data import extract_structured_product
+from app.backend.recognize_products import parse_product_html
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BASE_URL = "https://www.galaxus.ch/de/s1/product/some-product-12345678"
+
+
+@pytest.mark.parametrize("page,expected", [
+    ("galaxus_product.html", {
+        "title": "Pampers Premium Protection Gr. 5 Monatsbox (152 Stück, Windeln)",
+        "price": 64.9,
+        "currency": "CHF",
+        "availability": "InStock",
+        "images": 2,
+    }),
+    # @graph, @type list, ImageObjects with relative URLs, price in priceSpecification
+    ("jsonld_graph.html", {
+        "title": "Nespresso Vertuo Kapseln Melozio (30 Stück)",
+        "price": 1299.0,
+        "currency": "CHF",
+        "availability": "PreOrder",
+        "images": 2,
+    }),
+    # Main product wins over the recommendations nested deeper in the payload
+    ("next_data_only.html", {
+        "title": "Ricola Kräuterbonbons (250 g)",
+        "price": 4.95,
+        "currency": "CHF",
+        "availability": "OutOfStock",
+        "images": 1,
+    }),
+])
+def test_structured_product_data(page, expected):
+    product = extract_structured_product((FIXTURES / page).read_bytes(), BASE_URL)
+    assert {**product, "images": len(product["images"])} == expected
+    assert all(url.startswith("https://") for url in product["images"])
+
+
+@pytest.mark.parametrize("page", ["no_structured_data.html", "broken_jsonld.html"])
+def test_pages_without_usable_structured_data(page):
+    assert extract_structured_product((FIXTURES / page).read_text(encoding="utf-8"), BASE_URL) is None
+
+
+@pytest.mark.parametrize("page,title,image_url,price", [
+    ("jsonld_graph.html", "Nespresso Vertuo Kapseln Melozio (30 Stück)",
+     "https://www.galaxus.ch/productimages/melozio-1.jpg", "1299.00"),
+    ("next_data_only.html", "Ricola Kräuterbonbons (250 g)",
+     "https://static01.galaxus.com/productimages/ricola.jpg", "4.95"),
+    # Heuristics as fallback
+    ("no_structured_data.html", "Zewa Toilettenpapier (24 Rollen) - Galaxus",
+     "https://static01.galaxus.com/productimages/zewa.jpg", "CHF 17.95"),
+    ("broken_jsonld.html", "Lindt Excellence 70% (100 g)",
+     "https://static01.galaxus.com/productimages/lindt.jpg", "2.95 CHF"),
+])
+def test_preview_prefers_structured_data(page, title, image_url, price):
+    data = parse_product_html((FIXTURES / page).read_bytes(), BASE_URL)
+    assert (data["title"], data["image_url"], data["price"]) == (title, image_url, price)
+
+
+@pytest.mark.parametrize("value,expected", [
+    ('"64.90"', 64.9), ('"64,90"', 64.9), ('"1.299,00"', 1299.0), ('"1,299"', 1299.0), ('12', 12.0), ('"gratis"', None),
+])
+def test_price_formats(value, expected):
+    html = f'<script type="application/ld+json">{{"@type": "Product", "name": "x", "offers": {{"price": {value}}}}}</script>'
+    assert extract_structured_product(html)["price"] == expected
@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from app.backend import subscription_emailer
+from app.backend.db import get_pool
+from app.backend.migrations import migrate
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    today = date.today()
+    with get_pool(path).connection() as conn:
+        migrate(conn)
+        conn.execute("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'a', 'a@b.ch', 'x')")
+        conn.execute("INSERT INTO products (id, url, name, price, user_id) VALUES (1, 'https://galaxus.ch/product/x-1234567', 'Windeln', '64.90', 1)")
+        conn.executemany("""
+            INSERT INTO subscriptions (id, product_id, user_id, frequency, is_active, created_at, frequency_type, next_buy_date)
+            VALUES (?, 1, 1, ?, ?, ?, ?, ?)
+        """, [
+            # Legacy row (interval in days, no start date) that the rollover hasn't seen yet
+            (1, "7", 1, (datetime.now() - timedelta(days=3)).isoformat(), None, None),
+            (2, "monatlich", 1, datetime.now().isoformat(), "preset", (today + timedelta(days=1)).isoformat()),
+            (3, "monatlich", 0, datetime.now().isoformat(), "preset", (today + timedelta(days=1)).isoformat()),
+        ])
+    subscription_emailer.set_db_path(path)
+    yield path
+    get_pool(path).close()
+
+
+def due_ids(days_ahead: int):
+    due = subscription_emailer.get_subscriptions_due_by_user(datetime.now() + timedelta(days=days_ahead))
+    return {user_id: [sub["id"] for sub in entry["subscriptions"]] for user_id, entry in due.items()}
+
+
+def test_due_subscriptions_by_stored_date(db_path):
+    assert due_ids(1) == {1: [2]}
+    assert due_ids(2) == {}
+
+
+def test_legacy_subscriptions_are_due_every_n_days(db_path):
+    assert due_ids(4) == {1: [1]}
+    assert due_ids(11) == {}
+    assert subscription_emailer.get_subscriptions_due_date(1, datetime.now() + timedelta(days=4))[0]["frequency"] == "7"
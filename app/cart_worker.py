@@ -0,0 +1,151 @@
+"""
+Cart worker process
+Claims queued cart jobs from the database, runs them with this process's
+browser pool / cart backend and stores the results. Start several workers
+to process more jobs at once:
+
+    python -m app.cart_worker
+
+The web app runs the same loop in a background thread unless
+CART_INPROCESS_WORKER=0 (e.g. when separate worker containers are deployed).
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from dotenv import load_dotenv
+
+from app.backend.db import get_pool
+from app.backend.migrations import migrate
+from app.backend.add_to_cart import get_driver_pool, close_driver_pools
+from app.backend.cart_selectors import selector_stats
+from app.backend.debug_artifacts import FLUSH_TIMEOUT as DEBUG_ARTIFACTS_FLUSH_TIMEOUT, flush as flush_debug_artifacts
+from app.backend.cart_backends import get_cart_backend
+from app.backend.cart_jobs import (
+    HEARTBEAT_TIMEOUT,
+    add_job_event,
+    claim_next_job,
+    complete_job,
+    fail_job,
+    heartbeat,
+    prune_job_events,
+    requeue_stale_jobs,
+)
+
+load_dotenv()
+
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "autobuyer.db"))
+POLL_INTERVAL = float(os.getenv("CART_WORKER_POLL_INTERVAL", "1"))
+
+
+def process_job(pool, job: dict, backend=None) -> dict:
+    """
+    Run one claimed job and store its result
+
+    Per-product progress ("started", "added", "failed") is recorded as job
+    events for the /cart-jobs/{id}/events stream.
+
+    Returns:
+        dict: The cart result stored for the job
+    """
+    backend = backend or get_cart_backend()
+    digitec_email = os.getenv("DIGITEC_EMAIL")
+    digitec_password = os.getenv("DIGITEC_PASSWORD")
+
+    # Keep the job's heartbeat fresh while the browser works
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(HEARTBEAT_TIMEOUT / 4):
+            try:
+                heartbeat(pool, job["id"])
+            except Exception as e:
+                print(f"⚠️  Heartbeat for cart job {job['id']} failed: {e}")
+
+    def on_progress(event, data):
+        try:
+            add_job_event(pool, job["id"], event, data)
+        except Exception as e:
+            print(f"⚠️  Could not record {event} event for cart job {job['id']}: {e}")
+
+    threading.Thread(target=beat, name=f"cart-job-{job['id']}-heartbeat", daemon=True).start()
+    try:
+        if job["kind"] == "single":
+            url = job["product_urls"][0]
+            on_progress("started", {"url": url})
+            started = time.monotonic()
+            result = backend.add_product(url, digitec_email, digitec_password)
+            on_progress("added" if result.get("success") else "failed", {
+                "url": url,
+                "success": bool(result.get("success")),
+                "message": result.get("message"),
+                "seconds": round(time.monotonic() - started, 2),
+            })
+        else:
+            result = backend.add_products(job["product_urls"], digitec_email, digitec_password, on_progress=on_progress)
+        complete_job(pool, job["id"], result)
+        return result
+    finally:
+        done.set()
+
+
+def run_worker(pool, stop: threading.Event, worker_id: str = None, poll_interval: float = POLL_INTERVAL, backend=None):
+    """
+    Process cart jobs until stop is set
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    print(f"✅ Cart worker {worker_id} started")
+    while not stop.is_set():
+        try:
+            requeued = requeue_stale_jobs(pool)
+            if requeued:
+                print(f"⚠️  Requeued {requeued} cart job(s) of unresponsive workers")
+
+            job = claim_next_job(pool, worker_id)
+            if not job:
+                stop.wait(poll_interval)
+                continue
+
+            print(f"📦 Cart job {job['id']}: {len(job['product_urls'])} product(s) (attempt {job['attempts']})")
+            try:
+                result = process_job(pool, job, backend)
+                print(f"✅ Cart job {job['id']} finished: {result.get('message')}")
+            except Exception as e:
+                traceback.print_exc()
+                fail_job(pool, job["id"], str(e))
+                add_job_event(pool, job["id"], "error", {"message": str(e), "attempt": job["attempts"]})
+                print(f"❌ Cart job {job['id']} failed: {e}")
+            prune_job_events(pool)
+        except Exception as e:
+            print(f"❌ Cart worker error: {e}")
+            stop.wait(poll_interval)
+    print(f"✅ Cart worker {worker_id} stopped")
+
+
+def main():
+    pool = get_pool(DB_PATH)
+    with pool.connection() as conn:
+        migrate(conn)
+
+    if os.getenv("DIGITEC_EMAIL"):
+        get_driver_pool(os.getenv("DIGITEC_EMAIL"), os.getenv("DIGITEC_PASSWORD")).warm_in_background()
+
+    # Finish the current job on SIGTERM/SIGINT, then exit
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    try:
+        run_worker(pool, stop)
+    finally:
+        close_driver_pools()
+        flush_debug_artifacts(DEBUG_ARTIFACTS_FLUSH_TIMEOUT)
+        selector_stats.save()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
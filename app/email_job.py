@@ -6,7 +6,6 @@ to users who have subscriptions due the next day.
 
 import os
 import sys
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -16,30 +15,25 @@ sys.path.insert(0, str(current_dir))
 
 from backend.subscription_emailer import (
     set_db_path,
+    get_subscriptions_due_by_user,
     send_subscription_reminder_email
 )
 
 # Configuration
-DB_PATH = Path(__file__).parent / "autobuyer.db"
+DB_PATH = os.getenv("DB_PATH", str(Path(__file__).parent / "autobuyer.db"))
 TEMPLATE_PATH = Path(__file__).parent / "templates" / "E-Mail-Template.html"
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
 
-def get_next_buy_date(created_at: datetime, frequency: int) -> datetime:
+def get_subscriptions_due_tomorrow() -> dict:
     """
-    Calculate the next buy date for a subscription
+    Get all subscriptions due tomorrow, grouped by user, in one pass
     
-    Args:
-        created_at: When the subscription was created
-        frequency: Number of days between purchases
-        
     Returns:
-        The next buy date
+        dict: {user_id: {"email": str, "subscriptions": [dict, ...]}}
     """
-    days_since_creation = (datetime.now() - created_at).days
-    days_until_next = frequency - (days_since_creation % frequency)
-    next_buy_date = datetime.now() + timedelta(days=days_until_next)
-    return next_buy_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = datetime.now() + timedelta(days=1)
+    return get_subscriptions_due_by_user(tomorrow)
 
 
 def get_users_with_subscriptions_due_tomorrow() -> list:
@@ -49,40 +43,7 @@ def get_users_with_subscriptions_due_tomorrow() -> list:
     Returns:
         List of tuples (user_id, user_email)
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Get all active subscriptions
-    cursor.execute("""
-        SELECT DISTINCT u.id, u.email, s.created_at, s.frequency
-        FROM users u
-        JOIN subscriptions s ON u.id = s.user_id
-        WHERE s.is_active = 1
-    """)
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    # Calculate tomorrow's date (midnight)
-    tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Check which users have subscriptions due tomorrow
-    users_due = {}
-    
-    for user_id, user_email, created_at_str, frequency in rows:
-        try:
-            created_at = datetime.fromisoformat(created_at_str)
-            next_buy = get_next_buy_date(created_at, frequency)
-            
-            # Check if next buy is tomorrow
-            if next_buy.date() == tomorrow.date():
-                if user_id not in users_due:
-                    users_due[user_id] = user_email
-        except (ValueError, TypeError) as e:
-            print(f"Error processing subscription for user {user_id}: {e}")
-            continue
-    
-    return [(user_id, email) for user_id, email in users_due.items()]
+    return [(user_id, due["email"]) for user_id, due in get_subscriptions_due_tomorrow().items()]
 
 
 def send_daily_reminders():
@@ -100,8 +61,9 @@ def send_daily_reminders():
     # Calculate tomorrow's date
     tomorrow = datetime.now() + timedelta(days=1)
     
-    # Get users with subscriptions due tomorrow
-    users_to_notify = get_users_with_subscriptions_due_tomorrow()
+    # Get subscriptions due tomorrow for all users in one pass
+    due_by_user = get_subscriptions_due_tomorrow()
+    users_to_notify = [(user_id, due["email"]) for user_id, due in due_by_user.items()]
     
     if not users_to_notify:
         print("No users with subscriptions due tomorrow")
@@ -128,7 +90,8 @@ def send_daily_reminders():
                 user_id=user_id,
                 base_url=BASE_URL,
                 template_path=str(TEMPLATE_PATH),
-                target_date=tomorrow  # Only send subscriptions due tomorrow
+                target_date=tomorrow,
+                subscriptions=due_by_user[user_id]["subscriptions"]  # Only send subscriptions due tomorrow
             )
             
             if result["success"]:
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, Request, Form, HTTPException, status, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, Form, HTTPException, status, BackgroundTasks, Depends
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, EmailStr
@@ -12,19 +12,37 @@ import os
 import sys
 import subprocess
 import random
+import threading
+import asyncio
+import json
+import time
 import aiosmtplib
 from email.message import EmailMessage
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 # from app.backend.recognize_products import recognize_products
 # from app.backend.add_to_cart import add_product_to_cart, add_multiple_products_to_cart
 from app.backend.emailer import send_email
+from app.backend.db import get_pool
+from app.backend.migrations import migrate
+from app.backend.executors import run_db, run_io, shutdown_executors
+from app.backend.session_store import SessionStore
+from app.backend.cache import TTLCache
+from app.backend.buy_schedule import next_buy_dates, roll_over_next_buy_dates, schedule_row
 # from app.backend.recognize_products import recognize_products
 # from app.backend.add_to_cart import add_product_to_cart, add_multiple_products_to_cart
-from app.backend.recognize_products import recognize_products
-from app.backend.add_to_cart import add_product_to_cart, add_multiple_products_to_cart
+from app.backend.recognize_products import parse_product_id, recognize_product_id
+from app.backend.product_cache import ProductCache
+from app.backend.price_refresher import INTERVAL_MINUTES as PRICE_REFRESH_INTERVAL_MINUTES, fetch_price, refresh_prices
+from app.backend.bulk_preview import MAX_URLS as BULK_PREVIEW_MAX_URLS, HostRateLimiter, preview_products, rate_limited
+from app.backend.http_client import close_clients as close_http_clients
+from app.backend.add_to_cart import get_driver_pool, close_driver_pools
+from app.backend.cart_selectors import selector_stats
+from app.backend.debug_artifacts import FLUSH_TIMEOUT as DEBUG_ARTIFACTS_FLUSH_TIMEOUT, flush as flush_debug_artifacts
+from app.backend.cart_jobs import enqueue_job, get_job, get_recent_jobs, iter_job_events, queue_position
 # Load environment variables
 load_dotenv()
 
@@ -42,241 +60,36 @@ class MailIn(BaseModel):
     html: str | None = None
 
 # Database setup
-DB_PATH = os.path.join(os.path.dirname(__file__), "autobuyer.db")
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "autobuyer.db"))
+db = get_pool(DB_PATH)
 
 def init_db():
-    """Initialize the database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Check if users table exists and get its columns
-    cursor.execute("PRAGMA table_info(users)")
-    existing_columns = [col[1] for col in cursor.fetchall()]
-    
-    if not existing_columns:
-        # Create users table from scratch
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                hashed_password TEXT NOT NULL,
-                two_factor_enabled BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """Initialize the database by applying pending schema migrations"""
+    with db.connection() as conn:
+        migrate(conn)
+        cursor = conn.cursor()
+    
+        # Create default admin user if not exists
+        cursor.execute("SELECT * FROM users WHERE username = ?", ("admin",))
+        if not cursor.fetchone():
+            hashed_pw = hash_password("admin123")
+            cursor.execute(
+                "INSERT INTO users (username, email, hashed_password, two_factor_enabled) VALUES (?, ?, ?, ?)",
+                ("admin", "admin@example.com", hashed_pw, 0)  # 2FA disabled for admin by default
             )
-        """)
-    else:
-        # Migrate existing table
-        if 'email' not in existing_columns:
-            print("📦 Migrating database: Adding email column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN email TEXT")
-            # Set default email for existing users
-            cursor.execute("UPDATE users SET email = username || '@example.com' WHERE email IS NULL")
-            
-        if 'two_factor_enabled' not in existing_columns:
-            print("📦 Migrating database: Adding two_factor_enabled column...")
-            cursor.execute("ALTER TABLE users ADD COLUMN two_factor_enabled BOOLEAN DEFAULT 0")
-    
-    # Create verification codes table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS verification_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            code TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            used BOOLEAN DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Create products table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT NOT NULL,
-            name TEXT NOT NULL,
-            image_url TEXT,
-            price TEXT,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_id INTEGER,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Check if products table needs migration for image_url and price
-    cursor.execute("PRAGMA table_info(products)")
-    product_columns = [col[1] for col in cursor.fetchall()]
-    if 'image_url' not in product_columns:
-        print("📦 Migrating database: Adding image_url column to products...")
-        cursor.execute("ALTER TABLE products ADD COLUMN image_url TEXT")
-    if 'price' not in product_columns:
-        print("📦 Migrating database: Adding price column to products...")
-        cursor.execute("ALTER TABLE products ADD COLUMN price TEXT")
-    
-    # Create subscriptions table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS subscriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id INTEGER NOT NULL,
-            frequency TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_id INTEGER,
-            start_date TEXT,
-            frequency_type TEXT,
-            frequency_value INTEGER,
-            frequency_unit TEXT,
-            specific_day_type TEXT,
-            weekday INTEGER,
-            monthday INTEGER,
-            next_buy_date TEXT,
-            FOREIGN KEY (product_id) REFERENCES products (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Migration: Add new columns if they don't exist
-    cursor.execute("PRAGMA table_info(subscriptions)")
-    columns = [col[1] for col in cursor.fetchall()]
-    
-    if 'start_date' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN start_date TEXT")
-    if 'frequency_type' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN frequency_type TEXT")
-    if 'frequency_value' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN frequency_value INTEGER")
-    if 'frequency_unit' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN frequency_unit TEXT")
-    if 'specific_day_type' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN specific_day_type TEXT")
-    if 'weekday' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN weekday INTEGER")
-    if 'monthday' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN monthday INTEGER")
-    if 'next_buy_date' not in columns:
-        cursor.execute("ALTER TABLE subscriptions ADD COLUMN next_buy_date TEXT")
-    
-    # Create default admin user if not exists
-    cursor.execute("SELECT * FROM users WHERE username = ?", ("admin",))
-    if not cursor.fetchone():
-        hashed_pw = hash_password("admin123")
-        cursor.execute(
-            "INSERT INTO users (username, email, hashed_password, two_factor_enabled) VALUES (?, ?, ?, ?)",
-            ("admin", "admin@example.com", hashed_pw, 0)  # 2FA disabled for admin by default
-        )
-        print("✅ Default admin user created (username: admin, password: admin123)")
+            print("✅ Default admin user created (username: admin, password: admin123)")
     
-    conn.commit()
-    conn.close()
     print("✅ Database initialized successfully")
 
 def calculate_next_buy_date(start_date_str: str, frequency_type: str, frequency_value: int = None, 
                             frequency_unit: str = None, specific_day_type: str = None, 
                             weekday: int = None, monthday: int = None, frequency_preset: str = None) -> str:
     """Calculate the next buy date based on start date and frequency settings"""
-    from datetime import datetime, timedelta
-    from dateutil.relativedelta import relativedelta
-    import calendar
-    
-    # Parse start date
-    if not start_date_str:
-        start_date = datetime.now()
-    else:
-        try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-        except:
-            start_date = datetime.now()
-    
-    # If start date is in the future, that's the next buy date
-    if start_date.date() > datetime.now().date():
-        return start_date.strftime("%Y-%m-%d")
-    
-    current_date = datetime.now()
-    next_date = start_date
-    
-    # Determine the frequency in days/months/years
-    if frequency_type == "preset":
-        # Map preset frequencies to increments
-        preset_map = {
-            "täglich": {"days": 1},
-            "wöchentlich": {"weeks": 1},
-            "alle 2 Wochen": {"weeks": 2},
-            "monatlich": {"months": 1},
-            "alle 2 Monate": {"months": 2},
-            "vierteljährlich": {"months": 3},
-            "halbjährlich": {"months": 6},
-            "jährlich": {"years": 1}
-        }
-        increment = preset_map.get(frequency_preset, {"days": 1})
-    elif frequency_type == "custom" and frequency_value and frequency_unit:
-        # Build custom increment - support both German and English
-        unit_map = {
-            "days": "days",
-            "weeks": "weeks", 
-            "months": "months",
-            "years": "years",
-            "Tag(e)": "days",
-            "Woche(n)": "weeks",
-            "Monat(e)": "months",
-            "Jahr(e)": "years",
-            "tage": "days",
-            "wochen": "weeks",
-            "monate": "months",
-            "jahre": "years"
-        }
-        increment = {unit_map.get(frequency_unit, "days"): frequency_value}
-    else:
-        # Default to daily
-        increment = {"days": 1}
-    
-    # Calculate next occurrence after current date
-    while next_date <= current_date:
-        if "days" in increment:
-            next_date += timedelta(days=increment["days"])
-        elif "weeks" in increment:
-            next_date += timedelta(weeks=increment["weeks"])
-        elif "months" in increment:
-            next_date += relativedelta(months=increment["months"])
-        elif "years" in increment:
-            next_date += relativedelta(years=increment["years"])
-    
-    # Apply specific day constraints if set
-    if specific_day_type == "weekday" and weekday is not None:
-        # Find next occurrence of the specific weekday
-        days_ahead = (weekday - next_date.weekday()) % 7
-        if days_ahead == 0 and next_date <= current_date:
-            days_ahead = 7
-        next_date += timedelta(days=days_ahead)
-    elif specific_day_type == "monthday" and monthday is not None:
-        # Set to specific day of month
-        if monthday == -1:
-            # Last day of month
-            last_day = calendar.monthrange(next_date.year, next_date.month)[1]
-            next_date = next_date.replace(day=last_day)
-        else:
-            try:
-                next_date = next_date.replace(day=min(monthday, calendar.monthrange(next_date.year, next_date.month)[1]))
-            except:
-                pass
-        
-        # If we're past this day in the current month, move to next occurrence
-        if next_date <= current_date:
-            if "months" in increment:
-                next_date += relativedelta(months=increment["months"])
-            else:
-                next_date += relativedelta(months=1)
-            
-            if monthday == -1:
-                last_day = calendar.monthrange(next_date.year, next_date.month)[1]
-                next_date = next_date.replace(day=last_day)
-            else:
-                try:
-                    next_date = next_date.replace(day=min(monthday, calendar.monthrange(next_date.year, next_date.month)[1]))
-                except:
-                    pass
-    
-    return next_date.strftime("%Y-%m-%d")
+    row = schedule_row(
+        start_date_str, frequency_type, frequency_value, frequency_unit,
+        specific_day_type, weekday, monthday, frequency_preset
+    )
+    return next_buy_dates([row])[0]
 
 def hash_password(password: str) -> str:
     """Hash a password using SHA-256"""
@@ -286,84 +99,80 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return hash_password(plain_password) == hashed_password
 
+# Short-lived cache for user lookups by email/id. It never holds credentials:
+# other workers can't invalidate it, so password checks always read the database
+USER_CACHE_TTL = 60
+user_cache = TTLCache(maxsize=1024, ttl=USER_CACHE_TTL)
+USER_COLUMNS = "id, username, email, two_factor_enabled, created_at"
+
+def user_from_row(row) -> dict:
+    """User dict (without the password hash) from a row of USER_COLUMNS"""
+    return {
+        "id": row[0],
+        "username": row[1],
+        "email": row[2],
+        "two_factor_enabled": bool(row[3]),
+        "created_at": row[4]
+    }
+
+def cache_user(user: Optional[dict]) -> Optional[dict]:
+    """Store a user in the user cache under its email and id"""
+    if user:
+        user_cache.set(("email", user["email"]), user)
+        user_cache.set(("id", user["id"]), user)
+    return user
+
+def invalidate_user_cache(email: str):
+    """Drop a user from the user cache"""
+    user = user_cache.get(("email", email))
+    user_cache.delete(("email", email))
+    if user:
+        user_cache.delete(("id", user["id"]))
+
 def get_user_by_username(username: str) -> Optional[dict]:
     """Get user from database by username"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, username, email, hashed_password, two_factor_enabled, created_at FROM users WHERE username = ?",
-        (username,)
-    )
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            "id": row[0],
-            "username": row[1],
-            "email": row[2],
-            "hashed_password": row[3],
-            "two_factor_enabled": bool(row[4]),
-            "created_at": row[5]
-        }
-    return None
+    with db.connection() as conn:
+        row = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE username = ?", (username,)).fetchone()
+    return user_from_row(row) if row else None
 
 def get_user_by_email(email: str) -> Optional[dict]:
     """Get user from database by email"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, username, email, hashed_password, two_factor_enabled, created_at FROM users WHERE email = ?",
-        (email,)
-    )
-    row = cursor.fetchone()
-    conn.close()
+    cached = user_cache.get(("email", email))
+    if cached:
+        return cached
     
-    if row:
-        return {
-            "id": row[0],
-            "username": row[1],
-            "email": row[2],
-            "hashed_password": row[3],
-            "two_factor_enabled": bool(row[4]),
-            "created_at": row[5]
-        }
-    return None
+    with db.connection() as conn:
+        row = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE email = ?", (email,)).fetchone()
+    return cache_user(user_from_row(row)) if row else None
 
 def get_user_by_id(user_id: int) -> Optional[dict]:
     """Get user from database by ID"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, username, email, hashed_password, two_factor_enabled, created_at FROM users WHERE id = ?",
-        (user_id,)
-    )
-    row = cursor.fetchone()
-    conn.close()
+    cached = user_cache.get(("id", user_id))
+    if cached:
+        return cached
     
-    if row:
-        return {
-            "id": row[0],
-            "username": row[1],
-            "email": row[2],
-            "hashed_password": row[3],
-            "two_factor_enabled": bool(row[4]),
-            "created_at": row[5]
-        }
-    return None
+    with db.connection() as conn:
+        row = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)).fetchone()
+    return cache_user(user_from_row(row)) if row else None
+
+def authenticate_user(email: str, password: str) -> Optional[dict]:
+    """Get a user by email if the password is correct (always checked against the database)"""
+    with db.connection() as conn:
+        row = conn.execute(f"SELECT {USER_COLUMNS}, hashed_password FROM users WHERE email = ?", (email,)).fetchone()
+    
+    if not row or not verify_password(password, row[5]):
+        return None
+    return cache_user(user_from_row(row))
 
 def create_user(username: str, email: str, password: str) -> bool:
     """Create a new user in the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         hashed_pw = hash_password(password)
-        cursor.execute(
-            "INSERT INTO users (username, email, hashed_password, two_factor_enabled) VALUES (?, ?, ?, ?)",
-            (username, email, hashed_pw, 1)  # 2FA enabled by default for new users
-        )
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, email, hashed_password, two_factor_enabled) VALUES (?, ?, ?, ?)",
+                (username, email, hashed_pw, 1)  # 2FA enabled by default for new users
+            )
         return True
     except sqlite3.IntegrityError:
         return False
@@ -371,15 +180,13 @@ def create_user(username: str, email: str, password: str) -> bool:
 def update_user_password(email: str, new_password: str) -> bool:
     """Update user password in database by email"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         hashed_pw = hash_password(new_password)
-        cursor.execute(
-            "UPDATE users SET hashed_password = ? WHERE email = ?",
-            (hashed_pw, email)
-        )
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            conn.execute(
+                "UPDATE users SET hashed_password = ? WHERE email = ?",
+                (hashed_pw, email)
+            )
+        invalidate_user_cache(email)
         return True
     except Exception:
         return False
@@ -393,43 +200,36 @@ def create_verification_code(user_id: int) -> str:
     code = generate_verification_code()
     expires_at = datetime.now() + timedelta(minutes=10)
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO verification_codes (user_id, code, expires_at) VALUES (?, ?, ?)",
-        (user_id, code, expires_at.isoformat())
-    )
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        conn.execute(
+            "INSERT INTO verification_codes (user_id, code, expires_at) VALUES (?, ?, ?)",
+            (user_id, code, expires_at.isoformat())
+        )
     
     return code
 
 def verify_code(user_id: int, code: str) -> bool:
     """Verify a code for a user"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT id, expires_at FROM verification_codes 
-           WHERE user_id = ? AND code = ? AND used = 0 
-           ORDER BY created_at DESC LIMIT 1""",
-        (user_id, code)
-    )
-    row = cursor.fetchone()
-    
-    if not row:
-        conn.close()
-        return False
-    
-    code_id, expires_at = row
-    if datetime.fromisoformat(expires_at) < datetime.now():
-        conn.close()
-        return False
-    
-    # Mark code as used
-    cursor.execute("UPDATE verification_codes SET used = 1 WHERE id = ?", (code_id,))
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """SELECT id, expires_at FROM verification_codes 
+               WHERE user_id = ? AND code = ? AND used = 0 
+               ORDER BY created_at DESC LIMIT 1""",
+            (user_id, code)
+        )
+        row = cursor.fetchone()
+        
+        if not row:
+            return False
+        
+        code_id, expires_at = row
+        if datetime.fromisoformat(expires_at) < datetime.now():
+            return False
+        
+        # Mark code as used
+        cursor.execute("UPDATE verification_codes SET used = 1 WHERE id = ?", (code_id,))
     
     return True
 
@@ -473,33 +273,32 @@ AutoBuyer Team
 
 def get_all_products(user_id: int = None) -> List[dict]:
     """Get all products from database, optionally filtered by user_id"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    if user_id is not None:
-        cursor.execute("""
-            SELECT p.id, p.url, p.name, p.image_url, p.price, p.added_at,
-                   CASE WHEN EXISTS (
-                       SELECT 1 FROM subscriptions s 
-                       WHERE s.product_id = p.id AND s.is_active = 1 AND s.user_id = ?
-                   ) THEN 1 ELSE 0 END as has_active_subscription
-            FROM products p
-            WHERE p.user_id = ?
-            ORDER BY p.added_at DESC
-        """, (user_id, user_id))
-    else:
-        cursor.execute("""
-            SELECT p.id, p.url, p.name, p.image_url, p.price, p.added_at,
-                   CASE WHEN EXISTS (
-                       SELECT 1 FROM subscriptions s 
-                       WHERE s.product_id = p.id AND s.is_active = 1
-                   ) THEN 1 ELSE 0 END as has_active_subscription
-            FROM products p
-            ORDER BY p.added_at DESC
-        """)
+    with db.connection() as conn:
+        cursor = conn.cursor()
+    
+        if user_id is not None:
+            cursor.execute("""
+                SELECT p.id, p.url, p.name, p.image_url, p.price, p.added_at,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM subscriptions s 
+                           WHERE s.product_id = p.id AND s.is_active = 1 AND s.user_id = ?
+                       ) THEN 1 ELSE 0 END as has_active_subscription
+                FROM products p
+                WHERE p.user_id = ?
+                ORDER BY p.added_at DESC
+            """, (user_id, user_id))
+        else:
+            cursor.execute("""
+                SELECT p.id, p.url, p.name, p.image_url, p.price, p.added_at,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM subscriptions s 
+                           WHERE s.product_id = p.id AND s.is_active = 1
+                       ) THEN 1 ELSE 0 END as has_active_subscription
+                FROM products p
+                ORDER BY p.added_at DESC
+            """)
     
-    rows = cursor.fetchall()
-    conn.close()
+        rows = cursor.fetchall()
     
     products = []
     for row in rows:
@@ -516,37 +315,53 @@ def get_all_products(user_id: int = None) -> List[dict]:
 
 def add_product_to_db(url: str, name: str, image_url: str = None, price: str = None, user_id: int = None) -> int:
     """Add a new product to database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO products (url, name, image_url, price, added_at, user_id) VALUES (?, ?, ?, ?, ?, ?)",
-        (url, name, image_url, price, datetime.now().isoformat(), user_id)
-    )
-    product_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO products (url, name, image_url, price, added_at, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, name, image_url, price, datetime.now().isoformat(), user_id)
+        )
+        product_id = cursor.lastrowid
     return product_id
 
+def add_products_to_db(products: List[dict], user_id: int) -> dict:
+    """Add several products in one transaction, skipping products the user already has"""
+    added = []
+    skipped = 0
+    now = datetime.now().isoformat()
+    with db.connection() as conn:
+        rows = conn.execute("SELECT url FROM products WHERE user_id = ?", (user_id,)).fetchall()
+        existing = {parse_product_id(row[0]) or row[0] for row in rows}
+        for product in products:
+            url = (product.get("url") or "").strip()
+            key = parse_product_id(url) or url
+            if not url or not product.get("title") or key in existing:
+                skipped += 1
+                continue
+            existing.add(key)
+            cursor = conn.execute(
+                "INSERT INTO products (url, name, image_url, price, added_at, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, product["title"], product.get("image_url"), product.get("price"), now, user_id)
+            )
+            added.append(cursor.lastrowid)
+    return {"added": added, "skipped": skipped}
+
 def delete_product_from_db(product_id: int, user_id: int = None) -> bool:
     """Delete product and its subscriptions from database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with db.connection() as conn:
+            cursor = conn.cursor()
         
-        # Verify ownership if user_id is provided
-        if user_id is not None:
-            cursor.execute("SELECT user_id FROM products WHERE id = ?", (product_id,))
-            row = cursor.fetchone()
-            if not row or row[0] != user_id:
-                conn.close()
-                return False
+            # Verify ownership if user_id is provided
+            if user_id is not None:
+                cursor.execute("SELECT user_id FROM products WHERE id = ?", (product_id,))
+                row = cursor.fetchone()
+                if not row or row[0] != user_id:
+                    return False
         
-        # Delete associated subscriptions first
-        cursor.execute("DELETE FROM subscriptions WHERE product_id = ?", (product_id,))
-        # Delete product
-        cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
-        conn.commit()
-        conn.close()
+            # Delete associated subscriptions first
+            cursor.execute("DELETE FROM subscriptions WHERE product_id = ?", (product_id,))
+            # Delete product
+            cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
         return True
     except Exception:
         return False
@@ -563,45 +378,41 @@ def create_subscription(product_id: int, frequency: str, is_active: bool = True,
         specific_day_type, weekday, monthday, frequency_preset
     )
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        """INSERT INTO subscriptions 
-           (product_id, frequency, is_active, created_at, start_date, frequency_type, 
-            frequency_value, frequency_unit, specific_day_type, weekday, monthday, next_buy_date, user_id) 
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (product_id, frequency, 1 if is_active else 0, datetime.now().isoformat(),
-         start_date, frequency_type, frequency_value, frequency_unit, 
-         specific_day_type, weekday, monthday, next_buy_date, user_id)
-    )
-    subscription_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        cursor = conn.execute(
+            """INSERT INTO subscriptions 
+               (product_id, frequency, is_active, created_at, start_date, frequency_type, 
+                frequency_value, frequency_unit, specific_day_type, weekday, monthday, next_buy_date, user_id) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (product_id, frequency, 1 if is_active else 0, datetime.now().isoformat(),
+             start_date, frequency_type, frequency_value, frequency_unit, 
+             specific_day_type, weekday, monthday, next_buy_date, user_id)
+        )
+        subscription_id = cursor.lastrowid
     return subscription_id
 
 def get_all_subscriptions(user_id: int = None) -> List[dict]:
     """Get all subscriptions with product details, optionally filtered by user_id"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with db.connection() as conn:
+        cursor = conn.cursor()
     
-    if user_id is not None:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.is_active, s.created_at, s.next_buy_date
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.user_id = ?
-            ORDER BY s.created_at DESC
-        """, (user_id,))
-    else:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.is_active, s.created_at, s.next_buy_date
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            ORDER BY s.created_at DESC
-        """)
+        if user_id is not None:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.is_active, s.created_at, s.next_buy_date
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.user_id = ?
+                ORDER BY s.created_at DESC
+            """, (user_id,))
+        else:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.is_active, s.created_at, s.next_buy_date
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                ORDER BY s.created_at DESC
+            """)
     
-    rows = cursor.fetchall()
-    conn.close()
+        rows = cursor.fetchall()
     
     subscriptions = []
     for row in rows:
@@ -630,28 +441,27 @@ def get_all_subscriptions(user_id: int = None) -> List[dict]:
 
 def get_active_subscriptions(user_id: int = None) -> List[dict]:
     """Get all active subscriptions, optionally filtered by user_id"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with db.connection() as conn:
+        cursor = conn.cursor()
     
-    if user_id is not None:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.is_active = 1 AND s.user_id = ?
-            ORDER BY s.created_at DESC
-        """, (user_id,))
-    else:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.is_active = 1
-            ORDER BY s.created_at DESC
-        """)
+        if user_id is not None:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.is_active = 1 AND s.user_id = ?
+                ORDER BY s.created_at DESC
+            """, (user_id,))
+        else:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.is_active = 1
+                ORDER BY s.created_at DESC
+            """)
     
-    rows = cursor.fetchall()
-    conn.close()
+        rows = cursor.fetchall()
     
     subscriptions = []
     for row in rows:
@@ -667,129 +477,90 @@ def get_active_subscriptions(user_id: int = None) -> List[dict]:
         })
     return subscriptions
 
+def get_subscription_product_url(subscription_id: int, user_id: int) -> Optional[str]:
+    """Get the product URL of a subscription, if it belongs to the user"""
+    with db.connection() as conn:
+        row = conn.execute("""
+            SELECT p.url FROM subscriptions s
+            JOIN products p ON s.product_id = p.id
+            WHERE s.id = ? AND s.user_id = ?
+        """, (subscription_id, user_id)).fetchone()
+    return row[0] if row else None
+
+def get_active_subscription_urls(user_id: int) -> List[str]:
+    """Get the product URLs of all active subscriptions of a user"""
+    with db.connection() as conn:
+        rows = conn.execute("""
+            SELECT p.url FROM subscriptions s
+            JOIN products p ON s.product_id = p.id
+            WHERE s.is_active = 1 AND s.user_id = ?
+        """, (user_id,)).fetchall()
+    return [row[0] for row in rows]
+
 def update_subscription_status(subscription_id: int, is_active: bool, user_id: int = None) -> bool:
     """Update subscription active status"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with db.connection() as conn:
+            cursor = conn.cursor()
         
-        # Verify ownership if user_id is provided
-        if user_id is not None:
-            cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
-            row = cursor.fetchone()
-            if not row or row[0] != user_id:
-                conn.close()
-                return False
+            # Verify ownership if user_id is provided
+            if user_id is not None:
+                cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
+                row = cursor.fetchone()
+                if not row or row[0] != user_id:
+                    return False
         
-        cursor.execute(
-            "UPDATE subscriptions SET is_active = ? WHERE id = ?",
-            (1 if is_active else 0, subscription_id)
-        )
-        conn.commit()
-        conn.close()
+            cursor.execute(
+                "UPDATE subscriptions SET is_active = ? WHERE id = ?",
+                (1 if is_active else 0, subscription_id)
+            )
         return True
     except Exception:
         return False
 
-def update_next_buy_date(subscription_id: int) -> bool:
-    """Update the next buy date for a subscription based on current date"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get subscription details
-        cursor.execute("""
-            SELECT start_date, frequency_type, frequency_value, frequency_unit, 
-                   specific_day_type, weekday, monthday, frequency
-            FROM subscriptions WHERE id = ?
-        """, (subscription_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            conn.close()
-            return False
-        
-        start_date, frequency_type, frequency_value, frequency_unit, specific_day_type, weekday, monthday, frequency = row
-        
-        # Extract preset from frequency if it's a preset type
-        frequency_preset = frequency if frequency_type == "preset" else None
-        
-        # Calculate new next buy date
-        next_buy_date = calculate_next_buy_date(
-            start_date, frequency_type, frequency_value, frequency_unit,
-            specific_day_type, weekday, monthday, frequency_preset
-        )
-        
-        # Update the database
-        cursor.execute(
-            "UPDATE subscriptions SET next_buy_date = ? WHERE id = ?",
-            (next_buy_date, subscription_id)
-        )
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error updating next buy date: {e}")
-        return False
-
-def update_all_next_buy_dates():
-    """Update next buy dates for all subscriptions"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM subscriptions")
-    subscription_ids = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    
-    for sub_id in subscription_ids:
-        update_next_buy_date(sub_id)
-
 def delete_subscription_from_db(subscription_id: int, user_id: int = None) -> bool:
     """Delete a subscription from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with db.connection() as conn:
+            cursor = conn.cursor()
         
-        # Verify ownership if user_id is provided
-        if user_id is not None:
-            cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
-            row = cursor.fetchone()
-            if not row or row[0] != user_id:
-                conn.close()
-                return False
+            # Verify ownership if user_id is provided
+            if user_id is not None:
+                cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
+                row = cursor.fetchone()
+                if not row or row[0] != user_id:
+                    return False
         
-        cursor.execute("DELETE FROM subscriptions WHERE id = ?", (subscription_id,))
-        conn.commit()
-        conn.close()
+            cursor.execute("DELETE FROM subscriptions WHERE id = ?", (subscription_id,))
         return True
     except Exception:
         return False
 
 def get_subscription_by_id(subscription_id: int, user_id: int = None) -> Optional[dict]:
     """Get a subscription by ID"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    if user_id is not None:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, 
-                   s.is_active, s.created_at, s.next_buy_date, s.start_date, s.frequency_type,
-                   s.frequency_value, s.frequency_unit, s.specific_day_type, s.weekday, s.monthday
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.id = ? AND s.user_id = ?
-        """, (subscription_id, user_id))
-    else:
-        cursor.execute("""
-            SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, 
-                   s.is_active, s.created_at, s.next_buy_date, s.start_date, s.frequency_type,
-                   s.frequency_value, s.frequency_unit, s.specific_day_type, s.weekday, s.monthday
-            FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.id = ?
-        """, (subscription_id,))
+    with db.connection() as conn:
+        cursor = conn.cursor()
     
-    row = cursor.fetchone()
-    conn.close()
+        if user_id is not None:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, 
+                       s.is_active, s.created_at, s.next_buy_date, s.start_date, s.frequency_type,
+                       s.frequency_value, s.frequency_unit, s.specific_day_type, s.weekday, s.monthday
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.id = ? AND s.user_id = ?
+            """, (subscription_id, user_id))
+        else:
+            cursor.execute("""
+                SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, 
+                       s.is_active, s.created_at, s.next_buy_date, s.start_date, s.frequency_type,
+                       s.frequency_value, s.frequency_unit, s.specific_day_type, s.weekday, s.monthday
+                FROM subscriptions s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.id = ?
+            """, (subscription_id,))
+    
+        row = cursor.fetchone()
     
     if row:
         next_buy_date_formatted = None
@@ -828,31 +599,28 @@ def update_subscription(subscription_id: int, frequency: str, start_date: str =
                        is_active: bool = True, user_id: int = None) -> bool:
     """Update an existing subscription"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with db.connection() as conn:
+            cursor = conn.cursor()
         
-        # Verify ownership if user_id is provided
-        if user_id is not None:
-            cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
-            row = cursor.fetchone()
-            if not row or row[0] != user_id:
-                conn.close()
-                return False
+            # Verify ownership if user_id is provided
+            if user_id is not None:
+                cursor.execute("SELECT user_id FROM subscriptions WHERE id = ?", (subscription_id,))
+                row = cursor.fetchone()
+                if not row or row[0] != user_id:
+                    return False
         
-        # Calculate next buy date
-        next_buy_date = calculate_next_buy_date(
-            start_date, "preset", None, None, None, None, None, frequency
-        )
+            # Calculate next buy date
+            next_buy_date = calculate_next_buy_date(
+                start_date, "preset", None, None, None, None, None, frequency
+            )
         
-        cursor.execute("""
-            UPDATE subscriptions 
-            SET frequency = ?, start_date = ?, is_active = ?, next_buy_date = ?,
-                frequency_type = ?
-            WHERE id = ?
-        """, (frequency, start_date, 1 if is_active else 0, next_buy_date, "preset", subscription_id))
+            cursor.execute("""
+                UPDATE subscriptions 
+                SET frequency = ?, start_date = ?, is_active = ?, next_buy_date = ?,
+                    frequency_type = ?
+                WHERE id = ?
+            """, (frequency, start_date, 1 if is_active else 0, next_buy_date, "preset", subscription_id))
         
-        conn.commit()
-        conn.close()
         return True
     except Exception as e:
         print(f"Error updating subscription: {e}")
@@ -861,14 +629,11 @@ def update_subscription(subscription_id: int, frequency: str, start_date: str =
 def update_product_status(product_id: int, is_active: bool) -> bool:
     """Update product active status - DEPRECATED, use subscriptions instead"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE products SET is_active = ? WHERE id = ?",
-            (is_active, product_id)
-        )
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            conn.execute(
+                "UPDATE products SET is_active = ? WHERE id = ?",
+                (is_active, product_id)
+            )
         return True
     except Exception:
         return False
@@ -878,6 +643,11 @@ def update_product_status(product_id: int, is_active: bool) -> bool:
 # Initialize database on startup
 init_db()
 
+# Catch up on buy dates that passed while the app was not running
+rolled_over = roll_over_next_buy_dates(db)
+if rolled_over:
+    print(f"✅ Rolled over next buy date for {rolled_over} subscription(s)")
+
 # Initialize APScheduler for daily email job
 scheduler = BackgroundScheduler()
 
@@ -918,13 +688,105 @@ scheduler.add_job(
     replace_existing=True
 )
 
+def run_next_buy_date_rollover():
+    """Function to advance passed next buy dates once per day"""
+    try:
+        count = roll_over_next_buy_dates(db)
+        print(f"✅ Rolled over next buy date for {count} subscription(s)")
+    except Exception as e:
+        print(f"❌ Error rolling over next buy dates: {str(e)}")
+
+# Advance passed next buy dates right after midnight
+scheduler.add_job(
+    run_next_buy_date_rollover,
+    trigger=CronTrigger(hour=0, minute=1),  # Run at 00:01 every day
+    id='daily_next_buy_date_rollover',
+    name='Advance passed next buy dates',
+    replace_existing=True
+)
+
 # Start the scheduler
 scheduler.start()
 print("✅ Scheduler started - Email job will run daily at 9:00 AM")
 
-# Session storage (replace with Redis or database later)
-sessions = {}
-pending_2fa = {}  # Temporary storage for pending 2FA logins
+# Session storage - persisted in the database and shared between workers
+SESSION_TTL = 86400  # Matches the session cookie max_age
+PENDING_2FA_TTL = 600  # Verification codes expire after 10 minutes
+sessions = SessionStore(db, "session", ttl=SESSION_TTL)
+pending_2fa = SessionStore(db, "pending_2fa", ttl=PENDING_2FA_TTL)  # Temporary storage for pending 2FA logins
+
+def evict_expired_sessions():
+    """Function to delete expired sessions from the session stores"""
+    try:
+        removed = sessions.evict_expired() + pending_2fa.evict_expired()
+        if removed:
+            print(f"✅ Removed {removed} expired session(s)")
+    except Exception as e:
+        print(f"❌ Error evicting expired sessions: {str(e)}")
+
+scheduler.add_job(
+    evict_expired_sessions,
+    trigger=IntervalTrigger(minutes=15),
+    id='session_eviction',
+    name='Delete expired sessions',
+    replace_existing=True
+)
+
+# Scraped product previews, shared by all users (see product_cache.py); page downloads are rate limited per host
+galaxus_rate_limiter = HostRateLimiter()
+product_cache = ProductCache(db, fetch=rate_limited(recognize_product_id, galaxus_rate_limiter))
+
+def evict_product_cache():
+    """Function to drop outdated and least recently used product previews"""
+    try:
+        removed = product_cache.evict()
+        if removed:
+            print(f"✅ Removed {removed} cached product(s)")
+    except Exception as e:
+        print(f"❌ Error evicting product cache: {str(e)}")
+
+scheduler.add_job(
+    evict_product_cache,
+    trigger=IntervalTrigger(hours=1),
+    id='product_cache_eviction',
+    name='Delete outdated product previews',
+    replace_existing=True
+)
+
+def refresh_product_prices():
+    """Function to re-check the prices of stored products, soonest next buy first"""
+    try:
+        stats = refresh_prices(
+            db, fetch=rate_limited(fetch_price, galaxus_rate_limiter), on_change=product_cache.invalidate
+        )
+        if stats["checked"]:
+            print(f"✅ Checked {stats['checked']} product price(s): {stats['changed']} changed, {stats['failed']} failed")
+    except Exception as e:
+        print(f"❌ Error refreshing product prices: {str(e)}")
+
+if PRICE_REFRESH_INTERVAL_MINUTES > 0:
+    scheduler.add_job(
+        refresh_product_prices,
+        trigger=IntervalTrigger(minutes=PRICE_REFRESH_INTERVAL_MINUTES),
+        id='price_refresh',
+        name='Refresh stored product prices',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+# Cart jobs are processed by cart workers (python -m app.cart_worker); without separate
+# workers, the web app runs one in a background thread
+CART_INPROCESS_WORKER = os.getenv("CART_INPROCESS_WORKER", "1") == "1"
+cart_worker_stop = threading.Event()
+
+if CART_INPROCESS_WORKER:
+    from app.cart_worker import run_worker
+    threading.Thread(target=run_worker, args=(db, cart_worker_stop), name="cart-worker", daemon=True).start()
+    
+    # Start logged-in browsers for the configured Digitec account, so the first cart job doesn't wait for them
+    if os.getenv("DIGITEC_EMAIL") and os.getenv("DRIVER_POOL_WARMUP", "1") == "1":
+        get_driver_pool(os.getenv("DIGITEC_EMAIL"), os.getenv("DIGITEC_PASSWORD")).warm_in_background()
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
@@ -963,20 +825,42 @@ class Product(BaseModel):
     added_at: datetime
     is_active: bool = False
 
+def create_session_data(user: dict) -> dict:
+    """Build the session payload, so later requests know the user without a database lookup"""
+    return {
+        "user_id": user["id"],
+        "email": user["email"],
+        "username": user["username"],
+        "created_at": datetime.now().isoformat()
+    }
+
+def get_session_user(request: Request) -> Optional[dict]:
+    """
+    FastAPI dependency resolving the logged-in user once per request
+    
+    Returns:
+        dict: {"id", "email", "username"} or None if not logged in
+    """
+    if hasattr(request.state, "user"):
+        return request.state.user
+    
+    user = None
+    session = sessions.get(request.cookies.get("session_token"))
+    if session:
+        user = {"id": session["user_id"], "email": session["email"], "username": session.get("username")}
+    
+    request.state.user = user
+    return user
+
 def get_current_user(request: Request) -> Optional[str]:
-    session_token = request.cookies.get("session_token")
-    if session_token and session_token in sessions:
-        return sessions[session_token]["email"]
-    return None
+    """Get the current user's email from the session"""
+    user = get_session_user(request)
+    return user["email"] if user else None
 
 def get_current_user_id(request: Request) -> Optional[int]:
     """Get the current user's ID from the session"""
-    email = get_current_user(request)
-    if email:
-        user = get_user_by_email(email)
-        if user:
-            return user["id"]
-    return None
+    user = get_session_user(request)
+    return user["id"] if user else None
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -984,19 +868,12 @@ async def login_page(request: Request):
 
 @app.post("/login")
 async def login(email: str = Form(...), password: str = Form(...)):
-    user = get_user_by_email(email)
+    user = await run_db(authenticate_user, email, password)
     if not user:
         return RedirectResponse(url="/login?error=1", status_code=303)
     
-    if not verify_password(password, user["hashed_password"]):
-        return RedirectResponse(url="/login?error=1", status_code=303)
-    
     # Log in directly without 2FA
-    session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {
-        "email": email,
-        "created_at": datetime.now()
-    }
+    session_token = await run_db(sessions.create, create_session_data(user))
     
     response = RedirectResponse(url="/", status_code=303)
     response.set_cookie(key="session_token", value=session_token, httponly=True, max_age=86400)
@@ -1004,8 +881,7 @@ async def login(email: str = Form(...), password: str = Form(...)):
 
 @app.get("/verify-2fa", response_class=HTMLResponse)
 async def verify_2fa_page(request: Request):
-    pending_token = request.cookies.get("pending_2fa_token")
-    if not pending_token or pending_token not in pending_2fa:
+    if not await run_db(pending_2fa.get, request.cookies.get("pending_2fa_token")):
         return RedirectResponse(url="/login", status_code=303)
     
     return templates.TemplateResponse("verify_2fa.html", {"request": request})
@@ -1013,29 +889,24 @@ async def verify_2fa_page(request: Request):
 @app.post("/verify-2fa")
 async def verify_2fa(request: Request, code: str = Form(...)):
     pending_token = request.cookies.get("pending_2fa_token")
-    
-    if not pending_token or pending_token not in pending_2fa:
+    pending_info = await run_db(pending_2fa.get, pending_token)
+    if not pending_info:
         return RedirectResponse(url="/login?error=1", status_code=303)
     
-    pending_info = pending_2fa[pending_token]
-    user = get_user_by_id(pending_info["user_id"])
+    user = await run_db(get_user_by_id, pending_info["user_id"])
     
     if not user:
         return RedirectResponse(url="/login?error=1", status_code=303)
     
     # Verify the code
-    if not verify_code(user["id"], code):
+    if not await run_db(verify_code, user["id"], code):
         return RedirectResponse(url="/verify-2fa?error=invalid_code", status_code=303)
     
     # Code is valid, create session
-    session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {
-        "username": user["username"],
-        "created_at": datetime.now()
-    }
+    session_token = await run_db(sessions.create, create_session_data(user))
     
     # Clean up pending 2FA
-    del pending_2fa[pending_token]
+    await run_db(pending_2fa.delete, pending_token)
     
     response = RedirectResponse(url="/", status_code=303)
     response.set_cookie(key="session_token", value=session_token, httponly=True, max_age=86400)
@@ -1044,9 +915,7 @@ async def verify_2fa(request: Request, code: str = Form(...)):
 
 @app.get("/logout")
 async def logout(request: Request):
-    session_token = request.cookies.get("session_token")
-    if session_token in sessions:
-        del sessions[session_token]
+    await run_db(sessions.delete, request.cookies.get("session_token"))
     
     response = RedirectResponse(url="/login", status_code=303)
     response.delete_cookie(key="session_token")
@@ -1059,7 +928,7 @@ async def register_page(request: Request):
 @app.post("/register")
 async def register(email: str = Form(...), password: str = Form(...), password_confirm: str = Form(...)):
     # Validate inputs
-    if get_user_by_email(email):
+    if await run_db(get_user_by_email, email):
         return RedirectResponse(url="/register?error=email_exists", status_code=303)
     
     # Validate email format (basic check)
@@ -1073,45 +942,40 @@ async def register(email: str = Form(...), password: str = Form(...), password_c
         return RedirectResponse(url="/register?error=password_mismatch", status_code=303)
     
     # Create new user - use email as username too
-    if not create_user(email, email, password):
+    if not await run_db(create_user, email, email, password):
         return RedirectResponse(url="/register?error=email_exists", status_code=303)
     
     # Auto-login after registration
-    session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {
-        "email": email,
-        "created_at": datetime.now()
-    }
+    new_user = await run_db(get_user_by_email, email)
+    session_token = await run_db(sessions.create, create_session_data(new_user))
     
     response = RedirectResponse(url="/", status_code=303)
     response.set_cookie(key="session_token", value=session_token, httponly=True, max_age=86400)
     return response
 
 @app.get("/change-password", response_class=HTMLResponse)
-async def change_password_page(request: Request):
-    user = get_current_user(request)
+async def change_password_page(request: Request, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    return templates.TemplateResponse("change_password.html", {"request": request, "username": user})
+    return templates.TemplateResponse("change_password.html", {"request": request, "username": user["email"]})
 
 @app.post("/change-password")
 async def change_password(
     request: Request,
     current_password: str = Form(...),
     new_password: str = Form(...),
-    new_password_confirm: str = Form(...)
+    new_password_confirm: str = Form(...),
+    user: Optional[dict] = Depends(get_session_user)
 ):
-    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_data = get_user_by_email(user)
-    if not user_data:
+    if not await run_db(get_user_by_email, user["email"]):
         return RedirectResponse(url="/login", status_code=303)
     
     # Verify current password
-    if not verify_password(current_password, user_data["hashed_password"]):
+    if not await run_db(authenticate_user, user["email"], current_password):
         return RedirectResponse(url="/change-password?error=wrong_password", status_code=303)
     
     # Validate new password
@@ -1122,35 +986,30 @@ async def change_password(
         return RedirectResponse(url="/change-password?error=password_mismatch", status_code=303)
     
     # Update password
-    if not update_user_password(user, new_password):
+    if not await run_db(update_user_password, user["email"], new_password):
         return RedirectResponse(url="/change-password?error=update_failed", status_code=303)
     
     return RedirectResponse(url="/change-password?success=1", status_code=303)
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    user = get_current_user(request)
+async def home(request: Request, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
-    # Update next buy dates for all subscriptions
-    update_all_next_buy_dates()
-    
-    all_products = get_all_products(user_id)
-    all_subscriptions = get_all_subscriptions(user_id)
+    all_products = await run_db(get_all_products, user_id)
+    all_subscriptions = await run_db(get_all_subscriptions, user_id)
     
     return templates.TemplateResponse("index.html", {
         "request": request,
         "all_products": all_products,
         "all_subscriptions": all_subscriptions,
-        "username": user
+        "username": user["email"]
     })
 
 @app.post("/preview-product")
-async def preview_product(request: Request):
-    user = get_current_user(request)
+async def preview_product(request: Request, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return JSONResponse({"success": False, "error": "Not authenticated"}, status_code=401)
     
@@ -1161,8 +1020,8 @@ async def preview_product(request: Request):
         if not url:
             return JSONResponse({"success": False, "error": "URL is required"})
         
-        # Scrape product data from URL
-        product_data = recognize_products(url)
+        # Cached by product id; only scraped if unknown or outdated
+        product_data = await run_io(product_cache.get, url)
         
         if product_data:
             return JSONResponse({
@@ -1176,16 +1035,70 @@ async def preview_product(request: Request):
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)})
 
+@app.post("/preview-products")
+async def preview_products_route(request: Request, user: Optional[dict] = Depends(get_session_user)):
+    """
+    Previews for a list of product URLs ({"urls": [...]}), deduplicated by product id.
+    With "stream": true (or Accept: application/x-ndjson) every result is sent
+    as one JSON line as soon as it is ready.
+    """
+    if not user:
+        return JSONResponse({"success": False, "error": "Not authenticated"}, status_code=401)
+    
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JSONResponse({"success": False, "error": "Invalid request body"}, status_code=400)
+    urls = data.get("urls") or []
+    if not isinstance(urls, list) or not urls:
+        return JSONResponse({"success": False, "error": "URLs are required"}, status_code=400)
+    if len(urls) > BULK_PREVIEW_MAX_URLS:
+        return JSONResponse({"success": False, "error": f"Maximal {BULK_PREVIEW_MAX_URLS} URLs pro Anfrage"}, status_code=400)
+    urls = [str(url).strip() for url in urls]
+    
+    if data.get("stream") or "application/x-ndjson" in request.headers.get("accept", ""):
+        # Sync generator: Starlette pulls it from its threadpool
+        lines = (json.dumps(result) + "\n" for result in preview_products(urls, product_cache.get_by_id))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    
+    results = await run_io(list, preview_products(urls, product_cache.get_by_id))
+    positions = {}
+    for position, url in enumerate(urls):
+        positions.setdefault(url, position)
+    results.sort(key=lambda result: positions[result["url"]])
+    return JSONResponse({"success": True, "results": results})
+
+@app.post("/add-products")
+async def add_products(request: Request, user: Optional[dict] = Depends(get_session_user)):
+    """Add previewed products in one go ({"products": [{"url", "title", "image_url", "price"}, ...]})"""
+    if not user:
+        return JSONResponse({"success": False, "error": "Not authenticated"}, status_code=401)
+    
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JSONResponse({"success": False, "error": "Invalid request body"}, status_code=400)
+    products = data.get("products") or []
+    if not isinstance(products, list) or not all(isinstance(product, dict) for product in products):
+        return JSONResponse({"success": False, "error": "Products are required"}, status_code=400)
+    
+    result = await run_db(add_products_to_db, products, user["id"])
+    return JSONResponse({"success": True, "added": len(result["added"]), "skipped": result["skipped"],
+                         "product_ids": result["added"]})
+
 @app.post("/add-product")
-async def add_product(request: Request, url: str = Form(...), title: str = Form(...), image_url: str = Form(None), price: str = Form(None)):
-    user = get_current_user(request)
+async def add_product(request: Request, url: str = Form(...), title: str = Form(...), image_url: str = Form(None), price: str = Form(None), user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
     # Add product with already-scraped data
-    add_product_to_db(url, title, image_url, price, user_id)
+    await run_db(add_product_to_db, url, title, image_url, price, user_id)
     
     return RedirectResponse(url="/", status_code=303)
 
@@ -1195,18 +1108,19 @@ async def create_subscription_route(
     product_id: int = Form(...), 
     start_date: str = Form(...),
     frequency: str = Form(...),
-    activate: Optional[str] = Form(None)
+    activate: Optional[str] = Form(None),
+    user: Optional[dict] = Depends(get_session_user)
 ):
-    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
     # Checkbox will send "on" if checked, None if unchecked
     is_active = activate == "on"
     
-    create_subscription(
+    await run_db(
+        create_subscription,
         product_id=product_id,
         frequency=frequency,
         is_active=is_active,
@@ -1223,45 +1137,41 @@ async def create_subscription_route(
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/activate-subscription/{subscription_id}")
-async def activate_subscription(request: Request, subscription_id: int):
-    user = get_current_user(request)
+async def activate_subscription(request: Request, subscription_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
-    update_subscription_status(subscription_id, True, user_id)
+    user_id = user["id"]
+    await run_db(update_subscription_status, subscription_id, True, user_id)
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/deactivate-subscription/{subscription_id}")
-async def deactivate_subscription(request: Request, subscription_id: int):
-    user = get_current_user(request)
+async def deactivate_subscription(request: Request, subscription_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
-    update_subscription_status(subscription_id, False, user_id)
+    user_id = user["id"]
+    await run_db(update_subscription_status, subscription_id, False, user_id)
     return RedirectResponse(url="/", status_code=303)
 
 @app.delete("/delete-subscription/{subscription_id}")
-async def delete_subscription(request: Request, subscription_id: int):
-    user = get_current_user(request)
+async def delete_subscription(request: Request, subscription_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = get_current_user_id(request)
-    success = delete_subscription_from_db(subscription_id, user_id)
+    user_id = user["id"]
+    success = await run_db(delete_subscription_from_db, subscription_id, user_id)
     if not success:
         raise HTTPException(status_code=403, detail="Not authorized to delete this subscription")
     return {"success": True}
 
 @app.get("/get-subscription/{subscription_id}")
-async def get_subscription(request: Request, subscription_id: int):
-    user = get_current_user(request)
+async def get_subscription(request: Request, subscription_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = get_current_user_id(request)
-    subscription = get_subscription_by_id(subscription_id, user_id)
+    user_id = user["id"]
+    subscription = await run_db(get_subscription_by_id, subscription_id, user_id)
     
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
@@ -1274,136 +1184,212 @@ async def update_subscription_route(
     subscription_id: int,
     frequency: str = Form(...),
     start_date: str = Form(...),
-    activate: Optional[str] = Form(None)
+    activate: Optional[str] = Form(None),
+    user: Optional[dict] = Depends(get_session_user)
 ):
-    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     is_active = activate == "on"
     
-    success = update_subscription(subscription_id, frequency, start_date, is_active, user_id)
+    success = await run_db(update_subscription, subscription_id, frequency, start_date, is_active, user_id)
     
     if not success:
         raise HTTPException(status_code=403, detail="Not authorized to update this subscription")
     
     return RedirectResponse(url="/", status_code=303)
 
+def cart_job_accepted(job_id: int) -> dict:
+    """Response for a newly queued cart job"""
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/cart-jobs/{job_id}",
+        "events_url": f"/cart-jobs/{job_id}/events",
+        "message": "Warenkorb-Auftrag wurde eingereiht"
+    }
+
+def cart_job_status(job: dict) -> dict:
+    """Public view of a cart job (without internal worker details)"""
+    status = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "kind": job["kind"],
+        "products": len(job["product_urls"]),
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"]
+    }
+    if job["status"] == "queued":
+        status["queue_position"] = queue_position(db, job["id"])
+    return status
+
+@app.get("/cart-jobs/{job_id}")
+async def get_cart_job(request: Request, job_id: int, user: Optional[dict] = Depends(get_session_user)):
+    """Status and result of a cart job"""
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    job = await run_db(get_job, db, job_id, user["id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Cart job not found")
+    return await run_db(cart_job_status, job)
+
+CART_EVENTS_POLL_INTERVAL = float(os.getenv("CART_EVENTS_POLL_INTERVAL", "0.5"))
+CART_EVENTS_KEEPALIVE = 15
+
+def sse_message(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Events message"""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return message + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/cart-jobs/{job_id}/events")
+async def stream_cart_job_events(request: Request, job_id: int, user: Optional[dict] = Depends(get_session_user)):
+    """
+    Server-Sent Events stream of a cart job: "status" whenever the job state
+    changes, "started" / "added" / "failed" per product as the worker gets to
+    it and a final "result" before the stream ends. Reconnecting browsers send
+    Last-Event-ID and only get the events they missed.
+    """
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    if not await run_db(get_job, db, job_id, user["id"]):
+        raise HTTPException(status_code=404, detail="Cart job not found")
+    
+    try:
+        last_event_id = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        last_event_id = 0
+    
+    async def events():
+        nonlocal last_event_id
+        last_status = None
+        last_sent = time.monotonic()
+        yield "retry: 2000\n\n"
+        while not await request.is_disconnected():
+            # Read the job before its events: once it is finished, all its events are written
+            job = await run_db(get_job, db, job_id)
+            # Page through the whole backlog, a finished job's last events must not be cut off
+            pages = iter_job_events(db, job_id, last_event_id)
+            while events_page := await run_db(next, pages, None):
+                for event in events_page:
+                    last_event_id = event["id"]
+                    yield sse_message(event["event"], event["data"], event["id"])
+                last_sent = time.monotonic()
+            
+            status = await run_db(cart_job_status, job)
+            if job["status"] in ("done", "failed"):
+                yield sse_message("result", status)
+                return
+            if (status["status"], status.get("queue_position")) != last_status:
+                last_status = (status["status"], status.get("queue_position"))
+                yield sse_message("status", status)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent > CART_EVENTS_KEEPALIVE:
+                # Comment line keeps proxies from closing the idle connection
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(CART_EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/cart-jobs")
+async def list_cart_jobs(request: Request, user: Optional[dict] = Depends(get_session_user)):
+    """The user's most recent cart jobs"""
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    jobs = await run_db(get_recent_jobs, db, user["id"])
+    return {"jobs": [await run_db(cart_job_status, job) for job in jobs]}
+
 @app.post("/add-to-cart/{subscription_id}")
-async def add_subscription_to_cart(request: Request, subscription_id: int):
-    """Add a single subscription product to Digitec cart"""
-    user = get_current_user(request)
+async def add_subscription_to_cart(request: Request, subscription_id: int, user: Optional[dict] = Depends(get_session_user)):
+    """Queue adding a single subscription product to the Digitec cart"""
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
     try:
         # Get subscription details - verify ownership
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.url FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.id = ? AND s.user_id = ?
-        """, (subscription_id, user_id))
-        row = cursor.fetchone()
-        conn.close()
+        product_url = await run_db(get_subscription_product_url, subscription_id, user_id)
         
-        if not row:
+        if not product_url:
             return JSONResponse({"success": False, "message": "Abo nicht gefunden"}, status_code=404)
         
-        product_url = row[0]
-        
-        # Get Digitec credentials from environment or database
-        # For now, using environment variables
-        digitec_email = os.getenv("DIGITEC_EMAIL")
-        digitec_password = os.getenv("DIGITEC_PASSWORD")
+        # Queue the cart job; a cart worker adds the product, the UI polls /cart-jobs/{job_id}
+        job_id = await run_db(enqueue_job, db, user_id, [product_url], "single")
         
-        # Add to cart
-        result = add_product_to_cart(product_url, digitec_email, digitec_password)
-        
-        return JSONResponse(result)
+        return JSONResponse(cart_job_accepted(job_id), status_code=202)
         
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
 @app.post("/add-all-active-to-cart")
-async def add_all_active_subscriptions_to_cart(request: Request):
-    """Add all active subscriptions to Digitec cart"""
-    user = get_current_user(request)
+async def add_all_active_subscriptions_to_cart(request: Request, user: Optional[dict] = Depends(get_session_user)):
+    """Queue adding all active subscriptions to the Digitec cart"""
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
     try:
         # Get all active subscriptions for this user
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.url FROM subscriptions s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.is_active = 1 AND s.user_id = ?
-        """, (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        product_urls = await run_db(get_active_subscription_urls, user_id)
         
-        if not rows:
+        if not product_urls:
             return JSONResponse({"success": False, "message": "Keine aktiven Abos gefunden"})
         
-        product_urls = [row[0] for row in rows]
+        # Queue the cart job; a cart worker adds the products, the UI polls /cart-jobs/{job_id}
+        job_id = await run_db(enqueue_job, db, user_id, product_urls, "batch")
         
-        # Get Digitec credentials
-        digitec_email = os.getenv("DIGITEC_EMAIL")
-        digitec_password = os.getenv("DIGITEC_PASSWORD")
-        
-        # Add all to cart
-        result = add_multiple_products_to_cart(product_urls, digitec_email, digitec_password)
-        
-        return JSONResponse(result)
+        return JSONResponse(cart_job_accepted(job_id), status_code=202)
         
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
 @app.post("/activate/{product_id}")
-async def activate_product(request: Request, product_id: int):
-    user = get_current_user(request)
+async def activate_product(request: Request, product_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    update_product_status(product_id, True)
+    await run_db(update_product_status, product_id, True)
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/deactivate/{product_id}")
-async def deactivate_product(request: Request, product_id: int):
-    user = get_current_user(request)
+async def deactivate_product(request: Request, product_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    update_product_status(product_id, False)
+    await run_db(update_product_status, product_id, False)
     return RedirectResponse(url="/", status_code=303)
 
 @app.delete("/delete/{product_id}")
-async def delete_product(request: Request, product_id: int):
-    user = get_current_user(request)
+async def delete_product(request: Request, product_id: int, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = get_current_user_id(request)
-    success = delete_product_from_db(product_id, user_id)
+    user_id = user["id"]
+    success = await run_db(delete_product_from_db, product_id, user_id)
     if not success:
         raise HTTPException(status_code=403, detail="Not authorized to delete this product")
     return {"success": True}
 
 @app.get("/api/products")
-async def get_products(request: Request):
-    user = get_current_user(request)
+async def get_products(request: Request, user: Optional[dict] = Depends(get_session_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    return {"products": get_all_products()}
+    return {"products": await run_db(get_all_products)}
 
 
 @app.post("/send")
@@ -1413,9 +1399,8 @@ def send_mail(payload: MailIn, bg: BackgroundTasks):
     return {"status": "queued"}
 
 @app.post("/send-subscription-email")
-async def send_subscription_email_route(request: Request):
+async def send_subscription_email_route(request: Request, user: Optional[dict] = Depends(get_session_user)):
     """Run the email_job.py script to send emails to users with subscriptions due tomorrow"""
-    user = get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -1439,7 +1424,8 @@ async def send_subscription_email_route(request: Request):
         print(f"Running email job manually at {datetime.now()}")
         
         # Run the email_job.py script using the same Python interpreter
-        result = subprocess.run(
+        result = await run_io(
+            subprocess.run,
             [sys.executable, email_job_path],
             capture_output=True,
             text=True,
@@ -1473,16 +1459,15 @@ async def send_subscription_email_route(request: Request):
         })
 
 @app.get("/email-preview", response_class=HTMLResponse)
-async def email_preview(request: Request):
+async def email_preview(request: Request, user: Optional[dict] = Depends(get_session_user)):
     """Generate an email preview with all active user subscriptions"""
-    user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     
-    user_id = get_current_user_id(request)
+    user_id = user["id"]
     
     # Get all active subscriptions for the user
-    subscriptions = get_active_subscriptions(user_id)
+    subscriptions = await run_db(get_active_subscriptions, user_id)
     
     # Read the email template
     template_path = os.path.join(os.path.dirname(__file__), "templates", "E-Mail-Template.html")
@@ -1553,6 +1538,13 @@ async def email_preview(request: Request):
 def shutdown_event():
     scheduler.shutdown()
     print("✅ Scheduler stopped")
+    cart_worker_stop.set()
+    shutdown_executors()
+    close_driver_pools()
+    flush_debug_artifacts(DEBUG_ARTIFACTS_FLUSH_TIMEOUT)
+    selector_stats.save()
+    close_http_clients()
+    db.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+"""
+Benchmark for the Selenium browsing profiles used by the cart automation
+Opens the same product pages with the full profile and the lean profile
+(eager page loads, no images, blocked media/fonts/trackers) and prints, per
+profile, how long driver.get() takes, how long until #addToCartButton is
+clickable, and the browser's memory use.
+
+Needs a local Chrome (or SELENIUM_URL). Process memory is only reported if
+psutil is installed.
+
+Usage:
+    python benchmarks/driver_profiles.py URL [URL ...] [--repeat 3] [--no-headless]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from selenium.common.exceptions import TimeoutException  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+from selenium.webdriver.support import expected_conditions as EC  # noqa: E402
+from selenium.webdriver.support.ui import WebDriverWait  # noqa: E402
+
+from app.backend.add_to_cart import make_driver  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def browser_rss_mb(driver):
+    """Resident memory of chromedriver and all browser processes it started"""
+    if psutil is None or not getattr(getattr(driver, "service", None), "process", None):
+        return None
+    root = psutil.Process(driver.service.process.pid)
+    processes = [root] + root.children(recursive=True)
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 1024 / 1024
+
+
+def js_heap_mb(driver):
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return None
+    driver.execute_cdp_cmd("Performance.enable", {})
+    metrics = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+    return metrics.get("JSHeapUsedSize", 0) / 1024 / 1024
+
+
+def run_profile(lean, urls, repeat, headless):
+    driver = make_driver(headless=headless, lean=lean)
+    load_times, ready_times = [], []
+    try:
+        for _ in range(repeat):
+            for url in urls:
+                driver.delete_all_cookies()
+                start = time.perf_counter()
+                driver.get(url)
+                load_times.append(time.perf_counter() - start)
+                try:
+                    WebDriverWait(driver, 30, poll_frequency=0.05).until(
+                        EC.element_to_be_clickable((By.ID, "addToCartButton"))
+                    )
+                    ready_times.append(time.perf_counter() - start)
+                except TimeoutException:
+                    print(f"  #addToCartButton not found on {url}")
+        return {
+            "get": load_times,
+            "ready": ready_times,
+            "rss_mb": browser_rss_mb(driver),
+            "heap_mb": js_heap_mb(driver),
+        }
+    finally:
+        driver.quit()
+
+
+def fmt(values):
+    if not values:
+        return "      n/a"
+    return f"{statistics.median(values):6.2f}s (max {max(values):.2f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-headless", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'driver.get':>24} {'button ready':>24} {'RSS':>10} {'JS heap':>10}")
+    for name, lean in (("full", False), ("lean", True)):
+        result = run_profile(lean, args.urls, args.repeat, not args.no_headless)
+        rss = f"{result['rss_mb']:.0f} MB" if result["rss_mb"] is not None else "n/a"
+        heap = f"{result['heap_mb']:.0f} MB" if result["heap_mb"] is not None else "n/a"
+        print(f"{name:<8} {fmt(result['get']):>24} {fmt(result['ready']):>24} {rss:>10} {heap:>10}")
+
+
+if __name__ == "__main__":
+    main()
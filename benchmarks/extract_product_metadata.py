@@ -0,0 +1,73 @@
+"""
+Benchmark for extracting title, image and price from a parsed product page
+Compares the three separate pickers (pick_title, pick_first_image_url,
+get_price) with the single-pass extract_metadata on saved pages. Parsing is
+done once up front, so only the extraction is timed. Each page is also run
+without its price meta tags, which sends get_price through its class-name
+and full-text regex fallbacks.
+
+Usage:
+    python benchmarks/extract_product_metadata.py [PAGE.html ...] [--repeat 50]
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.backend.recognize_products import (  # noqa: E402
+    extract_metadata,
+    get_price,
+    make_soup,
+    pick_first_image_url,
+    pick_title,
+)
+
+FIXTURES = Path(__file__).resolve().parent.parent / "app" / "backend" / "tests" / "fixtures"
+URL = "https://www.galaxus.ch/de/product/benchmark-1234567"
+PRICE_META = re.compile(r"<meta[^>]+(itemprop=[\"']price[\"']|product:price:amount|twitter:data1)[^>]*>", re.I)
+
+
+def pickers(soup):
+    return {"title": pick_title(soup), "image_url": pick_first_image_url(soup, URL), "price": get_price(soup)}
+
+
+def single_pass(soup):
+    return extract_metadata(soup, URL)
+
+
+def mean_ms(func, soup, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(soup)
+        times.append(time.perf_counter() - started)
+    return statistics.mean(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", type=Path, help="Saved product pages (default: test fixtures)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"  {'page':<40} {'pickers ms':>11} {'single ms':>10} {'speedup':>8}")
+    for page in args.pages or sorted(FIXTURES.glob("*.html")):
+        html = page.read_text(encoding="utf-8", errors="replace")
+        variants = [(page.name, html), (f"{page.name} (no price meta)", PRICE_META.sub("", html))]
+        for name, document in variants:
+            soup = make_soup(document)
+            if pickers(soup) != single_pass(soup):
+                print(f"  {name:<40} results differ: {pickers(soup)} != {single_pass(soup)}")
+                continue
+            before = mean_ms(pickers, soup, args.repeat)
+            after = mean_ms(single_pass, soup, args.repeat)
+            print(f"  {name:<40} {before:>11.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for parsing product pages in recognize_products
+Parses saved product pages with every installed BeautifulSoup tree builder
+(html.parser, lxml, html5lib), once as the whole document and once as each
+prefix fetch_document can stop at (after the structured product data, or
+the <head> with HTML_STRUCTURED_DATA=0), and prints the mean time and the
+peak Python memory per run.
+
+Pages with complete JSON-LD / __NEXT_DATA__ product data skip the tree
+builder entirely (see structured_data.py), so their parser rows are alike.
+
+tracemalloc only sees memory allocated through Python, so lxml's libxml2
+tree is under-reported.
+
+Usage:
+    python benchmarks/parse_product_page.py [PAGE.html ...] [--repeat 20]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib.util import find_spec
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.backend.recognize_products import parse_product_html, split_head, split_structured  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent.parent / "app" / "backend" / "tests" / "fixtures"
+PARSERS = [("html.parser", None), ("lxml", "lxml"), ("html5lib", "html5lib")]
+URL = "https://www.galaxus.ch/de/product/benchmark-1234567"
+
+
+def available_parsers():
+    return [name for name, module in PARSERS if module is None or find_spec(module)]
+
+
+def measure(html: bytes, parser: str, repeat: int):
+    """Mean seconds per parse and peak traced memory (MB) of one parse"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse_product_html(html, URL, parser)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    parse_product_html(html, URL, parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.mean(times), peak / 1024 / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", type=Path, help="Saved product pages (default: test fixtures)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(FIXTURES.glob("*.html"))
+    parsers = available_parsers()
+    print(f"Parsers: {', '.join(parsers)}\n")
+
+    for page in pages:
+        html = page.read_bytes()
+        prefixes = [("struct", split_structured(html)), ("head", split_head(html))]
+        sizes = ", ".join(f"{mode} {len(prefix) / 1024:.1f} KB" for mode, prefix in prefixes if prefix)
+        print(f"{page.name}: {len(html) / 1024:.0f} KB" + (f", {sizes}" if sizes else ""))
+        print(f"  {'parser':<12} {'mode':<6} {'ms/parse':>9} {'peak MB':>8}  result")
+
+        documents = [("full", html)] + [(mode, prefix) for mode, prefix in prefixes if prefix]
+        for name in parsers:
+            for mode, document in documents:
+                seconds, peak, result = measure(document, name, args.repeat)
+                print(f"  {name:<12} {mode:<6} {seconds * 1000:>9.2f} {peak:>8.2f}  {result['price']!r} {(result['title'] or '')[:30]!r}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
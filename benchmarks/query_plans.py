@@ -0,0 +1,129 @@
+"""
+Benchmark for the hot products/subscriptions queries
+Builds a synthetic database, then prints the query plan and timing of each
+hot query on the baseline schema (no secondary indexes) and after all
+migrations have been applied.
+
+Usage:
+    python benchmarks/query_plans.py [--users 2000] [--products-per-user 20]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app" / "backend"))
+
+from migrations import migrate  # noqa: E402
+
+PRESETS = ["täglich", "wöchentlich", "alle 2 Wochen", "monatlich", "vierteljährlich", "jährlich"]
+
+# (name, sql, params) - mirrors the queries issued by app/main.py and subscription_emailer.py
+HOT_QUERIES = [
+    ("get_user_by_email", """
+        SELECT id, username, email, hashed_password, two_factor_enabled, created_at FROM users WHERE email = ?
+    """, lambda u: (f"user{u}@example.com",)),
+    ("get_all_products", """
+        SELECT p.id, p.url, p.name, p.image_url, p.price, p.added_at,
+               CASE WHEN EXISTS (
+                   SELECT 1 FROM subscriptions s
+                   WHERE s.product_id = p.id AND s.is_active = 1 AND s.user_id = ?
+               ) THEN 1 ELSE 0 END as has_active_subscription
+        FROM products p
+        WHERE p.user_id = ?
+        ORDER BY p.added_at DESC
+    """, lambda u: (u, u)),
+    ("get_all_subscriptions", """
+        SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.is_active, s.created_at, s.next_buy_date
+        FROM subscriptions s
+        JOIN products p ON s.product_id = p.id
+        WHERE s.user_id = ?
+        ORDER BY s.created_at DESC
+    """, lambda u: (u,)),
+    ("get_active_subscriptions", """
+        SELECT s.id, s.product_id, p.name, p.url, p.image_url, p.price, s.frequency, s.created_at
+        FROM subscriptions s
+        JOIN products p ON s.product_id = p.id
+        WHERE s.is_active = 1 AND s.user_id = ?
+        ORDER BY s.created_at DESC
+    """, lambda u: (u,)),
+    ("subscriptions_due_on", """
+        SELECT s.id, s.user_id FROM subscriptions s
+        WHERE s.is_active = 1 AND s.next_buy_date = ?
+    """, lambda u: ((date.today() + timedelta(days=1)).isoformat(),)),
+    ("verify_code", """
+        SELECT id, expires_at FROM verification_codes
+        WHERE user_id = ? AND code = ? AND used = 0
+        ORDER BY created_at DESC LIMIT 1
+    """, lambda u: (u, "123456")),
+]
+
+
+def populate(conn: sqlite3.Connection, users: int, products_per_user: int):
+    rng = random.Random(42)
+    now = datetime.now()
+    conn.executemany(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+        ((f"user{u}", f"user{u}@example.com", "x") for u in range(1, users + 1))
+    )
+    conn.executemany(
+        "INSERT INTO products (url, name, price, added_at, user_id) VALUES (?, ?, ?, ?, ?)",
+        ((f"https://www.galaxus.ch/de/product/p-{u * 1000 + i}", f"Product {i}", "9.90",
+          (now - timedelta(days=rng.randint(0, 700))).isoformat(), u)
+         for u in range(1, users + 1) for i in range(products_per_user))
+    )
+    conn.execute("""
+        INSERT INTO subscriptions (product_id, frequency, is_active, created_at, user_id,
+                                   start_date, frequency_type, next_buy_date)
+        SELECT id, ?, ABS(RANDOM()) % 2, added_at, user_id, substr(added_at, 1, 10), 'preset',
+               date('now', '+' || (ABS(RANDOM()) % 60) || ' days')
+        FROM products
+    """, (rng.choice(PRESETS),))
+    conn.executemany(
+        "INSERT INTO verification_codes (user_id, code, expires_at) VALUES (?, ?, ?)",
+        ((u, f"{rng.randint(100000, 999999)}", now.isoformat()) for u in range(1, users + 1) for _ in range(3))
+    )
+    conn.commit()
+
+
+def report(conn: sqlite3.Connection, users: int, label: str, repeat: int = 200):
+    print(f"\n=== {label} ===")
+    rng = random.Random(7)
+    for name, sql, params in HOT_QUERIES:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params(1))]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params(rng.randint(1, users))).fetchall()
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:<26} {elapsed_ms:8.3f} ms/query")
+        for step in plan:
+            print(f"    {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--products-per-user", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn, target=1)
+        populate(conn, args.users, args.products_per_user)
+        conn.execute("ANALYZE")
+        print(f"Database: {args.users} users, {args.users * args.products_per_user} products/subscriptions")
+
+        report(conn, args.users, "Before: baseline schema (version 1)")
+        version = migrate(conn)
+        report(conn, args.users, f"After: all migrations (version {version})")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()